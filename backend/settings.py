@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'trains',
 ]
 MIDDLEWARE = [
+    'utils.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -102,6 +103,31 @@ CORS_ALLOW_CREDENTIALS = env('CORS_ALLOW_CREDENTIALS', cast=bool, default=True)
 DATABASES = {
     'default': env.db_url(var='DATABASE_URL', default='sqlite:///db.sqlite3')
 }
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Concurrency tests open one connection per thread, which an in-memory
+    # SQLite test database can't serve
+    DATABASES['default']['TEST'] = {'NAME': env('TEST_DATABASE_NAME', default=str(BASE_DIR / 'test_db.sqlite3'))}
+
+
+# CACHE SETTINGS
+CACHES = {
+    'default': env.cache_url(var='CACHE_URL', default='locmemcache://')
+}
+ROUTE_TOPOLOGY_CACHE_TIMEOUT = env('ROUTE_TOPOLOGY_CACHE_TIMEOUT', default=24 * 60 * 60, cast=int)
+ROUTE_TOPOLOGY_LOCAL_CACHE_SIZE = env('ROUTE_TOPOLOGY_LOCAL_CACHE_SIZE', default=2048, cast=int)
+JOURNEY_SEARCH_CACHE_TIMEOUT = env('JOURNEY_SEARCH_CACHE_TIMEOUT', default=30, cast=int)
+
+
+# TRANSFER SEARCH SETTINGS
+TRANSFER_MIN_CONNECTION_MINUTES = env('TRANSFER_MIN_CONNECTION_MINUTES', default=30, cast=int)
+TRANSFER_MAX_CONNECTION_MINUTES = env('TRANSFER_MAX_CONNECTION_MINUTES', default=12 * 60, cast=int)
+TRANSFER_SEARCH_MAX_RESULTS = env('TRANSFER_SEARCH_MAX_RESULTS', default=20, cast=int)
+
+
+# SEAT DETAILS SETTINGS
+SEAT_COUNTS_IN_SQL = env('SEAT_COUNTS_IN_SQL', default=True, cast=bool)
+SEAT_OVERLAP_USE_NUMPY = env('SEAT_OVERLAP_USE_NUMPY', default=False, cast=bool)
+GROUP_BOOKING_MAX_PASSENGERS = env('GROUP_BOOKING_MAX_PASSENGERS', default=6, cast=int)
 
 
 # REST FRAMEWORK SETTINGS
@@ -129,3 +155,43 @@ EMAIL_USE_TLS = env('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
 EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='noreply@trainbooking.com')
+
+
+# NOTIFICATION SETTINGS
+NOTIFICATION_CHUNK_SIZE = env('NOTIFICATION_CHUNK_SIZE', default=200, cast=int)
+NOTIFICATION_FANOUT_THRESHOLD = env('NOTIFICATION_FANOUT_THRESHOLD', default=1000, cast=int)
+NOTIFICATION_CATCHUP_MINUTES = env('NOTIFICATION_CATCHUP_MINUTES', default=120, cast=int)
+NOTIFICATION_CLAIM_MINUTES = env('NOTIFICATION_CLAIM_MINUTES', default=15, cast=int)
+NOTIFICATION_LOG_LEVEL = env('NOTIFICATION_LOG_LEVEL', default='INFO')
+
+
+# QUERY INSTRUMENTATION SETTINGS
+QUERY_DUPLICATE_THRESHOLD = env('QUERY_DUPLICATE_THRESHOLD', default=3, cast=int)
+QUERY_SLOW_MS = env('QUERY_SLOW_MS', default=100.0, cast=float)
+QUERY_SERVER_TIMING = env('QUERY_SERVER_TIMING', default=True, cast=bool)
+QUERY_METRICS_SINK = env('QUERY_METRICS_SINK', default='')
+QUERY_LOG_LEVEL = env('QUERY_LOG_LEVEL', default='INFO' if DEBUG else 'WARNING')
+
+
+# LOGGING SETTINGS
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'utils.queries': {
+            'handlers': ['console'],
+            'level': QUERY_LOG_LEVEL,
+            'propagate': False,
+        },
+        'bookings.tasks': {
+            'handlers': ['console'],
+            'level': NOTIFICATION_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,97 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from bookings.model_utils import BookingModelUtils, numpy
+from bookings.models import Booking
+from trains.models import Stop
+
+
+class Command(BaseCommand):
+    help = 'Compare per-booking and batched seat overlap counting on synthetic bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedules', type=int, default=20, help='Number of candidate schedules')
+        parser.add_argument('--bookings-per-schedule', type=int, default=10000)
+        parser.add_argument('--stops', type=int, default=20, help='Stops per route')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per method')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        if options['stops'] < 2:
+            raise CommandError('Routes need at least two stops')
+
+        stops = [Stop(order=order) for order in range(options['stops'])]
+        stop_orders_by_schedule_id: dict[int, tuple[int, int]] = {}
+        booking_rows: list[tuple[int, int, int, int]] = []
+        bookings_by_schedule_id: dict[int, list[Booking]] = {}
+        for schedule_id in range(1, options['schedules'] + 1):
+            source_order = random.randrange(options['stops'] - 1)
+            stop_orders_by_schedule_id[schedule_id] = (source_order, random.randrange(source_order + 1, options['stops']))
+
+            bookings_of_schedule = []
+            for _ in range(options['bookings_per_schedule']):
+                from_order = random.randrange(options['stops'] - 1)
+                to_order = random.randrange(from_order + 1, options['stops'])
+                kind = random.randrange(len(BookingModelUtils.BOOKING_KINDS))
+                booking_type, booking_status = BookingModelUtils.BOOKING_KINDS[kind]
+                booking_rows.append((schedule_id, from_order, to_order, kind))
+                bookings_of_schedule.append(Booking(
+                    schedule_id=schedule_id,
+                    from_stop=stops[from_order],
+                    to_stop=stops[to_order],
+                    type=booking_type,
+                    status=booking_status,
+                ))
+            bookings_by_schedule_id[schedule_id] = bookings_of_schedule
+
+        self.stdout.write(
+            f'🎫 {len(booking_rows)} bookings over {options["schedules"]} schedules '
+            f'({options["bookings_per_schedule"]} per schedule)'
+        )
+
+        methods = {
+            'per-booking objects': lambda: self.count_with_booking_objects(bookings_by_schedule_id, stop_orders_by_schedule_id),
+            'batched python': lambda: BookingModelUtils.get_overlapping_booking_counts(
+                booking_rows, stop_orders_by_schedule_id, use_numpy=False,
+            ),
+        }
+        if numpy is not None:
+            methods['batched numpy'] = lambda: BookingModelUtils.get_overlapping_booking_counts(
+                booking_rows, stop_orders_by_schedule_id, use_numpy=True,
+            )
+        else:
+            self.stdout.write(self.style.WARNING('NumPy is not installed, skipping the NumPy path'))
+
+        expected_counts = None
+        for name, method in methods.items():
+            durations = []
+            for _ in range(options['repeat']):
+                started_at = time.perf_counter()
+                counts = method()
+                durations.append((time.perf_counter() - started_at) * 1000)
+
+            if expected_counts is None:
+                expected_counts = counts
+            elif counts != expected_counts:
+                raise CommandError(f'{name} counts differ from the per-booking counts')
+            self.stdout.write(f'   {name:<22} median {statistics.median(durations):>9.2f}ms')
+
+        self.stdout.write(self.style.SUCCESS('✅ All methods agree'))
+
+    def count_with_booking_objects(
+        self,
+        bookings_by_schedule_id: dict[int, list[Booking]],
+        stop_orders_by_schedule_id: dict[int, tuple[int, int]],
+    ) -> dict[int, dict[tuple[str, str], int]]:
+        # The loop get_seat_details used to run over prefetched bookings.
+        counts_by_schedule_id = {}
+        for schedule_id, (source_order, destination_order) in stop_orders_by_schedule_id.items():
+            counts = {booking_kind: 0 for booking_kind in BookingModelUtils.BOOKING_KINDS}
+            for booking in bookings_by_schedule_id[schedule_id]:
+                if max(source_order, booking.from_stop.order) < min(destination_order, booking.to_stop.order):
+                    counts[(booking.type, booking.status)] += 1
+            counts_by_schedule_id[schedule_id] = counts
+
+        return counts_by_schedule_id
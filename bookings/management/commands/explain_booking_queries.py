@@ -0,0 +1,154 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from bookings.models import Booking
+from trains.models import Schedule, Stop
+from utils.enums import BookingStatus, BookingType
+
+
+class RollbackBenchmark(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Show query plans and timings of hot Booking queries with and without their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=200000, help='Number of bookings to generate')
+        parser.add_argument('--users', type=int, default=5000, help='Number of users to generate')
+        parser.add_argument('--hot-schedules', type=int, default=20, help='Schedules receiving half of all bookings')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query when timing')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        try:
+            with transaction.atomic():
+                sample = self.generate_bookings(options)
+                self.analyze()
+
+                self.stdout.write(self.style.MIGRATE_HEADING('\n=== AFTER (with Booking indexes) ==='))
+                after = self.explain_queries(sample, options['repeat'])
+
+                self.drop_indexes()
+                self.analyze()
+
+                self.stdout.write(self.style.MIGRATE_HEADING('\n=== BEFORE (foreign key indexes only) ==='))
+                before = self.explain_queries(sample, options['repeat'])
+
+                self.stdout.write(self.style.MIGRATE_HEADING('\n=== SUMMARY (median ms) ==='))
+                for name in after:
+                    self.stdout.write(f'{name:<28} before {before[name]:>9.3f}   after {after[name]:>9.3f}')
+                raise RollbackBenchmark()
+        except RollbackBenchmark:
+            self.stdout.write(self.style.SUCCESS('\n✅ Generated data and dropped indexes rolled back'))
+
+    def generate_bookings(self, options) -> dict:
+        self.stdout.write(f'🎫 Generating {options["bookings"]} bookings for {options["users"]} users...')
+        User.objects.bulk_create(
+            [User(username=f'explain_user_{idx}', email=f'explain_user_{idx}@trainbooking.com') for idx in range(options['users'])],
+            batch_size=1000,
+        )
+        user_ids = list(User.objects.filter(username__startswith='explain_user_').values_list('id', flat=True))
+
+        schedules = list(Schedule.objects.all())
+        stops_by_route_id: dict[int, list[Stop]] = {}
+        for stop in Stop.objects.filter(deleted=False).order_by('route_id', 'order'):
+            stops_by_route_id.setdefault(stop.route_id, []).append(stop)
+        schedules = [schedule for schedule in schedules if len(stops_by_route_id.get(schedule.route_id, [])) >= 2]
+        hot_schedules = random.sample(schedules, min(options['hot_schedules'], len(schedules)))
+
+        today = timezone.now().date()
+        now = timezone.now()
+        statuses = [BookingStatus.CONFIRMED.value, BookingStatus.WAITING.value, BookingStatus.CANCELLED.value]
+        bookings = []
+        for idx in range(options['bookings']):
+            schedule = random.choice(hot_schedules) if idx % 2 else random.choice(schedules)
+            stops_of_route = stops_by_route_id[schedule.route_id]
+            from_idx = random.randrange(len(stops_of_route) - 1)
+            to_idx = random.randrange(from_idx + 1, len(stops_of_route))
+            booking_status = random.choices(statuses, weights=[70, 20, 10])[0]
+            bookings.append(Booking(
+                user_id=random.choice(user_ids),
+                schedule=schedule,
+                journey_date=today + timedelta(days=random.randrange(0, 120)),
+                from_stop=stops_of_route[from_idx],
+                to_stop=stops_of_route[to_idx],
+                amount=100,
+                status=booking_status,
+                type=BookingType.GENERAL.value if booking_status != BookingStatus.CONFIRMED.value or idx % 5 else BookingType.TATKAL.value,
+                confirmation_datetime=now if booking_status == BookingStatus.CONFIRMED.value else None,
+                boarding_datetime=now + timedelta(days=random.randrange(0, 120), minutes=random.randrange(0, 1440)),
+            ))
+        Booking.objects.bulk_create(bookings, batch_size=2000)
+
+        waiting_booking = Booking.objects.filter(
+            schedule__in=hot_schedules,
+            status=BookingStatus.WAITING.value,
+        ).order_by('-created_at').first()
+        return {
+            'user_id': waiting_booking.user_id,
+            'waiting_booking': waiting_booking,
+            'notify_datetime': now + timedelta(days=1),
+        }
+
+    def get_queries(self, sample: dict) -> dict[str, QuerySet]:
+        waiting_booking: Booking = sample['waiting_booking']
+        waiting_queue = Booking.objects.filter(
+            journey_date=waiting_booking.journey_date,
+            status=BookingStatus.WAITING.value,
+            type=BookingType.GENERAL.value,
+            from_stop=waiting_booking.from_stop_id,
+            schedule=waiting_booking.schedule_id,
+            to_stop=waiting_booking.to_stop_id,
+        ).order_by('created_at')
+
+        return {
+            'waitlist_queue': waiting_queue,
+            'cancel_promotion': waiting_queue[:1],
+            'schedule_run_bookings': Booking.objects.filter(
+                schedule=waiting_booking.schedule_id,
+                journey_date=waiting_booking.journey_date,
+                status=BookingStatus.CONFIRMED.value,
+            ),
+            'user_bookings_page': Booking.objects.filter(user=sample['user_id']).order_by('-created_at')[:10],
+            'departure_notifications': Booking.objects.filter(
+                boarding_datetime__gte=sample['notify_datetime'],
+                boarding_datetime__lte=sample['notify_datetime'] + timedelta(minutes=30),
+                status=BookingStatus.CONFIRMED.value,
+                cancellation_datetime__isnull=True,
+                notification_sent=False,
+            ),
+        }
+
+    def explain_queries(self, sample: dict, repeat: int) -> dict[str, float]:
+        timings = {}
+        for name, queryset in self.get_queries(sample).items():
+            self.stdout.write(self.style.HTTP_INFO(f'\n--- {name}'))
+            self.stdout.write(queryset.explain())
+
+            durations = []
+            for _ in range(repeat):
+                started_at = time.perf_counter()
+                list(queryset.all())
+                durations.append((time.perf_counter() - started_at) * 1000)
+            timings[name] = statistics.median(durations)
+
+        return timings
+
+    def drop_indexes(self) -> None:
+        # The schema editor refuses to run inside a transaction on SQLite,
+        # a plain DROP INDEX is transactional on both SQLite and Postgres.
+        with connection.cursor() as cursor:
+            for index in Booking._meta.indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+
+    def analyze(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(Booking._meta.db_table)}')
@@ -0,0 +1,54 @@
+from datetime import date
+from django.db import transaction
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+from bookings.selectors import BookingSelectors
+from bookings.services import SeatAllocationService, WaitlistPromotionService
+from utils.enums import BookingStatus, BookingType
+
+
+class Command(BaseCommand):
+    help = 'Promote waiting bookings into free seats of every upcoming schedule run with a waitlist'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journey-date', type=date.fromisoformat, help='Only promote on this journey date')
+        parser.add_argument('--schedule-id', type=int, help='Only promote on this schedule')
+
+    def handle(self, *args, **options):
+        filters = dict(
+            status=BookingStatus.WAITING.value,
+            type=BookingType.GENERAL.value,
+            journey_date__gte=timezone.now().date(),
+        )
+        if options['journey_date']:
+            filters['journey_date'] = options['journey_date']
+        if options['schedule_id']:
+            filters['schedule_id'] = options['schedule_id']
+
+        schedule_runs = list(
+            BookingSelectors.generate_queryset(BookingSelectors.Options(filters=filters))
+            .order_by('journey_date', 'schedule_id')
+            .values_list('schedule_id', 'journey_date')
+            .distinct()
+        )
+        self.stdout.write(f'🎫 {len(schedule_runs)} schedule runs with waiting bookings')
+
+        promoted_count = 0
+        for schedule_id, journey_date in schedule_runs:
+            with transaction.atomic():
+                SeatAllocationService.lock_schedule_run(
+                    schedule_id=schedule_id,
+                    journey_date=journey_date,
+                )
+                promoted_ids = WaitlistPromotionService(
+                    input=WaitlistPromotionService.Input(
+                        schedule_id=schedule_id,
+                        journey_date=journey_date,
+                    )
+                ).promote()
+
+            if promoted_ids:
+                promoted_count += len(promoted_ids)
+                self.stdout.write(f'   schedule {schedule_id} on {journey_date}: {len(promoted_ids)} promoted')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {promoted_count} waiting bookings promoted'))
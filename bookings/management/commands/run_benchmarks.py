@@ -0,0 +1,494 @@
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from datetime import date, time as datetime_time, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, transaction
+from django.db.models import Q
+from django.conf import settings
+from django.test import Client
+from django.utils import timezone
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from bookings.models import Booking, ScheduleRun, SeatInventory
+from bookings.services import SeatInventoryService
+from trains.model_utils import RouteModelUtils
+from trains.models import Route, Schedule, Station, Stop, StopPair, Train
+from trains.selectors import ScheduleSelectors
+from trains.services import JourneySearchService
+from utils.enums import BookingStatus, BookingType
+from utils.queries import QueryUtils
+
+
+BENCHMARK_STATION_PREFIX = 'BN'
+BENCHMARK_TRAIN_PREFIX = 'B'
+BENCHMARK_USER_PREFIX = 'bench_user_'
+WEEKDAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
+
+
+class BenchmarkDataSeeder:
+    """
+    Seeds a synthetic network and booking history at a given scale. Seeded rows
+    are recognisable by their station code, train number and username prefixes.
+    """
+
+    def __init__(self, stdout, seed: int):
+        self.stdout = stdout
+        self.random = random.Random(seed)
+
+    @transaction.atomic
+    def seed_network(self, stations: int, routes: int, stops_per_route: int, weekdays_per_route: int) -> None:
+        first_index = Station.all_objects.filter(code__startswith=BENCHMARK_STATION_PREFIX).count()
+        new_stations = Station.objects.bulk_create([
+            Station(
+                name=f'Benchmark Station {index}',
+                city=f'Benchmark City {index}',
+                state='Benchmark',
+                code=f'{BENCHMARK_STATION_PREFIX}{index:05d}',
+            )
+            for index in range(first_index, first_index + stations)
+        ])
+        station_pool = list(Station.objects.filter(code__startswith=BENCHMARK_STATION_PREFIX))
+        if len(station_pool) < stops_per_route:
+            raise CommandError(f'Need at least {stops_per_route} benchmark stations for {stops_per_route} stops per route')
+
+        first_index = Train.all_objects.filter(number__startswith=BENCHMARK_TRAIN_PREFIX).count()
+        trains = Train.objects.bulk_create([
+            Train(name=f'Benchmark Express {index}', number=f'{BENCHMARK_TRAIN_PREFIX}{index:06d}')
+            for index in range(first_index, first_index + routes)
+        ])
+
+        new_routes = []
+        for train in trains:
+            general_seats = self.random.randint(8, 40)
+            general_price = self.random.randint(200, 2000)
+            new_routes.append(Route(
+                name=f'{train.name} Route',
+                train=train,
+                seats={BookingType.GENERAL.value: general_seats, BookingType.TATKAL.value: max(1, general_seats // 5)},
+                pricing={BookingType.GENERAL.value: general_price, BookingType.TATKAL.value: int(general_price * 1.3)},
+            ))
+        new_routes = Route.objects.bulk_create(new_routes)
+
+        new_stops, new_schedules = [], []
+        for route in new_routes:
+            minutes, distance = 0, 0.0
+            for order, station in enumerate(self.random.sample(station_pool, stops_per_route), 1):
+                arrival_minutes = minutes
+                departure_minutes = minutes if order == stops_per_route else minutes + self.random.randint(2, 10)
+                new_stops.append(Stop(
+                    order=order,
+                    route=route,
+                    station=station,
+                    arrival_minutes_from_source=arrival_minutes,
+                    departure_minutes_from_source=departure_minutes,
+                    distance_kms_from_source=round(distance, 2),
+                ))
+                travel_minutes = self.random.randint(30, 120)
+                minutes = departure_minutes + travel_minutes
+                distance += travel_minutes * self.random.uniform(0.7, 1.3)
+
+            departure_time = datetime_time(self.random.randint(0, 23), self.random.choice([0, 15, 30, 45]))
+            arrival_total_minutes = departure_time.hour * 60 + departure_time.minute + minutes
+            arrival_time = datetime_time((arrival_total_minutes // 60) % 24, arrival_total_minutes % 60)
+            for weekday in self.random.sample(WEEKDAYS, weekdays_per_route):
+                new_schedules.append(Schedule(
+                    route=route,
+                    weekday=weekday,
+                    departure_time=departure_time,
+                    arrival_time=arrival_time,
+                ))
+        new_stops = Stop.objects.bulk_create(new_stops, batch_size=1000)
+        Schedule.objects.bulk_create(new_schedules, batch_size=1000)
+
+        stops_by_route_id: dict[int, list[Stop]] = {}
+        for stop in new_stops:
+            stops_by_route_id.setdefault(stop.route_id, []).append(stop)
+        StopPair.objects.bulk_create(
+            [
+                stop_pair
+                for route in new_routes
+                for stop_pair in RouteModelUtils.get_stop_pairs(route, stops_by_route_id[route.id])
+            ],
+            batch_size=1000,
+        )
+        transaction.on_commit(lambda: ScheduleSelectors.timetable_versions.bump(['all']))
+        self.stdout.write(
+            f'🌱 Seeded {len(new_stations)} stations, {len(new_routes)} routes, '
+            f'{len(new_stops)} stops and {len(new_schedules)} schedules'
+        )
+
+    @transaction.atomic
+    def seed_users(self, users: int) -> None:
+        first_index = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).count()
+        password = make_password(None)
+        User.objects.bulk_create([
+            User(username=f'{BENCHMARK_USER_PREFIX}{index}', email=f'{BENCHMARK_USER_PREFIX}{index}@trainbooking.com', password=password)
+            for index in range(first_index, first_index + users)
+        ], batch_size=1000)
+        self.stdout.write(f'🌱 Seeded {users} users')
+
+    @transaction.atomic
+    def seed_bookings(self, bookings: int, days_ahead: int) -> None:
+        user_ids = list(User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).values_list('id', flat=True))
+        schedules = list(
+            Schedule.objects.filter(route__train__number__startswith=BENCHMARK_TRAIN_PREFIX)
+            .select_related('route')
+        )
+        if not user_ids or not schedules:
+            raise CommandError('Seed benchmark users and network before seeding bookings')
+
+        stops_by_route_id: dict[int, list[Stop]] = {}
+        for stop in Stop.objects.filter(route_id__in={schedule.route_id for schedule in schedules}).order_by('order'):
+            stops_by_route_id.setdefault(stop.route_id, []).append(stop)
+
+        today = timezone.now().date()
+        run_dates_by_weekday: dict[str, list[date]] = {}
+        for days in range(2, days_ahead + 1):
+            run_date = today + timedelta(days=days)
+            run_dates_by_weekday.setdefault(run_date.strftime('%a').upper()[:3], []).append(run_date)
+
+        confirmed_seats: dict[tuple[int, date, int], int] = {}
+        for schedule_id, journey_date, segment, confirmed in SeatInventory.objects.filter(
+            schedule_id__in=[schedule.id for schedule in schedules],
+            type=BookingType.GENERAL.value,
+        ).values_list('schedule_id', 'journey_date', 'segment', 'confirmed'):
+            confirmed_seats[(schedule_id, journey_date, segment)] = confirmed
+
+        now = timezone.now()
+        new_bookings = []
+        new_confirmed_seats: dict[tuple[int, date, int], int] = {}
+        for _ in range(bookings):
+            schedule = self.random.choice(schedules)
+            journey_dates = run_dates_by_weekday.get(schedule.weekday)
+            if not journey_dates:
+                continue
+            journey_date = self.random.choice(journey_dates)
+            stops = stops_by_route_id[schedule.route_id]
+            from_index = self.random.randrange(len(stops) - 1)
+            to_index = self.random.randrange(from_index + 1, len(stops))
+            segments = [stop.order for stop in stops[from_index:to_index]]
+
+            if self.random.random() < 0.1:
+                booking_status = BookingStatus.CANCELLED.value
+            elif all(
+                confirmed_seats.get((schedule.id, journey_date, segment), 0) < schedule.route.general_seats
+                for segment in segments
+            ):
+                booking_status = BookingStatus.CONFIRMED.value
+                for segment in segments:
+                    run_segment = (schedule.id, journey_date, segment)
+                    confirmed_seats[run_segment] = confirmed_seats.get(run_segment, 0) + 1
+                    new_confirmed_seats[run_segment] = new_confirmed_seats.get(run_segment, 0) + 1
+            else:
+                booking_status = BookingStatus.WAITING.value
+
+            new_bookings.append(Booking(
+                user_id=self.random.choice(user_ids),
+                journey_date=journey_date,
+                schedule=schedule,
+                from_stop=stops[from_index],
+                to_stop=stops[to_index],
+                amount=schedule.route.general_price,
+                confirmation_datetime=now if booking_status == BookingStatus.CONFIRMED.value else None,
+                cancellation_datetime=now if booking_status == BookingStatus.CANCELLED.value else None,
+                status=booking_status,
+                type=BookingType.GENERAL.value,
+            ))
+        Booking.objects.bulk_create(new_bookings, batch_size=1000)
+
+        segments_by_run_delta: dict[tuple[int, date, int], list[int]] = {}
+        for (schedule_id, journey_date, segment), delta in new_confirmed_seats.items():
+            segments_by_run_delta.setdefault((schedule_id, journey_date, delta), []).append(segment)
+        seat_inventory_service = SeatInventoryService()
+        for (schedule_id, journey_date, delta), segments in segments_by_run_delta.items():
+            seat_inventory_service.update_confirmed_seats(
+                schedule_id=schedule_id,
+                journey_date=journey_date,
+                booking_type=BookingType.GENERAL.value,
+                segments=segments,
+                delta=delta,
+            )
+            seat_inventory_service.mark_schedule_run_changed(schedule_id=schedule_id, journey_date=journey_date)
+        self.stdout.write(f'🌱 Seeded {len(new_bookings)} bookings')
+
+    @transaction.atomic
+    def purge(self) -> None:
+        users = User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX)
+        trains = Train.all_objects.filter(number__startswith=BENCHMARK_TRAIN_PREFIX)
+        schedules = Schedule.all_objects.filter(route__train__in=trains)
+        # Deleted bottom-up without the cascade collector, which trips over
+        # the unmanaged search output models inheriting from Schedule.
+        for queryset in [
+            Booking.all_objects.filter(Q(user__in=users) | Q(schedule__in=schedules)),
+            SeatInventory.all_objects.filter(schedule__in=schedules),
+            ScheduleRun.all_objects.filter(schedule__in=schedules),
+            StopPair.all_objects.filter(route__train__in=trains),
+            Stop.all_objects.filter(route__train__in=trains),
+            schedules,
+            Route.all_objects.filter(train__in=trains),
+            trains,
+            Station.all_objects.filter(code__startswith=BENCHMARK_STATION_PREFIX),
+        ]:
+            queryset._raw_delete(queryset.db)
+        users.delete()
+        transaction.on_commit(lambda: ScheduleSelectors.timetable_versions.bump(['all']))
+        self.stdout.write('🗑️  Removed all benchmark data')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed benchmark data at a given scale, drive search, details, booking create/cancel and '
+        'user bookings list concurrently through the test client, and report latency, queries and rows'
+    )
+
+    SCENARIOS = ['search', 'details', 'book', 'cancel', 'user_bookings']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stations', type=int, default=0, help='Benchmark stations to seed')
+        parser.add_argument('--routes', type=int, default=0, help='Benchmark routes to seed, one train each')
+        parser.add_argument('--stops-per-route', type=int, default=8)
+        parser.add_argument('--weekdays-per-route', type=int, default=4)
+        parser.add_argument('--users', type=int, default=0, help='Benchmark users to seed')
+        parser.add_argument('--bookings', type=int, default=0, help='Benchmark bookings to seed')
+        parser.add_argument('--days-ahead', type=int, default=30, help='Journey dates spread over this many days')
+        parser.add_argument('--purge', action='store_true', help='Remove all benchmark data and exit')
+        parser.add_argument('--seed-only', action='store_true', help='Seed and exit without running the workload')
+        parser.add_argument('--requests', type=int, default=500, help='Workload iterations')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent workers')
+        parser.add_argument('--mix', default='search=60,details=20,book=10,user_bookings=10',
+                            help='Weights of the workload scenarios, book also cancels what it booked')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='Compare the results against an earlier JSON file')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        seeder = BenchmarkDataSeeder(self.stdout, options['seed'])
+        if options['purge']:
+            seeder.purge()
+            return
+
+        if options['stations'] or options['routes']:
+            seeder.seed_network(
+                stations=options['stations'],
+                routes=options['routes'],
+                stops_per_route=options['stops_per_route'],
+                weekdays_per_route=options['weekdays_per_route'],
+            )
+        if options['users']:
+            seeder.seed_users(options['users'])
+        if options['bookings']:
+            seeder.seed_bookings(options['bookings'], options['days_ahead'])
+        if options['seed_only']:
+            return
+
+        self.random = random.Random(options['seed'])
+        mix = {}
+        for weight in options['mix'].split(','):
+            scenario, value = weight.split('=')
+            if scenario not in self.SCENARIOS or scenario == 'cancel':
+                raise CommandError(f'Unknown scenario {scenario}')
+            mix[scenario] = int(value)
+
+        user_ids = list(User.objects.filter(username__startswith=BENCHMARK_USER_PREFIX).values_list('id', flat=True))
+        if not user_ids:
+            user_ids = list(User.objects.filter(is_active=True).values_list('id', flat=True)[:100])
+        if not user_ids:
+            raise CommandError('No users to log in with, seed some with --users')
+        journeys = self.find_bookable_journeys(options['days_ahead'])
+        if not journeys:
+            raise CommandError('No bookable journeys found, seed a network with --stations and --routes')
+
+        dataset = {
+            'stations': Station.objects.count(),
+            'routes': Route.objects.count(),
+            'schedules': Schedule.objects.count(),
+            'users': User.objects.count(),
+            'bookings': Booking.objects.count(),
+        }
+        self.stdout.write(
+            f'📊 Dataset: {dataset["stations"]} stations, {dataset["routes"]} routes, {dataset["schedules"]} schedules, '
+            f'{dataset["users"]} users, {dataset["bookings"]} bookings'
+        )
+        connection.close()
+
+        work = [
+            (self.random.choices(list(mix.keys()), weights=list(mix.values()))[0], self.random.choice(journeys), self.random.choice(user_ids))
+            for _ in range(options['requests'])
+        ]
+        samples = {scenario: [] for scenario in self.SCENARIOS}
+        samples_lock = threading.Lock()
+        clients = threading.local()
+        created_booking_ids = []
+
+        def run(scenario: str, journey: dict, user_id: int) -> None:
+            if not hasattr(clients, 'by_user_id'):
+                clients.by_user_id = {}
+            if user_id not in clients.by_user_id:
+                client = Client()
+                client.force_login(User.objects.get(id=user_id))
+                clients.by_user_id[user_id] = client
+            client = clients.by_user_id[user_id]
+
+            if scenario == 'search':
+                results = [self.measure('search', lambda: client.get('/trains/search/', journey['search']))]
+            elif scenario == 'details':
+                results = [self.measure('details', lambda: client.get('/trains/details/', journey['details']))]
+            elif scenario == 'user_bookings':
+                results = [self.measure('user_bookings', lambda: client.get('/bookings/user-bookings/'))]
+            else:
+                book = self.measure('book', lambda: client.post('/bookings/create/', journey['book'], content_type='application/json'))
+                results = [book]
+                if book['booking_id']:
+                    with samples_lock:
+                        created_booking_ids.append(book['booking_id'])
+                    results.append(self.measure('cancel', lambda: client.post(f'/bookings/{book["booking_id"]}/cancel/')))
+
+            with samples_lock:
+                for result in results:
+                    samples[result['scenario']].append(result)
+
+        def run_safely(item) -> None:
+            try:
+                run(*item)
+            finally:
+                connection.close()
+
+        self.stdout.write(f'🏁 {len(work)} iterations on {options["workers"]} workers')
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            list(executor.map(run_safely, work))
+        elapsed = time.perf_counter() - started_at
+
+        Booking.all_objects.filter(id__in=created_booking_ids).delete()
+        report = {
+            'commit': self.get_commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'options': {key: options[key] for key in ['requests', 'workers', 'mix', 'days_ahead', 'seed']},
+            'dataset': dataset,
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput': round(sum(len(scenario_samples) for scenario_samples in samples.values()) / elapsed, 2),
+            'scenarios': {
+                scenario: self.summarize(scenario_samples)
+                for scenario, scenario_samples in samples.items() if scenario_samples
+            },
+        }
+        self.print_report(report, self.load_report(options['compare']) if options['compare'] else None)
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+            self.stdout.write(f'💾 Results written to {options["output"]}')
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark finished'))
+
+    def find_bookable_journeys(self, days_ahead: int) -> list[dict]:
+        station_pairs = list(
+            StopPair.objects.filter(from_station__code__startswith=BENCHMARK_STATION_PREFIX)
+            .values_list('from_station__code', 'to_station__code').distinct()[:500]
+        ) or list(StopPair.objects.values_list('from_station__code', 'to_station__code').distinct()[:500])
+
+        journeys = []
+        today = timezone.now().date()
+        for source_station_code, destination_station_code in self.random.sample(station_pairs, min(50, len(station_pairs))):
+            journey_date = today + timedelta(days=self.random.randint(2, days_ahead))
+            for journey_schedule in JourneySearchService(
+                input=JourneySearchService.Input(
+                    journey_date=journey_date,
+                    source_station_code=source_station_code,
+                    destination_station_code=destination_station_code,
+                )
+            ).search_journeys():
+                if not journey_schedule.booking_window_details.general_booking_open:
+                    continue
+                query = dict(
+                    journey_date=journey_date.isoformat(),
+                    source_station_code=source_station_code,
+                    destination_station_code=destination_station_code,
+                )
+                journeys.append({
+                    'search': query,
+                    'details': {**query, 'schedule_id': journey_schedule.id, 'booking_type': BookingType.GENERAL.value},
+                    'book': {**query, 'schedule_id': journey_schedule.id, 'booking_type': BookingType.GENERAL.value},
+                })
+        return journeys
+
+    def measure(self, scenario: str, request) -> dict:
+        with QueryUtils.QueryRecorder(name=scenario) as recorder:
+            started_at = time.perf_counter()
+            response = request()
+            duration_ms = (time.perf_counter() - started_at) * 1000
+
+        body = response.json() if response.get('Content-Type', '').startswith('application/json') else {}
+        ok = response.status_code == 200 and body.get('status') is True
+        booking_id = body['result'].get('id') if ok and scenario == 'book' else None
+        return {
+            'scenario': scenario,
+            'ok': ok,
+            'duration_ms': duration_ms,
+            'queries': recorder.count,
+            'rows': recorder.rows,
+            'booking_id': booking_id,
+        }
+
+    def summarize(self, samples: list[dict]) -> dict:
+        durations = sorted(sample['duration_ms'] for sample in samples)
+        percentiles = statistics.quantiles(durations, n=100) if len(durations) > 1 else durations * 99
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for sample in samples if not sample['ok']),
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'max_ms': round(durations[-1], 2),
+            'queries_per_request': round(statistics.mean(sample['queries'] for sample in samples), 2),
+            'rows_per_request': round(statistics.mean(sample['rows'] for sample in samples), 2),
+        }
+
+    def print_report(self, report: dict, baseline: dict | None) -> None:
+        self.stdout.write(f'⏱️  {report["elapsed_seconds"]}s, {report["throughput"]} req/s overall')
+        self.stdout.write(
+            f'   {"scenario":<14}{"reqs":>6}{"errors":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+            f'{"queries":>9}{"rows":>9}'
+        )
+        for scenario, summary in report['scenarios'].items():
+            self.stdout.write(
+                f'   {scenario:<14}{summary["requests"]:>6}{summary["errors"]:>8}{summary["p50_ms"]:>10.1f}'
+                f'{summary["p95_ms"]:>10.1f}{summary["p99_ms"]:>10.1f}{summary["queries_per_request"]:>9.1f}'
+                f'{summary["rows_per_request"]:>9.1f}'
+            )
+            baseline_summary = (baseline or {}).get('scenarios', {}).get(scenario)
+            if baseline_summary:
+                self.stdout.write(
+                    f'   {"  vs " + (baseline.get("commit") or "baseline")[:8]:<14}{"":>14}'
+                    f'{self.get_change(summary["p50_ms"], baseline_summary["p50_ms"]):>10}'
+                    f'{self.get_change(summary["p95_ms"], baseline_summary["p95_ms"]):>10}'
+                    f'{self.get_change(summary["p99_ms"], baseline_summary["p99_ms"]):>10}'
+                    f'{self.get_change(summary["queries_per_request"], baseline_summary["queries_per_request"]):>9}'
+                    f'{self.get_change(summary["rows_per_request"], baseline_summary["rows_per_request"]):>9}'
+                )
+
+    def get_change(self, value: float, baseline_value: float) -> str:
+        if not baseline_value:
+            return '-'
+        return f'{(value - baseline_value) / baseline_value * 100:+.0f}%'
+
+    def load_report(self, path: str) -> dict:
+        try:
+            with open(path) as report_file:
+                return json.load(report_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+    def get_commit(self) -> str | None:
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
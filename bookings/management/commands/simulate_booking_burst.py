@@ -0,0 +1,137 @@
+import time
+from datetime import timedelta
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, transaction
+from django.utils import timezone
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from bookings.models import Booking, SeatInventory
+from bookings.services import SeatAllocationService, SeatInventoryService
+from trains.services import JourneySearchService
+from utils.enums import BookingStatus, BookingType
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent booking requests at one schedule and verify no seat is oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default='ADI', help='Source station code')
+        parser.add_argument('--destination', default='BPL', help='Destination station code')
+        parser.add_argument('--requests', type=int, default=50, help='Number of booking requests in the burst')
+        parser.add_argument('--workers', type=int, default=16, help='Number of concurrent workers')
+        parser.add_argument(
+            '--booking-type',
+            default=BookingType.GENERAL.value,
+            choices=[booking_type.value for booking_type in BookingType],
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the bookings created by the burst')
+
+    def handle(self, *args, **options):
+        journey_schedule, journey_date = self.find_journey_schedule(options['source'], options['destination'])
+        self.stdout.write(
+            f'🎯 Schedule [{journey_schedule.id}] on {journey_date} '
+            f'({options["source"]} -> {options["destination"]}), seats {journey_schedule.route.seats}'
+        )
+
+        users = [
+            User.objects.get_or_create(username=f'burst_user_{idx}', defaults={'email': f'burst_user_{idx}@trainbooking.com'})[0]
+            for idx in range(options['requests'])
+        ]
+
+        def book(user: User):
+            started_at = time.perf_counter()
+            try:
+                booking = SeatAllocationService(
+                    input=SeatAllocationService.Input(
+                        user=user,
+                        journey_date=journey_date,
+                        booking_type=options['booking_type'],
+                        schedule_id=journey_schedule.id,
+                        source_station_code=options['source'],
+                        destination_station_code=options['destination'],
+                    )
+                ).allocate()
+                return booking.id, booking.status, time.perf_counter() - started_at
+            except Exception as e:
+                return None, f'rejected: {e}', time.perf_counter() - started_at
+            finally:
+                connection.close()
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(book, users))
+        elapsed = time.perf_counter() - started_at
+
+        latencies = sorted(result[2] for result in results)
+        outcomes = Counter(result[1] for result in results)
+        self.stdout.write(f'⏱️  {len(results)} requests in {elapsed:.2f}s ({len(results) / elapsed:.1f} req/s)')
+        self.stdout.write(f'   p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, max {latencies[-1] * 1000:.1f}ms')
+        for outcome, count in outcomes.most_common():
+            self.stdout.write(f'   {outcome}: {count}')
+
+        booking_ids = [result[0] for result in results if result[0]]
+        try:
+            self.verify_no_overselling(journey_schedule, journey_date)
+        finally:
+            if not options['keep']:
+                self.remove_bookings(booking_ids)
+
+    def find_journey_schedule(self, source_station_code: str, destination_station_code: str):
+        today = timezone.now().date()
+        for days in range(1, 8):
+            journey_date = today + timedelta(days=days)
+            weekday = journey_date.strftime('%a').upper()[:3]
+            journey_schedules = JourneySearchService(
+                input=JourneySearchService.Input(
+                    journey_date=journey_date,
+                    source_station_code=source_station_code,
+                    destination_station_code=destination_station_code,
+                )
+            ).search_journeys()
+            for journey_schedule in journey_schedules:
+                if journey_schedule.weekday == weekday:
+                    return journey_schedule, journey_date
+
+        raise CommandError(f'No schedule runs from {source_station_code} to {destination_station_code} in the next week')
+
+    def verify_no_overselling(self, journey_schedule, journey_date) -> None:
+        route = journey_schedule.route
+        confirmed_bookings = Booking.objects.filter(
+            schedule=journey_schedule,
+            journey_date=journey_date,
+            status=BookingStatus.CONFIRMED.value,
+        ).values_list('type', 'from_stop__order', 'to_stop__order')
+
+        confirmed_seats = Counter()
+        for booking_type, from_order, to_order in confirmed_bookings:
+            for stop in journey_schedule.stops:
+                if from_order <= stop.order < to_order:
+                    confirmed_seats[(booking_type, stop.order)] += 1
+
+        oversold_segments = []
+        for stop in journey_schedule.stops:
+            general_seats = confirmed_seats[(BookingType.GENERAL.value, stop.order)]
+            total_seats = general_seats + confirmed_seats[(BookingType.TATKAL.value, stop.order)]
+            if general_seats > route.general_seats or total_seats > route.total_seats:
+                oversold_segments.append(stop.order)
+
+        inventory_seats = Counter({
+            (segment_inventory.type, segment_inventory.segment): segment_inventory.confirmed
+            for segment_inventory in SeatInventory.objects.filter(schedule=journey_schedule, journey_date=journey_date)
+        })
+        if +inventory_seats != +confirmed_seats:
+            raise CommandError(f'Seat inventory drifted from bookings: {dict(inventory_seats)} != {dict(confirmed_seats)}')
+        if oversold_segments:
+            raise CommandError(f'Oversold segments starting at stop orders {oversold_segments}')
+
+        self.stdout.write(self.style.SUCCESS('✅ No segment oversold, seat inventory matches bookings'))
+
+    def remove_bookings(self, booking_ids: list[int]) -> None:
+        seat_inventory_service = SeatInventoryService()
+        with transaction.atomic():
+            bookings = Booking.objects.filter(id__in=booking_ids).select_related('from_stop', 'to_stop')
+            for booking in bookings:
+                if booking.status == BookingStatus.CONFIRMED.value:
+                    seat_inventory_service.remove_confirmed_booking(booking=booking)
+            bookings.delete()
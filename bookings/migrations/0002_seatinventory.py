@@ -0,0 +1,72 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:28
+
+import django.db.models.deletion
+import django.db.models.manager
+from django.db import migrations, models
+
+
+def populate_seat_inventory(apps, schema_editor):
+    Stop = apps.get_model('trains', 'Stop')
+    Booking = apps.get_model('bookings', 'Booking')
+    SeatInventory = apps.get_model('bookings', 'SeatInventory')
+
+    orders_by_route_id = {}
+    for route_id, order in Stop._default_manager.filter(deleted=False).values_list('route_id', 'order'):
+        orders_by_route_id.setdefault(route_id, []).append(order)
+
+    confirmed_seats = {}
+    confirmed_bookings = Booking._default_manager.filter(status='confirmed').values_list(
+        'schedule_id', 'journey_date', 'type', 'from_stop__route_id', 'from_stop__order', 'to_stop__order',
+    )
+    for schedule_id, journey_date, booking_type, route_id, from_order, to_order in confirmed_bookings.iterator():
+        for segment in orders_by_route_id.get(route_id, []):
+            if from_order <= segment < to_order:
+                key = (schedule_id, journey_date, booking_type, segment)
+                confirmed_seats[key] = confirmed_seats.get(key, 0) + 1
+
+    SeatInventory._default_manager.bulk_create(
+        [
+            SeatInventory(
+                schedule_id=schedule_id,
+                journey_date=journey_date,
+                type=booking_type,
+                segment=segment,
+                confirmed=confirmed,
+            )
+            for (schedule_id, journey_date, booking_type, segment), confirmed in confirmed_seats.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('trains', '0002_stoppair'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatInventory',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('metadata', models.JSONField(default=dict)),
+                ('journey_date', models.DateField()),
+                ('segment', models.PositiveIntegerField()),
+                ('type', models.CharField(max_length=16)),
+                ('confirmed', models.IntegerField(default=0)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_inventories_of_schedule', to='trains.schedule')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('schedule', 'journey_date', 'type', 'segment'), name='seat_inventory_segment_unique')],
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RunPython(populate_seat_inventory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:30
+
+import django.db.models.deletion
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_seatinventory'),
+        ('trains', '0002_stoppair'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleRun',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('metadata', models.JSONField(default=dict)),
+                ('journey_date', models.DateField()),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs_of_schedule', to='trains.schedule')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('schedule', 'journey_date'), name='schedule_run_unique')],
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_schedulerun'),
+        ('trains', '0002_stoppair'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['schedule', 'journey_date', 'status', 'type', 'from_stop', 'to_stop', 'created_at'], name='booking_schedule_run_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'waiting')), fields=['schedule', 'journey_date', 'from_stop', 'to_stop', 'created_at'], name='booking_waiting_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-created_at'], name='booking_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('notification_sent', False), ('status', 'confirmed')), fields=['journey_date'], name='booking_pending_notify_idx'),
+        ),
+    ]
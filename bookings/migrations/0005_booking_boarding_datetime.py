@@ -0,0 +1,64 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:34
+
+import django.db.models.manager
+from django.conf import settings
+from datetime import datetime, timedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_boarding_datetime(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+
+    bookings = []
+    for booking in Booking._default_manager.select_related('schedule', 'from_stop').iterator(chunk_size=1000):
+        booking.boarding_datetime = timezone.make_aware(
+            datetime.combine(booking.journey_date, booking.schedule.departure_time)
+        ) + timedelta(minutes=booking.from_stop.departure_minutes_from_source)
+        bookings.append(booking)
+
+    Booking._default_manager.bulk_update(bookings, ['boarding_datetime'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_indexes'),
+        ('trains', '0002_stoppair'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskWatermark',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('metadata', models.JSONField(default=dict)),
+                ('name', models.CharField(max_length=256, unique=True)),
+                ('watermark', models.DateTimeField()),
+            ],
+            options={
+                'abstract': False,
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_pending_notify_idx',
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='boarding_datetime',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('notification_sent', False), ('status', 'confirmed')), fields=['boarding_datetime'], name='booking_pending_notify_idx'),
+        ),
+        migrations.RunPython(populate_boarding_datetime, migrations.RunPython.noop),
+    ]
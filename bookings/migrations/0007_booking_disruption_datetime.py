@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_user_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='disruption_datetime',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
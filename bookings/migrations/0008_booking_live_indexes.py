@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_disruption_datetime'),
+        ('trains', '0004_live_row_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_schedule_run_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_waiting_queue_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_pending_notify_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_user_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['schedule', 'journey_date', 'status', 'type', 'from_stop', 'to_stop', 'created_at'], name='booking_schedule_run_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('deleted', False), ('status', 'waiting')), fields=['schedule', 'journey_date', 'from_stop', 'to_stop', 'created_at'], name='booking_waiting_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['user', '-created_at', '-id'], name='booking_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('deleted', False), ('notification_sent', False), ('status', 'confirmed')), fields=['boarding_datetime'], name='booking_pending_notify_idx'),
+        ),
+    ]
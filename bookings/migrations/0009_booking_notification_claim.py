@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_booking_live_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='notification_claim',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='notification_claim_datetime',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,2 +1,148 @@
+from itertools import chain
+from typing import Iterable
+from django.conf import settings
+from bookings.models import SeatInventory
+from utils.enums import BookingType, BookingStatus
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 class BookingModelUtils:
-    pass
\ No newline at end of file
+
+    # Every (type, status) of a booking, its position is the compact code
+    # the overlap rows carry instead of the two strings.
+    BOOKING_KINDS: list[tuple[str, str]] = [
+        (booking_type.value, booking_status.value)
+        for booking_type in BookingType
+        for booking_status in BookingStatus
+    ]
+
+    @staticmethod
+    def get_overlapping_booking_counts(
+        booking_rows: list[tuple[int, int, int, int]],
+        stop_orders_by_schedule_id: dict[int, tuple[int, int]],
+        use_numpy: bool | None = None,
+    ) -> dict[int, dict[tuple[str, str], int]]:
+        """
+        Counts, per schedule and (type, status), the bookings whose journey
+        overlaps the (from_order, to_order) journey asked for on that schedule.
+        Rows are (schedule_id, from_order, to_order, kind code). The NumPy path
+        (SEAT_OVERLAP_USE_NUMPY) gives identical counts, but turning row tuples
+        into an array costs more than the plain loop saves, so it only pays
+        off for rows that already are arrays.
+        """
+        use_numpy = settings.SEAT_OVERLAP_USE_NUMPY if use_numpy is None else use_numpy
+        if use_numpy and numpy is None:
+            raise ValueError('NumPy is not installed')
+
+        schedule_ids = list(stop_orders_by_schedule_id.keys())
+        if use_numpy and booking_rows and schedule_ids:
+            kind_counts = BookingModelUtils.__count_with_numpy(booking_rows, stop_orders_by_schedule_id)
+        else:
+            kind_counts = BookingModelUtils.__count_with_python(booking_rows, stop_orders_by_schedule_id)
+
+        return {
+            schedule_id: dict(zip(BookingModelUtils.BOOKING_KINDS, kind_counts[schedule_id]))
+            for schedule_id in schedule_ids
+        }
+
+    @staticmethod
+    def group_booking_counts_by_schedule_id(
+        booking_counts: Iterable[dict],
+        schedule_ids: list[int],
+    ) -> dict[int, dict[tuple[str, str], int]]:
+        booking_counts_by_schedule_id: dict[int, dict[tuple[str, str], int]] = {
+            schedule_id: {booking_kind: 0 for booking_kind in BookingModelUtils.BOOKING_KINDS}
+            for schedule_id in schedule_ids
+        }
+        for booking_count in booking_counts:
+            booking_kind = (booking_count['type'], booking_count['status'])
+            booking_counts_by_schedule_id[booking_count['schedule_id']][booking_kind] = booking_count['count']
+
+        return booking_counts_by_schedule_id
+
+    @staticmethod
+    def __count_with_python(
+        booking_rows: Iterable[tuple[int, int, int, int]],
+        stop_orders_by_schedule_id: dict[int, tuple[int, int]],
+    ) -> dict[int, list[int]]:
+        kind_counts = {
+            schedule_id: [0] * len(BookingModelUtils.BOOKING_KINDS)
+            for schedule_id in stop_orders_by_schedule_id
+        }
+        for schedule_id, from_order, to_order, kind in booking_rows:
+            stop_orders = stop_orders_by_schedule_id.get(schedule_id)
+            if stop_orders and from_order < stop_orders[1] and to_order > stop_orders[0]:
+                kind_counts[schedule_id][kind] += 1
+
+        return kind_counts
+
+    @staticmethod
+    def __count_with_numpy(
+        booking_rows: list[tuple[int, int, int, int]],
+        stop_orders_by_schedule_id: dict[int, tuple[int, int]],
+    ) -> dict[int, list[int]]:
+        kinds = len(BookingModelUtils.BOOKING_KINDS)
+        schedule_ids = numpy.array(sorted(stop_orders_by_schedule_id), dtype=numpy.int64)
+        source_orders = numpy.array([stop_orders_by_schedule_id[schedule_id][0] for schedule_id in schedule_ids.tolist()], dtype=numpy.int64)
+        destination_orders = numpy.array([stop_orders_by_schedule_id[schedule_id][1] for schedule_id in schedule_ids.tolist()], dtype=numpy.int64)
+
+        rows = numpy.fromiter(
+            chain.from_iterable(booking_rows),
+            dtype=numpy.int64,
+            count=len(booking_rows) * 4,
+        ).reshape(-1, 4)
+        schedule_positions = numpy.searchsorted(schedule_ids, rows[:, 0])
+        known_schedule = schedule_positions < len(schedule_ids)
+        known_schedule[known_schedule] = schedule_ids[schedule_positions[known_schedule]] == rows[known_schedule, 0]
+        schedule_positions = numpy.where(known_schedule, schedule_positions, 0)
+
+        overlapping = (
+            known_schedule
+            & (rows[:, 1] < destination_orders[schedule_positions])
+            & (rows[:, 2] > source_orders[schedule_positions])
+        )
+        counts = numpy.bincount(
+            schedule_positions[overlapping] * kinds + rows[overlapping, 3],
+            minlength=len(schedule_ids) * kinds,
+        ).reshape(len(schedule_ids), kinds)
+
+        return {
+            schedule_id: counts_of_schedule
+            for schedule_id, counts_of_schedule in zip(schedule_ids.tolist(), counts.tolist())
+        }
+
+
+class SeatInventoryModelUtils:
+
+    @staticmethod
+    def group_by_schedule_id(
+        seat_inventory: list[SeatInventory],
+        schedule_ids: list[int],
+    ) -> dict[int, list[SeatInventory]]:
+        seat_inventory_by_schedule_id: dict[int, list[SeatInventory]] = {
+            schedule_id: [] for schedule_id in schedule_ids
+        }
+        for segment_inventory in seat_inventory:
+            seat_inventory_by_schedule_id[segment_inventory.schedule_id].append(segment_inventory)
+
+        return seat_inventory_by_schedule_id
+
+    @staticmethod
+    def get_max_confirmed_seats(
+        seat_inventory: list[SeatInventory],
+        from_order: int,
+        to_order: int,
+    ) -> dict[str, int]:
+        max_confirmed_seats = {booking_type.value: 0 for booking_type in BookingType}
+        for segment_inventory in seat_inventory:
+            if from_order <= segment_inventory.segment < to_order:
+                max_confirmed_seats[segment_inventory.type] = max(
+                    max_confirmed_seats.get(segment_inventory.type, 0),
+                    segment_inventory.confirmed,
+                )
+
+        return max_confirmed_seats
\ No newline at end of file
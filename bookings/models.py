@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from trains.models import Stop, Schedule
+from utils.enums import BookingStatus
 from utils.models import ModelUtils
 
 
@@ -12,8 +13,80 @@ class Booking(ModelUtils.BaseModel):
     to_stop = models.ForeignKey(Stop, on_delete=models.CASCADE, related_name='bookings_of_to_stop', null=False, blank=False)
     amount = models.DecimalField(max_digits=10, decimal_places=2, null=False, blank=False)
     notification_sent = models.BooleanField(default=False, null=False, blank=False)
+    # Set while a notification task owns the reminder, until it is sent or released
+    notification_claim = models.UUIDField(null=True, blank=True)
+    notification_claim_datetime = models.DateTimeField(null=True, blank=True)
     cancellation_datetime = models.DateTimeField(null=True, blank=True)
     confirmation_datetime = models.DateTimeField(null=True, blank=True)
+    boarding_datetime = models.DateTimeField(null=True, blank=True)
+    # Set when the route, stops or schedule of an upcoming booking are retired
+    disruption_datetime = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=16, null=False, blank=False)
     type = models.CharField(max_length=16, null=False, blank=False)
-    
\ No newline at end of file
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['schedule', 'journey_date', 'status', 'type', 'from_stop', 'to_stop', 'created_at'],
+                condition=models.Q(deleted=False),
+                name='booking_schedule_run_idx',
+            ),
+            models.Index(
+                fields=['schedule', 'journey_date', 'from_stop', 'to_stop', 'created_at'],
+                condition=models.Q(status=BookingStatus.WAITING.value, deleted=False),
+                name='booking_waiting_queue_idx',
+            ),
+            models.Index(
+                fields=['user', '-created_at', '-id'],
+                condition=models.Q(deleted=False),
+                name='booking_user_created_idx',
+            ),
+            models.Index(
+                fields=['boarding_datetime'],
+                condition=models.Q(status=BookingStatus.CONFIRMED.value, notification_sent=False, deleted=False),
+                name='booking_pending_notify_idx',
+            ),
+        ]
+
+
+class ScheduleRun(ModelUtils.BaseModel):
+    journey_date = models.DateField(null=False, blank=False)
+    schedule = models.ForeignKey(Schedule, related_name='runs_of_schedule', on_delete=models.CASCADE, null=False, blank=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['schedule', 'journey_date'],
+                name='schedule_run_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.journey_date} \t ON SCHEDULE [{self.schedule_id}]"
+
+
+class SeatInventory(ModelUtils.BaseModel):
+    journey_date = models.DateField(null=False, blank=False)
+    schedule = models.ForeignKey(Schedule, related_name='seat_inventories_of_schedule', on_delete=models.CASCADE, null=False, blank=False)
+    segment = models.PositiveIntegerField(null=False, blank=False)
+    type = models.CharField(max_length=16, null=False, blank=False)
+    confirmed = models.IntegerField(default=0, null=False, blank=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['schedule', 'journey_date', 'type', 'segment'],
+                name='seat_inventory_segment_unique',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.journey_date} [{self.type}] SEGMENT [{self.segment}] \t ON SCHEDULE [{self.schedule_id}]"
+
+
+class TaskWatermark(ModelUtils.BaseModel):
+    name = models.CharField(max_length=256, unique=True, null=False, blank=False)
+    watermark = models.DateTimeField(null=False, blank=False)
+
+    def __str__(self) -> str:
+        return f"[{self.name}] {self.watermark}"
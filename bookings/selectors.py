@@ -1,6 +1,270 @@
-from bookings.models import Booking
+from datetime import date
+from django.db.models import Case, Count, IntegerField, Max, OuterRef, Q, QuerySet, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from bookings.models import Booking, SeatInventory
+from bookings.model_utils import BookingModelUtils
+from utils.enums import BookingStatus, BookingType
 from utils.selectors import BaseSelectors
+from utils.cache import CacheUtils
 
 
 class BookingSelectors(BaseSelectors):
-    model = Booking
\ No newline at end of file
+    model = Booking
+
+    @staticmethod
+    def get_waiting_queue_queryset(booking: Booking) -> QuerySet[Booking]:
+        """
+        Waiting general bookings of the booking's schedule run on segments
+        overlapping its journey, the ones WaitlistPromotionService weighs
+        against it.
+        """
+        return BookingSelectors.generate_queryset(
+            BookingSelectors.Options(
+                filters=dict(
+                    journey_date=booking.journey_date,
+                    status=BookingStatus.WAITING.value,
+                    type=BookingType.GENERAL.value,
+                ),
+            )
+        ).filter(BookingSelectors.get_overlapping_filter({
+            booking.schedule_id: (booking.from_stop.order, booking.to_stop.order),
+        }))
+
+    @staticmethod
+    def get_waiting_bookings_of_schedule_run_queryset(schedule_id: int, journey_date: date) -> QuerySet[Booking]:
+        return BookingSelectors.generate_queryset(
+            BookingSelectors.Options(
+                filters=dict(
+                    journey_date=journey_date,
+                    status=BookingStatus.WAITING.value,
+                    type=BookingType.GENERAL.value,
+                    schedule_id=schedule_id,
+                ),
+                order_by=['created_at', 'id'],
+            )
+        )
+
+    @staticmethod
+    def get_waiting_position(booking: Booking) -> int:
+        waiting_bookings_ahead = BookingSelectors.get_waiting_queue_queryset(booking).filter(
+            Q(created_at__lt=booking.created_at) | Q(created_at=booking.created_at, id__lt=booking.id)
+        )
+        return waiting_bookings_ahead.count() + 1
+
+    @staticmethod
+    def get_waiting_bookings_with_position_queryset(
+        query_options: 'BookingSelectors.Options | None' = None,
+    ) -> QuerySet[Booking]:
+        query_options = query_options or BookingSelectors.Options()
+        query_options.add_multiple_filters(dict(
+            status=BookingStatus.WAITING.value,
+            type=BookingType.GENERAL.value,
+        ))
+
+        waiting_bookings_ahead = (
+            Booking.objects.filter(
+                journey_date=OuterRef('journey_date'),
+                status=BookingStatus.WAITING.value,
+                type=BookingType.GENERAL.value,
+                schedule_id=OuterRef('schedule_id'),
+                # Overlapping segments, as in get_overlapping_filter
+                from_stop__order__lt=OuterRef('to_stop__order'),
+                to_stop__order__gt=OuterRef('from_stop__order'),
+            )
+            .filter(
+                Q(created_at__lt=OuterRef('created_at')) |
+                Q(created_at=OuterRef('created_at'), id__lt=OuterRef('id'))
+            )
+            .order_by()
+            .values('schedule_id')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+
+        return BookingSelectors.generate_queryset(query_options).annotate(
+            waiting_position=Coalesce(Subquery(waiting_bookings_ahead), Value(0)) + 1,
+        )
+
+    @staticmethod
+    def get_overlap_rows_queryset(
+        schedule_ids: list[int],
+        journey_date: date,
+        statuses: list[str] | None = None,
+        query_options: 'BookingSelectors.Options | None' = None,
+    ) -> QuerySet:
+        """
+        (schedule_id, from_order, to_order, kind) rows of the bookings of the
+        given schedule runs, kind being the position of (type, status) in
+        BookingModelUtils.BOOKING_KINDS, for BookingModelUtils.get_overlapping_booking_counts.
+        """
+        query_options = query_options or BookingSelectors.Options()
+        query_options.add_multiple_filters(dict(
+            schedule_id__in=schedule_ids,
+            journey_date=journey_date,
+        ))
+        if statuses:
+            query_options.add_filter('status__in', statuses)
+
+        return (
+            BookingSelectors.generate_queryset(query_options)
+            .order_by()
+            .annotate(kind=Case(
+                *[
+                    When(type=booking_type, status=booking_status, then=Value(kind))
+                    for kind, (booking_type, booking_status) in enumerate(BookingModelUtils.BOOKING_KINDS)
+                ],
+                output_field=IntegerField(),
+            ))
+            .filter(kind__isnull=False)
+            .values_list('schedule_id', 'from_stop__order', 'to_stop__order', 'kind')
+        )
+
+    @staticmethod
+    def get_waiting_counts_queryset(
+        stop_orders_by_schedule_id: dict[int, tuple[int, int]],
+        start_date: date,
+        end_date: date,
+        query_options: 'BookingSelectors.Options | None' = None,
+    ) -> QuerySet:
+        """
+        Waiting general bookings overlapping the (from_order, to_order) journey
+        of each schedule, counted per schedule run.
+        """
+        if not stop_orders_by_schedule_id:
+            return Booking.objects.none()
+
+        query_options = query_options or BookingSelectors.Options()
+        query_options.add_multiple_filters(dict(
+            journey_date__range=(start_date, end_date),
+            status=BookingStatus.WAITING.value,
+            type=BookingType.GENERAL.value,
+        ))
+        return (
+            BookingSelectors.generate_queryset(query_options)
+            .filter(BookingSelectors.get_overlapping_filter(stop_orders_by_schedule_id))
+            .order_by()
+            .values('schedule_id', 'journey_date')
+            .annotate(waiting=Count('id'))
+        )
+
+    @staticmethod
+    def get_overlapping_booking_counts_queryset(
+        stop_orders_by_schedule_id: dict[int, tuple[int, int]],
+        journey_date: date,
+        statuses: list[str] | None = None,
+        query_options: 'BookingSelectors.Options | None' = None,
+    ) -> QuerySet:
+        """
+        Bookings overlapping the (from_order, to_order) journey of each
+        schedule on the journey date, counted per schedule, type and status.
+        """
+        if not stop_orders_by_schedule_id:
+            return Booking.objects.none()
+
+        query_options = query_options or BookingSelectors.Options()
+        query_options.add_filter('journey_date', journey_date)
+        if statuses:
+            query_options.add_filter('status__in', statuses)
+
+        return (
+            BookingSelectors.generate_queryset(query_options)
+            .filter(BookingSelectors.get_overlapping_filter(stop_orders_by_schedule_id))
+            .order_by()
+            .values('schedule_id', 'type', 'status')
+            .annotate(count=Count('id'))
+        )
+
+    @staticmethod
+    def get_overlapping_filter(stop_orders_by_schedule_id: dict[int, tuple[int, int]]) -> Q:
+        # Schedules of one route share their stop orders, one OR branch each.
+        schedule_ids_by_stop_orders: dict[tuple[int, int], list[int]] = {}
+        for schedule_id, stop_orders in stop_orders_by_schedule_id.items():
+            schedule_ids_by_stop_orders.setdefault(stop_orders, []).append(schedule_id)
+
+        overlapping_filter = Q()
+        for (from_order, to_order), schedule_ids in schedule_ids_by_stop_orders.items():
+            overlapping_filter |= Q(
+                schedule_id__in=schedule_ids,
+                from_stop__order__lt=to_order,
+                to_stop__order__gt=from_order,
+            )
+
+        return overlapping_filter
+
+
+class SeatInventorySelectors(BaseSelectors):
+    model = SeatInventory
+
+    inventory_versions = CacheUtils.VersionTokens(namespace='schedule_run_inventory')
+
+    @staticmethod
+    def get_inventory_version_key(schedule_id: int, journey_date: date) -> str:
+        return f'{schedule_id}:{journey_date.isoformat()}'
+
+    @staticmethod
+    def get_inventory_versions(schedule_ids: list[int], journey_date: date) -> dict[int, str]:
+        """
+        Version token of every schedule run, bumped after each committed
+        booking change on it. Read these before the bookings and inventory
+        they describe.
+        """
+        versions = SeatInventorySelectors.inventory_versions.get_many([
+            SeatInventorySelectors.get_inventory_version_key(schedule_id, journey_date)
+            for schedule_id in schedule_ids
+        ])
+        return {
+            schedule_id: versions[SeatInventorySelectors.get_inventory_version_key(schedule_id, journey_date)]
+            for schedule_id in schedule_ids
+        }
+
+    @staticmethod
+    def get_seat_inventory_queryset(
+        schedule_ids: list[int],
+        journey_date: date,
+        query_options: 'SeatInventorySelectors.Options | None' = None,
+    ) -> QuerySet[SeatInventory]:
+        query_options = query_options or SeatInventorySelectors.Options()
+        query_options.add_multiple_filters(dict(
+            schedule_id__in=schedule_ids,
+            journey_date=journey_date,
+        ))
+        return (
+            SeatInventorySelectors.generate_queryset(query_options)
+            .only('schedule_id', 'segment', 'type', 'confirmed')
+        )
+
+    @staticmethod
+    def get_max_confirmed_seats_queryset(
+        stop_orders_by_schedule_id: dict[int, tuple[int, int]],
+        start_date: date,
+        end_date: date,
+        query_options: 'SeatInventorySelectors.Options | None' = None,
+    ) -> QuerySet:
+        """
+        Confirmed seats of the busiest segment inside the (from_order, to_order)
+        journey of each schedule, per schedule run and booking type.
+        """
+        if not stop_orders_by_schedule_id:
+            return SeatInventory.objects.none()
+
+        schedule_ids_by_stop_orders: dict[tuple[int, int], list[int]] = {}
+        for schedule_id, stop_orders in stop_orders_by_schedule_id.items():
+            schedule_ids_by_stop_orders.setdefault(stop_orders, []).append(schedule_id)
+
+        segments_filter = Q()
+        for (from_order, to_order), schedule_ids in schedule_ids_by_stop_orders.items():
+            segments_filter |= Q(
+                schedule_id__in=schedule_ids,
+                segment__gte=from_order,
+                segment__lt=to_order,
+            )
+
+        query_options = query_options or SeatInventorySelectors.Options()
+        query_options.add_filter('journey_date__range', (start_date, end_date))
+        return (
+            SeatInventorySelectors.generate_queryset(query_options)
+            .filter(segments_filter)
+            .order_by()
+            .values('schedule_id', 'journey_date', 'type')
+            .annotate(confirmed=Max('confirmed'))
+        )
\ No newline at end of file
@@ -0,0 +1,9 @@
+from bookings.services.seat_inventory import SeatInventoryService
+from bookings.services.seat_allocation import SeatAllocationService
+from bookings.services.waitlist_promotion import WaitlistPromotionService
+
+__all__ = [
+    'SeatInventoryService',
+    'SeatAllocationService',
+    'WaitlistPromotionService',
+]
@@ -0,0 +1,169 @@
+import uuid
+from datetime import date
+from dataclasses import dataclass
+from django.utils import timezone
+from dataclasses_json import dataclass_json
+from django.db import connection, transaction
+from django.contrib.auth.models import User
+from bookings.models import Booking, ScheduleRun
+from utils.enums import BookingStatus, BookingType
+from trains.selectors import ScheduleSelectors
+from bookings.selectors import SeatInventorySelectors
+from trains.services import JourneySearchService, JourneyDetailsService
+from bookings.services.seat_inventory import SeatInventoryService
+
+
+class SeatAllocationService:
+
+    @dataclass_json
+    @dataclass
+    class Input:
+        user: User
+        journey_date: date
+        booking_type: str
+        schedule_id: int
+        source_station_code: str
+        destination_station_code: str
+
+    def __init__(self, input: 'SeatAllocationService.Input'):
+        self.user = input.user
+        self.journey_date = input.journey_date
+        self.booking_type = input.booking_type
+        self.schedule_id = input.schedule_id
+        self.source_station_code = input.source_station_code
+        self.destination_station_code = input.destination_station_code
+        self.seat_inventory_service = SeatInventoryService()
+
+    @staticmethod
+    def lock_schedule_run(schedule_id: int, journey_date: date) -> None:
+        """
+        Serializes seat allocation for one schedule on one journey date.
+        Must be the first statement of the surrounding transaction.
+        """
+        ScheduleRun.objects.bulk_create(
+            [ScheduleRun(schedule_id=schedule_id, journey_date=journey_date)],
+            ignore_conflicts=True,
+        )
+        if connection.features.has_select_for_update:
+            ScheduleRun.all_objects.select_for_update().get(
+                schedule_id=schedule_id,
+                journey_date=journey_date,
+            )
+        # SQLite has no row locks, the INSERT above already holds the
+        # database write lock until the transaction commits.
+
+    def allocate(self) -> Booking:
+        return self.allocate_group(passenger_count=1)[0]
+
+    def allocate_group(self, passenger_count: int) -> list[Booking]:
+        """
+        Books passenger_count seats on one schedule run in one critical section.
+        General bookings confirm what is available and waitlist the rest,
+        tatkal bookings are confirmed for the whole group or not at all.
+        """
+        if passenger_count < 1:
+            raise ValueError('At least one passenger is required')
+
+        # Topology, pricing and booking windows do not change under a
+        # booking, so they are resolved before entering the critical section.
+        journey_schedule = self.__get_journey_schedule()
+        self.__validate_booking_window(journey_schedule)
+
+        with transaction.atomic():
+            SeatAllocationService.lock_schedule_run(
+                schedule_id=journey_schedule.id,
+                journey_date=self.journey_date,
+            )
+
+            available_seats = getattr(self.__get_available_seats(journey_schedule), self.booking_type)
+            if self.booking_type == BookingType.GENERAL.value:
+                confirmed_count = min(max(available_seats, 0), passenger_count)
+            elif available_seats >= passenger_count:
+                confirmed_count = passenger_count
+            elif passenger_count == 1:
+                raise ValueError('No tatkal seats available')
+            else:
+                raise ValueError(f'Only {max(available_seats, 0)} tatkal seats available for {passenger_count} passengers')
+
+            now = timezone.now()
+            metadata = {'group_id': str(uuid.uuid4()), 'group_size': passenger_count} if passenger_count > 1 else {}
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    user=self.user,
+                    journey_date=self.journey_date,
+                    schedule=journey_schedule,
+                    from_stop=journey_schedule.source_stop,
+                    to_stop=journey_schedule.destination_stop,
+                    amount=getattr(journey_schedule.general_details.pricing, self.booking_type),
+                    confirmation_datetime=now if position < confirmed_count else None,
+                    boarding_datetime=journey_schedule.booking_window_details.departure_datetime,
+                    status=BookingStatus.CONFIRMED.value if position < confirmed_count else BookingStatus.WAITING.value,
+                    type=self.booking_type,
+                    metadata=dict(metadata),
+                )
+                for position in range(passenger_count)
+            ])
+            self.seat_inventory_service.update_confirmed_seats(
+                schedule_id=journey_schedule.id,
+                journey_date=self.journey_date,
+                booking_type=self.booking_type,
+                segments=self.seat_inventory_service.get_segments(
+                    route_id=journey_schedule.route_id,
+                    from_order=journey_schedule.source_stop.order,
+                    to_order=journey_schedule.destination_stop.order,
+                    stops_of_route=journey_schedule.stops,
+                ),
+                delta=confirmed_count,
+            )
+            self.seat_inventory_service.mark_schedule_run_changed(
+                schedule_id=journey_schedule.id,
+                journey_date=self.journey_date,
+            )
+
+        return bookings
+
+    def __get_journey_schedule(self) -> JourneySearchService.ScheduleOutputModel:
+        journey_search_service = JourneySearchService(
+            input=JourneySearchService.Input(
+                journey_date=self.journey_date,
+                source_station_code=self.source_station_code,
+                destination_station_code=self.destination_station_code,
+                schedule_query_options=ScheduleSelectors.Options(
+                    filters=dict(id=self.schedule_id),
+                ),
+            )
+        )
+
+        journey_schedules = journey_search_service.search_journeys()
+        if not journey_schedules:
+            raise ValueError('Schedule does not run between the given stations')
+        return journey_schedules[0]
+
+    def __validate_booking_window(self, journey_schedule: JourneySearchService.ScheduleOutputModel) -> None:
+        booking_window_details = journey_schedule.booking_window_details
+        if self.booking_type == BookingType.GENERAL.value:
+            if not booking_window_details.general_booking_open:
+                raise ValueError('General booking window not open')
+        elif self.booking_type == BookingType.TATKAL.value:
+            if not booking_window_details.tatkal_booking_open:
+                raise ValueError('Tatkal booking window not open')
+
+    def __get_available_seats(
+        self,
+        journey_schedule: JourneySearchService.ScheduleOutputModel,
+    ) -> JourneyDetailsService.SeatAvailability:
+        seat_inventory_queryset = SeatInventorySelectors.get_seat_inventory_queryset(
+            schedule_ids=[journey_schedule.id],
+            journey_date=self.journey_date,
+        )
+        journey_details_service = JourneyDetailsService(
+            input=JourneyDetailsService.Input(
+                schedule=journey_schedule,
+                journey_date=self.journey_date,
+                destination_stop=journey_schedule.destination_stop,
+                source_stop=journey_schedule.source_stop,
+            )
+        )
+
+        confirmed_seats = journey_details_service.get_confirmed_seats(list(seat_inventory_queryset))
+        return journey_details_service.get_available_seats(confirmed_seats)
@@ -0,0 +1,106 @@
+from datetime import date
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from trains.models import Stop
+from bookings.models import Booking, SeatInventory
+from trains.selectors import StopSelectors
+from bookings.selectors import SeatInventorySelectors
+
+
+class SeatInventoryService:
+
+    def get_segments(
+        self,
+        route_id: int,
+        from_order: int,
+        to_order: int,
+        stops_of_route: list[Stop] | None = None,
+    ) -> list[int]:
+        if stops_of_route is not None:
+            return [stop.order for stop in stops_of_route if from_order <= stop.order < to_order]
+
+        stops_queryset = StopSelectors.generate_queryset(
+            StopSelectors.Options(
+                filters=dict(route_id=route_id, order__gte=from_order, order__lt=to_order),
+            )
+        )
+        return list(stops_queryset.values_list('order', flat=True))
+
+    def add_confirmed_booking(
+        self,
+        booking: Booking,
+        stops_of_route: list[Stop] | None = None,
+    ) -> None:
+        self.__update_confirmed_seats_of_booking(booking=booking, stops_of_route=stops_of_route, delta=1)
+
+    def remove_confirmed_booking(
+        self,
+        booking: Booking,
+        stops_of_route: list[Stop] | None = None,
+    ) -> None:
+        self.__update_confirmed_seats_of_booking(booking=booking, stops_of_route=stops_of_route, delta=-1)
+
+    def mark_schedule_run_changed(
+        self,
+        schedule_id: int,
+        journey_date: date,
+    ) -> None:
+        # Cached search results carry this version, bump it once the
+        # booking change is visible to readers.
+        version_key = SeatInventorySelectors.get_inventory_version_key(schedule_id, journey_date)
+        transaction.on_commit(lambda: SeatInventorySelectors.inventory_versions.bump([version_key]))
+
+    def update_confirmed_seats(
+        self,
+        schedule_id: int,
+        journey_date: date,
+        booking_type: str,
+        segments: list[int],
+        delta: int,
+    ) -> None:
+        if not segments or not delta:
+            return
+
+        with transaction.atomic():
+            SeatInventory.objects.bulk_create(
+                [
+                    SeatInventory(
+                        schedule_id=schedule_id,
+                        journey_date=journey_date,
+                        segment=segment,
+                        type=booking_type,
+                    )
+                    for segment in segments
+                ],
+                ignore_conflicts=True,
+            )
+            SeatInventory.all_objects.filter(
+                schedule_id=schedule_id,
+                journey_date=journey_date,
+                type=booking_type,
+                segment__in=segments,
+            ).update(
+                confirmed=F('confirmed') + delta,
+                updated_at=timezone.now(),
+            )
+
+    def __update_confirmed_seats_of_booking(
+        self,
+        booking: Booking,
+        stops_of_route: list[Stop] | None,
+        delta: int,
+    ) -> None:
+        segments = self.get_segments(
+            route_id=booking.from_stop.route_id,
+            from_order=booking.from_stop.order,
+            to_order=booking.to_stop.order,
+            stops_of_route=stops_of_route,
+        )
+        self.update_confirmed_seats(
+            schedule_id=booking.schedule_id,
+            journey_date=booking.journey_date,
+            booking_type=booking.type,
+            segments=segments,
+            delta=delta,
+        )
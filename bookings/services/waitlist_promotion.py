@@ -0,0 +1,103 @@
+from datetime import date
+from dataclasses import dataclass
+from django.utils import timezone
+from dataclasses_json import dataclass_json
+from bookings.models import Booking
+from utils.enums import BookingStatus, BookingType
+from trains.selectors import RouteSelectors, ScheduleSelectors
+from bookings.selectors import BookingSelectors, SeatInventorySelectors
+from bookings.services.seat_inventory import SeatInventoryService
+
+
+class WaitlistPromotionService:
+
+    @dataclass_json
+    @dataclass
+    class Input:
+        schedule_id: int
+        journey_date: date
+
+    def __init__(self, input: 'WaitlistPromotionService.Input'):
+        self.schedule_id = input.schedule_id
+        self.journey_date = input.journey_date
+        self.seat_inventory_service = SeatInventoryService()
+
+    def promote(self) -> list[int]:
+        """
+        Confirms waiting general bookings, oldest first, for as long as every
+        segment they cover has a free seat, whatever stops they travel between.
+        Run it inside the transaction holding the schedule run lock, once after
+        all cancellations of that transaction. Returns the promoted booking ids.
+        """
+        route_id = ScheduleSelectors.generate_queryset(
+            ScheduleSelectors.Options(filters=dict(id=self.schedule_id))
+        ).values_list('route_id', flat=True).first()
+        if route_id is None:
+            # Retired schedules take no more passengers
+            return []
+        route = RouteSelectors.get_cached_route_topologies(route_ids=[route_id])[route_id]
+        segments = [stop.order for stop in route.stops_of_route.all()]
+
+        confirmed_seats_by_type: dict[str, dict[int, int]] = {
+            BookingType.GENERAL.value: {},
+            BookingType.TATKAL.value: {},
+        }
+        for seat_inventory in SeatInventorySelectors.get_seat_inventory_queryset(
+            schedule_ids=[self.schedule_id],
+            journey_date=self.journey_date,
+        ):
+            confirmed_seats_by_type.setdefault(seat_inventory.type, {})[seat_inventory.segment] = seat_inventory.confirmed
+
+        # Tatkal bookings beyond the tatkal quota sit on general seats.
+        free_seats_by_segment: dict[int, int] = {}
+        for segment in segments:
+            confirmed_general = confirmed_seats_by_type[BookingType.GENERAL.value].get(segment, 0)
+            confirmed_tatkal = confirmed_seats_by_type[BookingType.TATKAL.value].get(segment, 0)
+            free_seats_by_segment[segment] = min(
+                route.general_seats - confirmed_general,
+                route.total_seats - confirmed_general - confirmed_tatkal,
+            )
+        if all(free_seats <= 0 for free_seats in free_seats_by_segment.values()):
+            return []
+
+        promoted_ids: list[int] = []
+        promoted_count_by_segment: dict[int, int] = {}
+        for booking_id, from_order, to_order in BookingSelectors.get_waiting_bookings_of_schedule_run_queryset(
+            schedule_id=self.schedule_id,
+            journey_date=self.journey_date,
+        ).values_list('id', 'from_stop__order', 'to_stop__order'):
+            booking_segments = [segment for segment in segments if from_order <= segment < to_order]
+            if not all(free_seats_by_segment[segment] > 0 for segment in booking_segments):
+                continue
+
+            promoted_ids.append(booking_id)
+            for segment in booking_segments:
+                free_seats_by_segment[segment] -= 1
+                promoted_count_by_segment[segment] = promoted_count_by_segment.get(segment, 0) + 1
+
+        if not promoted_ids:
+            return []
+
+        now = timezone.now()
+        Booking.objects.filter(id__in=promoted_ids).update(
+            status=BookingStatus.CONFIRMED.value,
+            confirmation_datetime=now,
+            updated_at=now,
+        )
+        segments_by_delta: dict[int, list[int]] = {}
+        for segment, promoted_count in promoted_count_by_segment.items():
+            segments_by_delta.setdefault(promoted_count, []).append(segment)
+        for delta, delta_segments in segments_by_delta.items():
+            self.seat_inventory_service.update_confirmed_seats(
+                schedule_id=self.schedule_id,
+                journey_date=self.journey_date,
+                booking_type=BookingType.GENERAL.value,
+                segments=delta_segments,
+                delta=delta,
+            )
+        self.seat_inventory_service.mark_schedule_run_changed(
+            schedule_id=self.schedule_id,
+            journey_date=self.journey_date,
+        )
+
+        return promoted_ids
@@ -1,73 +1,159 @@
+import uuid
+import logging
+from itertools import islice
 from celery import shared_task
 from django.utils import timezone
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from utils.enums import BookingStatus
-from datetime import timedelta
-from .models import Booking
+from datetime import datetime, timedelta
+from django.db.models import Q
+from .models import Booking, TaskWatermark
 
 
-def send_booking_notification_email(booking: Booking):
-    try:
-        train = booking.schedule.route.train
-        subject = f"Train Departure Reminder - {train.name} ({train.number})"
-        message = f"""
+logger = logging.getLogger(__name__)
+
+
+def build_booking_notification_email(booking: Booking) -> EmailMessage:
+    train = booking.schedule.route.train
+    subject = f"Train Departure Reminder - {train.name} ({train.number})"
+    boarding_time = timezone.localtime(booking.boarding_datetime).strftime('%H:%M')
+    message = f"""
 Dear {booking.user.first_name or booking.user.username},
-Your train is departing in 30 minutes!
-        """
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[booking.user.email],
-            fail_silently=False,
-        )
-        
-        print(f"Notification email sent for booking {booking.id}")
-        return True
-        
-    except Exception as e:
-        print(f"Failed to send email for booking {booking.id}: {str(e)}")
-        raise 
+Your train is departing from {booking.from_stop.station.name} at {boarding_time}!
+Booking reference: {booking.type.upper()}-{booking.id}
+    """
+
+    return EmailMessage(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[booking.user.email],
+    )
+
+
+def get_unclaimed_filter(now: datetime) -> Q:
+    # A claim older than NOTIFICATION_CLAIM_MINUTES belongs to a task that died
+    return Q(notification_claim__isnull=True) | Q(
+        notification_claim_datetime__lt=now - timedelta(minutes=settings.NOTIFICATION_CLAIM_MINUTES),
+    )
+
+
+def claim_booking_notifications(booking_ids: list[int]) -> tuple[str, int]:
+    """
+    Claims the unsent reminders of one chunk of bookings with a single
+    conditional UPDATE. Rows another run claimed first are left out, so
+    overlapping runs never send the same reminder twice.
+    """
+    now = timezone.now()
+    claim = str(uuid.uuid4())
+    claimed_count = Booking.objects.filter(
+        get_unclaimed_filter(now),
+        id__in=booking_ids,
+        notification_sent=False,
+    ).update(notification_claim=claim, notification_claim_datetime=now)
+    return claim, claimed_count
+
+
+def send_booking_notification_emails(claim: str) -> int:
+    """
+    Sends the reminders of one claimed chunk of bookings over a single SMTP
+    connection, marks the delivered ones with one UPDATE and releases the
+    rest for the next run.
+    """
+    bookings = Booking.objects.filter(
+        notification_claim=claim,
+        notification_sent=False,
+        # A chunk queued for too long is left to the next run to skip
+        boarding_datetime__gte=timezone.now(),
+    ).select_related(
+        'user', 'schedule__route__train', 'from_stop__station',
+    )
+
+    sent_booking_ids = []
+    with get_connection(fail_silently=False) as connection:
+        for booking in bookings.iterator(chunk_size=settings.NOTIFICATION_CHUNK_SIZE):
+            # One message per call on the already open connection costs the
+            # same as a batched call, and tells us which bookings to mark.
+            try:
+                connection.send_messages([build_booking_notification_email(booking)])
+                sent_booking_ids.append(booking.id)
+            except Exception:
+                logger.exception('Failed to send departure notification for booking %s', booking.id)
+
+    Booking.objects.filter(id__in=sent_booking_ids).update(
+        notification_sent=True,
+        notification_claim=None,
+        notification_claim_datetime=None,
+    )
+    Booking.objects.filter(notification_claim=claim, notification_sent=False).update(
+        notification_claim=None,
+        notification_claim_datetime=None,
+    )
+    return len(sent_booking_ids)
+
+
+@shared_task
+def send_departure_notifications_chunk(claim: str):
+    notifications_sent = send_booking_notification_emails(claim)
+    logger.info('Sent %s departure notifications', notifications_sent)
 
 
 @shared_task
 def send_departure_notifications():
     """
-    Periodic task that runs every minute to check for bookings 
-    that need departure notifications (30 minutes before departure).
+    Periodic task that runs every minute to check for bookings
+    that need departure notifications (30 minutes before boarding).
+    Scans every boarding time since the previous successful run, so
+    a late or stalled beat catches up instead of skipping minutes,
+    without reminding anyone of a train that has already left.
+    Each chunk is claimed and then sent here while the total stays under
+    NOTIFICATION_FANOUT_THRESHOLD, later chunks go to worker tasks.
     """
     now = timezone.now()
-    
-    target_time = now + timedelta(minutes=30)
-    target_time_only = target_time.time()
-    target_date = target_time.date()
-    
-    weekday = target_time.strftime('%a').upper()[:3]
-    bookings_to_notify = Booking.objects.filter(
-        journey_date=target_date,
-        schedule__weekday=weekday,
-        schedule__departure_time__hour=target_time_only.hour,
-        schedule__departure_time__minute=target_time_only.minute,
+    watermark, _ = TaskWatermark.objects.get_or_create(
+        name='send_departure_notifications',
+        defaults={'watermark': now},
+    )
+    window_start = max(watermark.watermark, now - timedelta(minutes=settings.NOTIFICATION_CATCHUP_MINUTES))
+    window_end = now + timedelta(minutes=30)
+
+    pending_bookings = Booking.objects.filter(
+        get_unclaimed_filter(now),
         status=BookingStatus.CONFIRMED.value,
         cancellation_datetime__isnull=True,
         notification_sent=False
-    ).select_related(
-        'user', 'schedule', 'schedule__route', 'schedule__route__train',
-        'from_stop', 'from_stop__station', 'to_stop', 'to_stop__station'
     )
-    
-    notifications_sent = 0
-    
-    for booking in bookings_to_notify:
-        try:
-            seat_number = f"{booking.type.upper()}-{booking.id}"
-            send_booking_notification_email(booking, seat_number)
-            booking.notification_sent = True
-            booking.save(update_fields=['notification_sent'])
-            notifications_sent += 1
-        except Exception as e:
-            print(f"Failed to send notification for booking {booking.id}: {str(e)}")
-    
-    print(f"Sent {notifications_sent} departure notifications")
+    # Trains that left while the beat was stalled get no reminder, they are
+    # only marked so they drop out of the pending notifications index.
+    missed_count = pending_bookings.filter(
+        boarding_datetime__gte=window_start,
+        boarding_datetime__lt=now,
+    ).update(notification_sent=True)
+    if missed_count:
+        logger.warning('Skipped %s departure notifications of trains that already left', missed_count)
+
+    booking_ids = pending_bookings.filter(
+        boarding_datetime__gte=now,
+        boarding_datetime__lte=window_end,
+    ).values_list('id', flat=True).iterator(chunk_size=settings.NOTIFICATION_CHUNK_SIZE)
+
+    claimed_count = notifications_sent = dispatched_chunks = 0
+    while booking_id_chunk := list(islice(booking_ids, settings.NOTIFICATION_CHUNK_SIZE)):
+        fan_out = claimed_count >= settings.NOTIFICATION_FANOUT_THRESHOLD
+        claim, chunk_claimed_count = claim_booking_notifications(booking_id_chunk)
+        if not chunk_claimed_count:
+            continue
+
+        claimed_count += chunk_claimed_count
+        if fan_out:
+            send_departure_notifications_chunk.delay(claim)
+            dispatched_chunks += 1
+        else:
+            notifications_sent += send_booking_notification_emails(claim)
+
+    logger.info(
+        'Sent %s and dispatched %s chunks of %s claimed departure notifications',
+        notifications_sent, dispatched_chunks, claimed_count,
+    )
+    TaskWatermark.objects.filter(id=watermark.id).update(watermark=now, updated_at=timezone.now())
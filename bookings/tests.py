@@ -0,0 +1,487 @@
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from django.urls import reverse
+from django.conf import settings
+from django.db import connection
+from django.core import mail
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from unittest import mock, skipIf
+from django.utils import timezone
+from django.contrib.auth.models import User
+from bookings.models import Booking, SeatInventory, TaskWatermark
+from bookings.model_utils import BookingModelUtils, numpy
+from bookings.selectors import BookingSelectors
+from bookings import tasks
+from bookings.services import SeatAllocationService
+from trains.models import Stop, Schedule
+from trains.tests import ScheduleTestMixin
+from utils.enums import BookingStatus, BookingType
+from utils.queries import QueryUtils
+
+
+class SeatAllocationConcurrencyTest(ScheduleTestMixin, TransactionTestCase):
+    """
+    Books one schedule run from many threads at once, each on its own
+    database connection, and checks no segment is oversold.
+    """
+
+    WORKERS = 16
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create(username=f'burst_user_{idx}') for idx in range(48)]
+
+    def allocate_concurrently(self, schedule: Schedule, journey_date: date, requests: list[tuple[str, str, str, int]]) -> list:
+        def allocate(request_idx: int):
+            source_station_code, destination_station_code, booking_type, passenger_count = requests[request_idx]
+            try:
+                return SeatAllocationService(
+                    input=SeatAllocationService.Input(
+                        user=self.users[request_idx],
+                        journey_date=journey_date,
+                        booking_type=booking_type,
+                        schedule_id=schedule.id,
+                        source_station_code=source_station_code,
+                        destination_station_code=destination_station_code,
+                    )
+                ).allocate_group(passenger_count=passenger_count)
+            except ValueError as e:
+                return e
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            return list(executor.map(allocate, range(len(requests))))
+
+    def assert_not_oversold(self, schedule: Schedule, journey_date: date) -> Counter:
+        orders = dict(Stop.objects.filter(route=schedule.route).values_list('id', 'order'))
+        confirmed_seats = Counter()
+        for booking_type, from_stop_id, to_stop_id in Booking.objects.filter(
+            schedule=schedule,
+            journey_date=journey_date,
+            status=BookingStatus.CONFIRMED.value,
+        ).values_list('type', 'from_stop_id', 'to_stop_id'):
+            for segment in range(orders[from_stop_id], orders[to_stop_id]):
+                confirmed_seats[(booking_type, segment)] += 1
+
+        for segment in range(len(self.stations) - 1):
+            general_seats = confirmed_seats[(BookingType.GENERAL.value, segment)]
+            tatkal_seats = confirmed_seats[(BookingType.TATKAL.value, segment)]
+            self.assertLessEqual(general_seats, self.GENERAL_SEATS)
+            self.assertLessEqual(general_seats + tatkal_seats, self.GENERAL_SEATS + self.TATKAL_SEATS)
+
+        inventory_seats = Counter({
+            (seat_inventory.type, seat_inventory.segment): seat_inventory.confirmed
+            for seat_inventory in SeatInventory.objects.filter(schedule=schedule, journey_date=journey_date)
+        })
+        self.assertEqual(+inventory_seats, +confirmed_seats)
+        return confirmed_seats
+
+    def test_general_burst_over_overlapping_segments(self):
+        journey_date = timezone.now().date() + timedelta(days=2)
+        schedule = self.create_schedule(journey_date, time(10, 0))
+        requests = [
+            [('AAA', 'CCC'), ('AAA', 'BBB'), ('BBB', 'CCC')][idx % 3] + (BookingType.GENERAL.value, 1 + idx % 2)
+            for idx in range(len(self.users))
+        ]
+
+        results = self.allocate_concurrently(schedule, journey_date, requests)
+
+        self.assertFalse([result for result in results if isinstance(result, Exception)])
+        confirmed_seats = self.assert_not_oversold(schedule, journey_date)
+        # Far more passengers than seats, so every segment fills up
+        for segment in range(len(self.stations) - 1):
+            self.assertEqual(confirmed_seats[(BookingType.GENERAL.value, segment)], self.GENERAL_SEATS)
+        self.assertEqual(
+            Booking.objects.filter(schedule=schedule).count(),
+            sum(passenger_count for _, _, _, passenger_count in requests),
+        )
+
+    def test_tatkal_burst_confirms_whole_groups_only(self):
+        # Tatkal booking is open from two hours until 1h50 before departure
+        departure_datetime = timezone.localtime() + timedelta(hours=1, minutes=55)
+        journey_date = departure_datetime.date()
+        schedule = self.create_schedule(journey_date, departure_datetime.time().replace(microsecond=0))
+        requests = [('AAA', 'CCC', BookingType.TATKAL.value, 1 + idx % 2) for idx in range(len(self.users))]
+
+        results = self.allocate_concurrently(schedule, journey_date, requests)
+
+        confirmed_groups = [result for result in results if not isinstance(result, Exception)]
+        self.assertTrue(confirmed_groups)
+        for bookings in confirmed_groups:
+            self.assertTrue(all(booking.status == BookingStatus.CONFIRMED.value for booking in bookings))
+        confirmed_seats = self.assert_not_oversold(schedule, journey_date)
+        self.assertLessEqual(
+            confirmed_seats[(BookingType.TATKAL.value, 0)],
+            self.GENERAL_SEATS + self.TATKAL_SEATS,
+        )
+
+
+class WaitingPositionTest(ScheduleTestMixin, TestCase):
+    """
+    Waiting positions count the earlier waiting bookings on overlapping
+    segments, the order WaitlistPromotionService confirms them in.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='waiting_user')
+        self.journey_date = timezone.now().date() + timedelta(days=2)
+        self.schedule = self.create_schedule(self.journey_date, time(10, 0))
+
+    def allocate(self, source_station_code: str, destination_station_code: str, passenger_count: int = 1) -> list[Booking]:
+        return SeatAllocationService(
+            input=SeatAllocationService.Input(
+                user=self.user,
+                journey_date=self.journey_date,
+                booking_type=BookingType.GENERAL.value,
+                schedule_id=self.schedule.id,
+                source_station_code=source_station_code,
+                destination_station_code=destination_station_code,
+            )
+        ).allocate_group(passenger_count=passenger_count)
+
+    def test_positions_count_overlapping_segments(self):
+        self.allocate('AAA', 'CCC', passenger_count=self.GENERAL_SEATS)
+        first_half = self.allocate('AAA', 'BBB')[0]
+        second_half = self.allocate('BBB', 'CCC')[0]
+        full_journey = self.allocate('AAA', 'CCC')[0]
+        late_first_half = self.allocate('AAA', 'BBB')[0]
+
+        expected_positions = {
+            first_half.id: 1,
+            # The first half journey ends where this one starts
+            second_half.id: 1,
+            full_journey.id: 3,
+            late_first_half.id: 3,
+        }
+        positions = {
+            booking.id: BookingSelectors.get_waiting_position(
+                Booking.objects.select_related('from_stop', 'to_stop').get(id=booking.id)
+            )
+            for booking in (first_half, second_half, full_journey, late_first_half)
+        }
+        self.assertEqual(positions, expected_positions)
+
+        annotated_positions = dict(
+            BookingSelectors.get_waiting_bookings_with_position_queryset(
+                BookingSelectors.Options(filters=dict(schedule=self.schedule))
+            ).values_list('id', 'waiting_position')
+        )
+        self.assertEqual(annotated_positions, expected_positions)
+
+
+class BookingJourneyDateValidationTest(ScheduleTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='booking_date_user')
+        self.client.force_login(self.user)
+        self.schedule = self.create_schedule(timezone.now().date() + timedelta(days=2), time(10, 0))
+
+    def test_booking_rejects_dates_outside_window(self):
+        today = timezone.now().date()
+        for journey_date in (today - timedelta(days=1), today + timedelta(days=121)):
+            response = self.client.post(reverse('booking-create'), dict(
+                journey_date=journey_date.isoformat(),
+                booking_type=BookingType.GENERAL.value,
+                source_station_code='AAA',
+                destination_station_code='CCC',
+                schedule_id=self.schedule.id,
+            ))
+            self.assertEqual(response.status_code, 400, journey_date)
+            self.assertIn('journey_date', response.json())
+        self.assertFalse(Booking.objects.exists())
+
+
+class DepartureNotificationTest(ScheduleTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.schedule = self.create_schedule(timezone.localdate(), time(10, 0))
+        self.stops = list(Stop.objects.filter(route=self.schedule.route).order_by('order'))
+
+    def create_bookings(self, count: int, boarding_datetime) -> list[Booking]:
+        users = []
+        for _ in range(count):
+            username = f'notify_user_{User.objects.count()}'
+            users.append(User.objects.create(username=username, email=f'{username}@example.com'))
+        return Booking.objects.bulk_create([
+            Booking(
+                journey_date=timezone.localdate(),
+                user=user,
+                schedule=self.schedule,
+                from_stop=self.stops[0],
+                to_stop=self.stops[-1],
+                amount=100,
+                status=BookingStatus.CONFIRMED.value,
+                type=BookingType.GENERAL.value,
+                boarding_datetime=boarding_datetime,
+            )
+            for user in users
+        ])
+
+    def test_sends_each_reminder_once_and_marks_it(self):
+        self.create_bookings(5, self.now + timedelta(minutes=20))
+        self.create_bookings(2, self.now + timedelta(hours=2))
+
+        tasks.send_departure_notifications()
+        tasks.send_departure_notifications()
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(Booking.objects.filter(notification_sent=True).count(), 5)
+        self.assertFalse(Booking.objects.filter(notification_claim__isnull=False).exists())
+
+    def test_overlapping_run_skips_claimed_reminders(self):
+        bookings = self.create_bookings(4, self.now + timedelta(minutes=20))
+        # An earlier run claimed two reminders and queued them for a worker
+        claim, claimed_count = tasks.claim_booking_notifications([booking.id for booking in bookings[:2]])
+        self.assertEqual(claimed_count, 2)
+
+        tasks.send_departure_notifications()
+        self.assertEqual(len(mail.outbox), 2)
+
+        tasks.send_departure_notifications_chunk(claim)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(booking.user.email for booking in bookings))
+
+    @override_settings(NOTIFICATION_CHUNK_SIZE=2, NOTIFICATION_FANOUT_THRESHOLD=2)
+    def test_fans_out_chunks_past_threshold(self):
+        self.create_bookings(7, self.now + timedelta(minutes=20))
+
+        with mock.patch.object(tasks.send_departure_notifications_chunk, 'delay') as delay:
+            tasks.send_departure_notifications()
+
+        self.assertEqual(len(mail.outbox), 2)
+        claims = [call.args[0] for call in delay.call_args_list]
+        self.assertEqual(len(claims), 3)
+        for claim in claims:
+            tasks.send_departure_notifications_chunk(claim)
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertEqual(len({message.to[0] for message in mail.outbox}), 7)
+
+    def test_stalled_run_skips_trains_that_left(self):
+        TaskWatermark.objects.create(name='send_departure_notifications', watermark=self.now - timedelta(hours=1))
+        missed_bookings = self.create_bookings(3, self.now - timedelta(minutes=10))
+        self.create_bookings(2, self.now + timedelta(minutes=20))
+
+        tasks.send_departure_notifications()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(Booking.objects.filter(notification_sent=False).exists())
+        self.assertNotIn(missed_bookings[0].user.email, [message.to[0] for message in mail.outbox])
+        self.assertGreater(TaskWatermark.objects.get(name='send_departure_notifications').watermark, self.now)
+
+    def test_queued_chunk_skips_trains_that_left(self):
+        bookings = self.create_bookings(2, self.now - timedelta(minutes=1))
+        claim, _ = tasks.claim_booking_notifications([booking.id for booking in bookings])
+
+        tasks.send_departure_notifications_chunk(claim)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(Booking.objects.filter(notification_claim__isnull=False).exists())
+
+
+class QueryRecorderTest(ScheduleTestMixin, TestCase):
+
+    def test_nested_recorders_count_queries_and_rows(self):
+        self.create_schedule(timezone.now().date() + timedelta(days=2), time(10, 0))
+
+        with QueryUtils.QueryRecorder(name='outer') as outer:
+            list(Stop.objects.all())
+            with QueryUtils.QueryRecorder(name='inner') as inner:
+                list(Stop.objects.filter(order__gt=0))
+                Stop.objects.filter(order=0).first()
+            list(Stop.objects.values_list('id', flat=True).iterator(chunk_size=1))
+
+        self.assertEqual((inner.count, inner.rows), (2, 3))
+        self.assertEqual((outer.count, outer.rows), (4, 9))
+        self.assertEqual(outer.to_dict()['rows'], 9)
+
+        list(Stop.objects.all())
+        self.assertEqual((outer.count, outer.rows), (4, 9))
+
+
+@skipIf(numpy is None, 'NumPy is not installed')
+class OverlappingBookingCountsTest(SimpleTestCase):
+    """
+    The NumPy path of get_overlapping_booking_counts must give exactly the
+    counts of the plain loop.
+    """
+
+    def assert_paths_match(self, booking_rows: list, stop_orders_by_schedule_id: dict) -> dict:
+        counts = BookingModelUtils.get_overlapping_booking_counts(booking_rows, stop_orders_by_schedule_id, use_numpy=False)
+        self.assertEqual(
+            BookingModelUtils.get_overlapping_booking_counts(booking_rows, stop_orders_by_schedule_id, use_numpy=True),
+            counts,
+        )
+        return counts
+
+    def test_random_rows_match(self):
+        rng = random.Random(12)
+        kinds = len(BookingModelUtils.BOOKING_KINDS)
+        for _ in range(50):
+            stop_orders_by_schedule_id = {}
+            for schedule_id in rng.sample(range(1, 40), rng.randint(1, 8)):
+                from_order = rng.randint(0, 8)
+                stop_orders_by_schedule_id[schedule_id] = (from_order, rng.randint(from_order + 1, 10))
+            booking_rows = []
+            for _ in range(rng.randint(0, 300)):
+                from_order = rng.randint(0, 9)
+                # Schedule ids outside the ones asked for must be ignored
+                booking_rows.append((rng.randint(0, 45), from_order, rng.randint(from_order + 1, 10), rng.randrange(kinds)))
+
+            self.assert_paths_match(booking_rows, stop_orders_by_schedule_id)
+
+    def test_touching_journeys_do_not_overlap(self):
+        general_confirmed = BookingModelUtils.BOOKING_KINDS.index((BookingType.GENERAL.value, BookingStatus.CONFIRMED.value))
+        booking_rows = [
+            (1, 0, 2, general_confirmed),
+            (1, 4, 6, general_confirmed),
+            (1, 1, 3, general_confirmed),
+            (1, 3, 5, general_confirmed),
+            (2, 0, 6, general_confirmed),
+        ]
+
+        counts = self.assert_paths_match(booking_rows, {1: (2, 4)})
+        self.assertEqual(counts[1][(BookingType.GENERAL.value, BookingStatus.CONFIRMED.value)], 2)
+        self.assertEqual(sum(counts[1].values()), 2)
+        self.assertEqual(self.assert_paths_match([], {1: (2, 4)}), {1: {booking_kind: 0 for booking_kind in BookingModelUtils.BOOKING_KINDS}})
+
+
+class UserBookingsCursorPaginationTest(ScheduleTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='cursor_user')
+        self.client.force_login(self.user)
+        schedule = self.create_schedule(timezone.now().date() + timedelta(days=2), time(10, 0))
+        stops = list(Stop.objects.filter(route=schedule.route).order_by('order'))
+        self.bookings = Booking.objects.bulk_create([
+            Booking(
+                journey_date=timezone.now().date() + timedelta(days=2),
+                user=self.user,
+                schedule=schedule,
+                from_stop=stops[0],
+                to_stop=stops[-1],
+                amount=100,
+                status=BookingStatus.CONFIRMED.value,
+                type=BookingType.GENERAL.value,
+            )
+            for _ in range(7)
+        ])
+        # Ties on created_at are broken by id
+        created_at = timezone.now()
+        for idx, booking in enumerate(self.bookings):
+            Booking.objects.filter(id=booking.id).update(created_at=created_at + timedelta(seconds=idx // 2))
+        self.newest_first_ids = [booking.id for booking in reversed(self.bookings)]
+
+    def get_page(self, url: str, **query_params) -> tuple[list[int], dict]:
+        body = self.client.get(url, query_params).json()
+        self.assertTrue(body['status'], body)
+        return [booking['id'] for booking in body['result']], body['pagination']['links']
+
+    def test_pages_forward_and_back(self):
+        ids, links = self.get_page(reverse('user-bookings-list'), pagination='cursor', page_size=3)
+        self.assertEqual(ids, self.newest_first_ids[:3])
+        self.assertIsNone(links['previous'])
+
+        ids, links = self.get_page(links['next'])
+        self.assertEqual(ids, self.newest_first_ids[3:6])
+        self.assertIsNotNone(links['previous'])
+
+        ids, links = self.get_page(links['next'])
+        self.assertEqual(ids, self.newest_first_ids[6:])
+        self.assertIsNone(links['next'])
+
+        ids, links = self.get_page(links['previous'])
+        self.assertEqual(ids, self.newest_first_ids[3:6])
+        self.assertIsNotNone(links['next'])
+
+        ids, links = self.get_page(links['previous'])
+        self.assertEqual(ids, self.newest_first_ids[:3])
+        self.assertIsNone(links['previous'])
+        self.assertIsNotNone(links['next'])
+
+    def test_empty_cursor_is_first_page(self):
+        ids, links = self.get_page(reverse('user-bookings-list'), cursor='', page_size=3)
+        self.assertEqual(ids, self.newest_first_ids[:3])
+        self.assertIsNone(links['previous'])
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', 'bm90IGpzb24='):
+            body = self.client.get(reverse('user-bookings-list'), dict(cursor=cursor)).json()
+            self.assertFalse(body['status'])
+            self.assertEqual(body['result'], 'Invalid cursor')
+
+
+class GroupBookingTest(ScheduleTestMixin, TestCase):
+    # Small enough for a whole sold out train to fit in one group
+    GENERAL_SEATS = 3
+    TATKAL_SEATS = 1
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='group_user')
+        self.client.force_login(self.user)
+
+    def book_group(self, schedule: Schedule, journey_date: date, booking_type: str, passenger_count: int) -> dict:
+        return self.client.post(reverse('group-booking-create'), dict(
+            journey_date=journey_date.isoformat(),
+            booking_type=booking_type,
+            source_station_code='AAA',
+            destination_station_code='CCC',
+            schedule_id=schedule.id,
+            passenger_count=passenger_count,
+        )).json()
+
+    def test_general_group_confirms_free_seats_and_waitlists_the_rest(self):
+        journey_date = timezone.now().date() + timedelta(days=2)
+        schedule = self.create_schedule(journey_date, time(10, 0))
+
+        body = self.book_group(schedule, journey_date, BookingType.GENERAL.value, passenger_count=2)
+        self.assertEqual([booking['status'] for booking in body['result']], [BookingStatus.CONFIRMED.value] * 2)
+
+        body = self.book_group(schedule, journey_date, BookingType.GENERAL.value, passenger_count=3)
+        self.assertEqual(
+            [booking['status'] for booking in body['result']],
+            [BookingStatus.CONFIRMED.value, BookingStatus.WAITING.value, BookingStatus.WAITING.value],
+        )
+        self.assertEqual(len({booking['metadata']['group_id'] for booking in body['result']}), 1)
+        self.assertEqual(Booking.objects.filter(status=BookingStatus.CONFIRMED.value).count(), self.GENERAL_SEATS)
+
+    def test_tatkal_group_is_confirmed_whole_or_not_at_all(self):
+        # Tatkal booking is open from two hours until 1h50 before departure
+        departure_datetime = timezone.localtime() + timedelta(hours=1, minutes=55)
+        journey_date = departure_datetime.date()
+        schedule = self.create_schedule(journey_date, departure_datetime.time().replace(microsecond=0))
+        # Free general seats are sold as tatkal once the tatkal window opens
+        tatkal_seats = self.GENERAL_SEATS + self.TATKAL_SEATS
+
+        body = self.book_group(schedule, journey_date, BookingType.TATKAL.value, passenger_count=tatkal_seats + 1)
+        self.assertFalse(body['status'])
+        self.assertFalse(Booking.objects.exists())
+
+        body = self.book_group(schedule, journey_date, BookingType.TATKAL.value, passenger_count=tatkal_seats)
+        self.assertEqual([booking['status'] for booking in body['result']], [BookingStatus.CONFIRMED.value] * tatkal_seats)
+
+        body = self.book_group(schedule, journey_date, BookingType.TATKAL.value, passenger_count=2)
+        self.assertFalse(body['status'])
+        self.assertEqual(Booking.objects.count(), tatkal_seats)
+
+    def test_group_size_is_limited(self):
+        journey_date = timezone.now().date() + timedelta(days=2)
+        schedule = self.create_schedule(journey_date, time(10, 0))
+
+        response = self.client.post(reverse('group-booking-create'), dict(
+            journey_date=journey_date.isoformat(),
+            booking_type=BookingType.GENERAL.value,
+            source_station_code='AAA',
+            destination_station_code='CCC',
+            schedule_id=schedule.id,
+            passenger_count=settings.GROUP_BOOKING_MAX_PASSENGERS + 1,
+        ))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('passenger_count', response.json())
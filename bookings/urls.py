@@ -1,9 +1,11 @@
 from django.urls import path
-from bookings.views import booking_create_view, booking_cancel_view, booking_details_view, user_bookings_list_view
+from bookings.views import booking_create_view, group_booking_create_view, booking_cancel_view, booking_details_view, user_bookings_list_view, user_waiting_positions_view
 
 urlpatterns = [
 	path('create/', booking_create_view, name='booking-create'),
+	path('group-create/', group_booking_create_view, name='group-booking-create'),
 	path('<int:booking_id>/cancel/', booking_cancel_view, name='booking-cancel'),
 	path('<int:booking_id>/details/', booking_details_view, name='booking-details'),
 	path('user-bookings/', user_bookings_list_view, name='user-bookings-list'),
+	path('user-bookings/waiting-positions/', user_waiting_positions_view, name='user-waiting-positions'),
 ]
\ No newline at end of file
@@ -1,16 +1,17 @@
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import status
 from rest_framework import serializers
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from trains.services import JourneySearchService
 from utils.enums import BookingStatus, BookingType
 from utils.serializers import JourneyDateSerializer
 from bookings.serializers import BookingsSerializers
+from bookings.selectors import BookingSelectors
+from bookings.services import SeatAllocationService, SeatInventoryService, WaitlistPromotionService
 from django.contrib.auth.decorators import login_required
-from trains.selectors import ScheduleSelectors
 from django.contrib.auth.models import User
-from utils.pagination import Paginator
+from utils.pagination import CursorPaginator, Paginator
 from utils.queries import QueryUtils
 from bookings.models import Booking
 from django.db import transaction
@@ -33,71 +34,65 @@ def booking_create_view(request):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        booking_type = serializer.validated_data['booking_type']
-        journey_date = serializer.validated_data['journey_date']
-        schedule_query_options = ScheduleSelectors.Options(
-            filters=dict(id=serializer.validated_data['schedule_id']),
+        seat_allocation_service = SeatAllocationService(
+            input=SeatAllocationService.Input(
+                user=user,
+                journey_date=serializer.validated_data['journey_date'],
+                booking_type=serializer.validated_data['booking_type'],
+                schedule_id=serializer.validated_data['schedule_id'],
+                source_station_code=serializer.validated_data['source_station_code'],
+                destination_station_code=serializer.validated_data['destination_station_code'],
+            )
         )
+        booking = seat_allocation_service.allocate()
 
-        with transaction.atomic():
-            journey_search_service = JourneySearchService(
-                input=JourneySearchService.Input(
-                    journey_date=journey_date,
-                    source_station_code=serializer.validated_data['source_station_code'],
-                    destination_station_code=serializer.validated_data['destination_station_code'],
-                    schedule_query_options=schedule_query_options,
-                )
-            )
+        serialized_data = BookingsSerializers.ModelSerializer(booking).data
+        return Response({
+            'status': True,
+            'status_code': status.HTTP_200_OK,
+            'result': serialized_data,
+        })
+    except Exception as e:
+        return Response({
+            'status': False,
+            'status_code': status.HTTP_400_BAD_REQUEST,
+            'result': str(e),
+        })
 
-            journey_schedules = journey_search_service.search_journeys()
-            journey_schedule = journey_schedules[0]
-            if booking_type == BookingType.GENERAL.value:
-                if not journey_schedule.booking_window_details.general_booking_open:
-                    return Response({
-                        'status': False,
-                        'status_code': status.HTTP_400_BAD_REQUEST,
-                        'result': 'General booking window not open',
-                    })
-            elif booking_type == BookingType.TATKAL.value:
-                if not journey_schedule.booking_window_details.tatkal_booking_open:
-                    return Response({
-                        'status': False,
-                        'status_code': status.HTTP_400_BAD_REQUEST,
-                        'result': 'Tatkal booking window not open',
-                    })
-            
-            confirmation_datetime = None
-            if booking_type == BookingType.GENERAL.value:
-                if journey_schedule.seat_details.available_seats[booking_type] > 0:
-                    booking_status = BookingStatus.CONFIRMED.value
-                    confirmation_datetime = timezone.now()
-                else:
-                    booking_status = BookingStatus.WAITING.value
-            elif booking_type == BookingType.TATKAL.value:
-                if journey_schedule.seat_details.available_seats[booking_type] > 0:
-                    booking_status = BookingStatus.CONFIRMED.value
-                    confirmation_datetime = timezone.now()
-                else:
-                    raise ValueError('No tatkal seats available')
-            
-            booking = Booking.objects.create(
+
+class GroupBookingCreateInputSerializer(BookingCreateInputSerializer):
+    passenger_count = serializers.IntegerField(required=True, min_value=1, max_value=settings.GROUP_BOOKING_MAX_PASSENGERS)
+
+@api_view(['POST'])
+@login_required
+@QueryUtils.log_queries
+def group_booking_create_view(request):
+    try :
+        user: User = request.user
+        serializer = GroupBookingCreateInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        seat_allocation_service = SeatAllocationService(
+            input=SeatAllocationService.Input(
                 user=user,
-                journey_date=journey_date,
-                schedule=journey_schedule,
-                from_stop=journey_schedule.source_stop,
-                to_stop=journey_schedule.destination_stop,
-                amount=journey_schedule.general_details.pricing[booking_type],
-                confirmation_datetime=confirmation_datetime,
-                status=booking_status,
-                type=booking_type,
+                journey_date=serializer.validated_data['journey_date'],
+                booking_type=serializer.validated_data['booking_type'],
+                schedule_id=serializer.validated_data['schedule_id'],
+                source_station_code=serializer.validated_data['source_station_code'],
+                destination_station_code=serializer.validated_data['destination_station_code'],
             )
+        )
+        bookings = seat_allocation_service.allocate_group(
+            passenger_count=serializer.validated_data['passenger_count'],
+        )
 
-            serialized_data = BookingsSerializers.ModelSerializer(booking).data
-            return Response({
-                'status': True,
-                'status_code': status.HTTP_200_OK,
-                'result': serialized_data,
-            })
+        serialized_data = BookingsSerializers.ModelSerializer(bookings, many=True).data
+        return Response({
+            'status': True,
+            'status_code': status.HTTP_200_OK,
+            'result': serialized_data,
+        })
     except Exception as e:
         return Response({
             'status': False,
@@ -111,11 +106,17 @@ def booking_create_view(request):
 @QueryUtils.log_queries
 def booking_cancel_view(request, booking_id: int):
     try:
+        booking = Booking.objects.get(
+            user=request.user,
+            id=booking_id,
+        )
+
         with transaction.atomic():
-            booking = Booking.objects.get(
-                user=request.user,
-                id=booking_id,
+            SeatAllocationService.lock_schedule_run(
+                schedule_id=booking.schedule_id,
+                journey_date=booking.journey_date,
             )
+            booking = Booking.objects.select_related('from_stop', 'to_stop').get(id=booking.id)
 
             if booking.status == BookingStatus.CANCELLED.value:
                 return Response({
@@ -131,24 +132,25 @@ def booking_cancel_view(request, booking_id: int):
                         'result': 'Tatkal booking cannot be cancelled',
                     })
             
-            now = timezone.now()
-            if booking.status == BookingStatus.CONFIRMED.value:
-                oldest_waiting_booking = Booking.objects.filter(
-                    journey_date=booking.journey_date,
-                    status=BookingStatus.WAITING.value,
-                    type=BookingType.GENERAL.value,
-                    from_stop=booking.from_stop,
-                    schedule=booking.schedule,
-                    to_stop=booking.to_stop,
-                ).order_by('created_at').first()
-                if oldest_waiting_booking:
-                    oldest_waiting_booking.status = BookingStatus.CONFIRMED.value
-                    oldest_waiting_booking.confirmation_datetime = now
-                    oldest_waiting_booking.save()
-
+            was_confirmed = booking.status == BookingStatus.CONFIRMED.value
             booking.status = BookingStatus.CANCELLED.value
-            booking.cancellation_datetime = now
-            booking.save()
+            booking.cancellation_datetime = timezone.now()
+            booking.save(update_fields=['status', 'cancellation_datetime', 'updated_at'])
+
+            seat_inventory_service = SeatInventoryService()
+            if was_confirmed:
+                seat_inventory_service.remove_confirmed_booking(booking=booking)
+                # The freed seats may fit waiting bookings of any overlapping journey
+                WaitlistPromotionService(
+                    input=WaitlistPromotionService.Input(
+                        schedule_id=booking.schedule_id,
+                        journey_date=booking.journey_date,
+                    )
+                ).promote()
+            seat_inventory_service.mark_schedule_run_changed(
+                schedule_id=booking.schedule_id,
+                journey_date=booking.journey_date,
+            )
 
             serialized_data = BookingsSerializers.ModelSerializer(booking).data
             return Response({
@@ -170,21 +172,13 @@ def booking_cancel_view(request, booking_id: int):
 def booking_details_view(request, booking_id: int):
     try:
         with transaction.atomic():
-            booking = Booking.objects.get(
+            booking = Booking.objects.select_related('from_stop', 'to_stop').get(
                 user=request.user,
                 id=booking_id,
             )
 
             if booking.status == BookingStatus.WAITING.value:
-                waiting_bookings = Booking.objects.filter(
-                    journey_date=booking.journey_date,
-                    status=BookingStatus.WAITING.value,
-                    type=BookingType.GENERAL.value,
-                    from_stop=booking.from_stop,
-                    schedule=booking.schedule,
-                    to_stop=booking.to_stop,
-                ).order_by('created_at')
-                waiting_position = list(waiting_bookings).index(booking) + 1
+                waiting_position = BookingSelectors.get_waiting_position(booking)
             else:
                 waiting_position = None
 
@@ -209,11 +203,43 @@ def booking_details_view(request, booking_id: int):
 def user_bookings_list_view(request):
     try :
         user: User = request.user
-        paginator = Paginator()
-        user_bookings = Booking.objects.filter(user=user).order_by('-created_at')
+        paginator = CursorPaginator() if CursorPaginator.is_requested(request) else Paginator()
+        user_bookings = Booking.objects.filter(user=user).order_by('-created_at', '-id')
         paginated_user_bookings = paginator.paginate_queryset(user_bookings, request)
         serialized_data = BookingsSerializers.ModelSerializer(paginated_user_bookings, many=True).data
         return paginator.get_paginated_response(serialized_data)
+    except Exception as e:
+        return Response({
+            'status': False,
+            'status_code': status.HTTP_400_BAD_REQUEST,
+            'result': str(e),
+        })
+
+
+@api_view(['GET'])
+@login_required
+@QueryUtils.log_queries
+def user_waiting_positions_view(request):
+    try :
+        user: User = request.user
+        waiting_bookings = BookingSelectors.get_waiting_bookings_with_position_queryset(
+            BookingSelectors.Options(
+                filters=dict(user=user),
+                order_by=['journey_date', 'created_at'],
+            )
+        )
+
+        serialized_data = []
+        for booking in waiting_bookings:
+            serialized_booking = BookingsSerializers.ModelSerializer(booking).data
+            serialized_booking['waiting_position'] = booking.waiting_position
+            serialized_data.append(serialized_booking)
+
+        return Response({
+            'status': True,
+            'status_code': status.HTTP_200_OK,
+            'result': serialized_data,
+        })
     except Exception as e:
         return Response({
             'status': False,
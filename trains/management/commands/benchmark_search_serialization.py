@@ -0,0 +1,72 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from trains.models import StopPair
+from trains.services import JourneySearchService
+
+
+class Command(BaseCommand):
+    help = 'Compare payload size and serialization time of the full and compact journey search output'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pairs', type=int, default=20, help='Number of random station pairs to search')
+        parser.add_argument('--repeat', type=int, default=20, help='Serializations per pair and mode')
+        parser.add_argument('--days-ahead', type=int, default=3, help='Journey date offset from today')
+        parser.add_argument('--fields', default='id,route,source_stop,destination_stop,seat_details',
+                            help='Fields kept by the fields mode')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        fields = [field.strip() for field in options['fields'].split(',') if field.strip()]
+        station_pairs = list(StopPair.objects.values_list('from_station__code', 'to_station__code').distinct())
+        if not station_pairs:
+            raise CommandError('No stop pairs found, generate some trains first')
+        station_pairs = random.sample(station_pairs, min(options['pairs'], len(station_pairs)))
+
+        modes = {
+            'full': lambda journeys: JourneySearchService.OutputSerializer(journeys, many=True).data,
+            'compact': lambda journeys: JourneySearchService.CompactOutputSerializer(journeys, many=True).data,
+            'compact + fields': lambda journeys: [
+                {field: journey[field] for field in fields if field in journey}
+                for journey in JourneySearchService.CompactOutputSerializer(journeys, many=True).data
+            ],
+        }
+        durations = {mode: [] for mode in modes}
+        payload_bytes = {mode: 0 for mode in modes}
+        journey_count = 0
+        renderer = JSONRenderer()
+
+        today = timezone.now().date()
+        for source_station_code, destination_station_code in station_pairs:
+            # Search the first date within a week that has a running schedule
+            for days in range(options['days_ahead'], options['days_ahead'] + 7):
+                journeys = JourneySearchService(
+                    input=JourneySearchService.Input(
+                        journey_date=today + timedelta(days=days),
+                        source_station_code=source_station_code,
+                        destination_station_code=destination_station_code,
+                    )
+                ).search_journeys()
+                if journeys:
+                    break
+            journey_count += len(journeys)
+
+            for mode, serialize in modes.items():
+                for _ in range(options['repeat']):
+                    started_at = time.perf_counter()
+                    serialized_data = serialize(journeys)
+                    durations[mode].append((time.perf_counter() - started_at) * 1000)
+                payload_bytes[mode] += len(renderer.render(serialized_data))
+
+        self.stdout.write(f'📦 {journey_count} journeys over {len(station_pairs)} station pairs')
+        for mode in modes:
+            self.stdout.write(
+                f'   {mode:<18} median {statistics.median(durations[mode]):>8.3f}ms per search, '
+                f'{payload_bytes[mode] / max(journey_count, 1):>9.0f} bytes per journey'
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Serialization benchmark finished'))
@@ -0,0 +1,71 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+from trains.models import Station
+from trains.services import TransferSearchService
+
+
+class Command(BaseCommand):
+    help = 'Measure timetable index build time and one-transfer search latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=500, help='Number of random station pairs to search')
+        parser.add_argument('--days-ahead', type=int, default=3, help='Journey date offset from today')
+        parser.add_argument('--source', help='Search only this source station code')
+        parser.add_argument('--destination', help='Search only this destination station code')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        journey_date = timezone.now().date() + timedelta(days=options['days_ahead'])
+
+        started_at = time.perf_counter()
+        timetable_index = TransferSearchService.TimetableIndex.build(version='benchmark')
+        build_ms = (time.perf_counter() - started_at) * 1000
+        self.stdout.write(
+            f'🗂️  Index built in {build_ms:.1f}ms: {len(timetable_index.station_code_by_id)} stations, '
+            f'{len(timetable_index.stops_by_route_id)} routes, {timetable_index.get_event_count()} stop events'
+        )
+
+        station_codes = list(Station.objects.values_list('code', flat=True))
+        if len(station_codes) < 2:
+            raise CommandError('Need at least two stations to benchmark')
+
+        station_pairs = []
+        for _ in range(options['queries']):
+            source_station_code, destination_station_code = random.sample(station_codes, 2)
+            station_pairs.append((
+                options['source'] or source_station_code,
+                options['destination'] or destination_station_code,
+            ))
+
+        durations = []
+        itinerary_counts = []
+        for source_station_code, destination_station_code in station_pairs:
+            transfer_search_service = TransferSearchService(
+                input=TransferSearchService.Input(
+                    journey_date=journey_date,
+                    source_station_code=source_station_code,
+                    destination_station_code=destination_station_code,
+                )
+            )
+            started_at = time.perf_counter()
+            itineraries = transfer_search_service.search_itineraries(timetable_index=timetable_index)
+            durations.append((time.perf_counter() - started_at) * 1000)
+            itinerary_counts.append(len(itineraries))
+
+        durations.sort()
+        percentiles = statistics.quantiles(durations, n=100) if len(durations) > 1 else durations * 99
+        self.stdout.write(f'🔁 {len(durations)} searches on {journey_date}')
+        self.stdout.write(
+            f'   p50 {percentiles[49]:.2f}ms, p95 {percentiles[94]:.2f}ms, '
+            f'p99 {percentiles[98]:.2f}ms, max {durations[-1]:.2f}ms'
+        )
+        self.stdout.write(
+            f'   {sum(1 for count in itinerary_counts if count)} pairs connected, '
+            f'{statistics.mean(itinerary_counts):.1f} itineraries on average'
+        )
+        self.stdout.write(self.style.SUCCESS('✅ Transfer search benchmark finished'))
@@ -1,9 +1,19 @@
 import random
-from django.db import transaction
-from datetime import time, timedelta
-from django.core.management.base import BaseCommand
-from trains.models import Station, Train, Route, Stop, Schedule
-from utils.enums import BookingType
+import multiprocessing
+from timeit import default_timer as timer
+from concurrent.futures import ProcessPoolExecutor
+from django.db import connections, transaction
+from datetime import date, datetime, time, timedelta
+from django.utils import timezone
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from bookings.models import Booking, ScheduleRun, SeatInventory
+from trains.models import Station, Train, Route, Stop, StopPair, Schedule
+from trains.model_utils import RouteModelUtils, ScheduleModelUtils
+from trains.selectors import RouteSelectors, ScheduleSelectors
+from utils.enums import BookingStatus, BookingType
+from utils.intervals import IntervalUtils
 
 """
 Enhanced generate_trains_dummy_data with more extensive data generation
@@ -162,7 +172,7 @@ class TrainDataGenerator:
         self.stations = []
         self.trains = []
         self.routes = []
-        # Track train schedules: {train_id: {weekday: [(start_time, end_time, duration_minutes)]}}
+        # Track when each train is busy, turnaround buffer included: {train_id: WeekIntervalIndex}
         self.train_schedules = {}
     
     @transaction.atomic
@@ -178,10 +188,7 @@ class TrainDataGenerator:
         print(f"📊 Created: {len(self.stations)} stations, {len(self.trains)} trains, {len(self.routes)} routes")
         
         # Print schedule statistics
-        total_schedules = 0
-        for train_id, weekday_schedules in self.train_schedules.items():
-            for weekday, schedules in weekday_schedules.items():
-                total_schedules += len(schedules)
+        total_schedules = sum(len(schedule_index) for schedule_index in self.train_schedules.values())
         print(f"📅 Total schedules created: {total_schedules}")
     
     def create_stations(self):
@@ -210,7 +217,7 @@ class TrainDataGenerator:
             )
             self.trains.append(train)
             # Initialize schedule tracking for this train
-            self.train_schedules[train.id] = {day: [] for day in self.WEEKDAYS}
+            self.train_schedules[train.id] = IntervalUtils.WeekIntervalIndex()
         
         print(f"✅ Created {len(self.trains)} trains")
     
@@ -358,7 +365,7 @@ class TrainDataGenerator:
                 # Long distance trains: prefer trains with fewer existing routes
                 train_usage_count = []
                 for train in self.trains:
-                    usage_count = sum(len(schedules) for schedules in self.train_schedules[train.id].values())
+                    usage_count = len(self.train_schedules[train.id])
                     train_usage_count.append((train, usage_count))
                 
                 # Sort by usage count and pick from least used trains
@@ -410,9 +417,23 @@ class TrainDataGenerator:
                 failed_attempts += 1
                 continue  # Train not available on any day
             
-            # Select weekdays
-            num_days = min(max_weekdays, len(available_weekdays))
-            selected_weekdays = random.sample(available_weekdays, random.randint(1, num_days))
+            # Select weekdays, skipping those a run of this route on another
+            # selected weekday already spills into
+            num_days = random.randint(1, min(max_weekdays, len(available_weekdays)))
+            selected_weekdays = []
+            for weekday in random.sample(available_weekdays, len(available_weekdays)):
+                if len(selected_weekdays) == num_days:
+                    break
+                if self.is_train_available(train.id, weekday, departure_time, arrival_time, total_journey_minutes):
+                    selected_weekdays.append(weekday)
+                    # Mark train as busy during this time
+                    self.train_schedules[train.id].add(*ScheduleModelUtils.get_week_interval(
+                        weekday=weekday,
+                        departure_time=departure_time,
+                        arrival_time=arrival_time,
+                        journey_minutes=total_journey_minutes,
+                        buffer_minutes=self.get_buffer_minutes(total_journey_minutes),
+                    ))
             
             # Update the route pair count and create route name with variation
             self.route_pairs[pair_key] = existing_count
@@ -488,13 +509,6 @@ class TrainDataGenerator:
                     departure_time=departure_time,
                     arrival_time=arrival_time
                 )
-                
-                # Mark train as busy during this time
-                self.train_schedules[train.id][weekday].append((
-                    departure_time, 
-                    arrival_time, 
-                    total_journey_minutes
-                ))
             
             self.routes.append(route)
             route_count += 1
@@ -530,6 +544,7 @@ class TrainDataGenerator:
         """Create route stations with realistic timing and distances"""
         current_time = 0
         current_distance = 0
+        route_stops = []
         
         # Distribute time realistically across stations
         if len(stations) == 2:
@@ -590,68 +605,574 @@ class TrainDataGenerator:
                 segment_distance = (time_for_segment / 60) * avg_speed
                 current_distance += segment_distance
             
-            Stop.objects.create(
+            route_stops.append(Stop(
                 order=order,
                 route=route,
                 station=station,
                 arrival_minutes_from_source=arrival_time,
                 departure_minutes_from_source=departure_time,
                 distance_kms_from_source=round(current_distance, 2)
-            )
+            ))
+        
+        route_stops = Stop.objects.bulk_create(route_stops)
+
+        # Index every ordered station pair of the route for journey search
+        StopPair.objects.bulk_create(RouteModelUtils.get_stop_pairs(route, route_stops))
     
+    @staticmethod
+    def get_buffer_minutes(journey_duration_minutes):
+        """Turnaround time after a run, longer journeys need more for maintenance, cleaning, etc."""
+        base_buffer = 90  # 1.5 hours minimum
+        if journey_duration_minutes > 720:  # 12+ hours
+            return base_buffer + 60  # 2.5 hours for long distance
+        elif journey_duration_minutes > 360:  # 6+ hours
+            return base_buffer + 30  # 2 hours for medium distance
+        return base_buffer  # 1.5 hours for short distance
+
     def is_train_available(self, train_id, weekday, departure_time, arrival_time, journey_duration_minutes):
-        """Enhanced train availability check with better conflict detection"""
-        existing_schedules = self.train_schedules[train_id][weekday]
-        
-        # Convert times to minutes for easier comparison
-        dep_minutes = departure_time.hour * 60 + departure_time.minute
-        arr_minutes = arrival_time.hour * 60 + arrival_time.minute
-        
-        # Handle overnight journeys
-        if arr_minutes < dep_minutes:
-            arr_minutes += 24 * 60
-        
-        for existing_dep, existing_arr, existing_duration in existing_schedules:
-            existing_dep_minutes = existing_dep.hour * 60 + existing_dep.minute
-            existing_arr_minutes = existing_arr.hour * 60 + existing_arr.minute
-            
-            # Handle overnight for existing schedule
-            if existing_arr_minutes < existing_dep_minutes:
-                existing_arr_minutes += 24 * 60
-            
-            # Enhanced buffer time calculation based on journey length
-            # Longer journeys need more buffer time for maintenance, cleaning, etc.
-            base_buffer = 90  # 1.5 hours minimum
-            if journey_duration_minutes > 720:  # 12+ hours
-                buffer_minutes = base_buffer + 60  # 2.5 hours for long distance
-            elif journey_duration_minutes > 360:  # 6+ hours
-                buffer_minutes = base_buffer + 30  # 2 hours for medium distance
-            else:
-                buffer_minutes = base_buffer  # 1.5 hours for short distance
-            
-            # Check for overlap with buffer time
-            new_start = dep_minutes
-            new_end = arr_minutes + buffer_minutes
-            existing_start = existing_dep_minutes
-            existing_end = existing_arr_minutes + buffer_minutes
-            
-            # Check if schedules overlap
-            if not (new_end <= existing_start or new_start >= existing_end):
-                return False
-        
-        return True
+        """
+        Whether the run, turnaround buffer included, overlaps none of the
+        train's runs on the week timeline, including runs spilling over from
+        the previous days
+        """
+        start, end = ScheduleModelUtils.get_week_interval(
+            weekday=weekday,
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+            journey_minutes=journey_duration_minutes,
+            buffer_minutes=self.get_buffer_minutes(journey_duration_minutes),
+        )
+        return not self.train_schedules[train_id].overlaps(start, end)
     
     def clear_all_data(self):
         """Clear all existing data"""
         print("🗑️  Clearing existing data...")
-        Schedule.objects.all().delete()
-        Stop.objects.all().delete()
-        Route.objects.all().delete()
-        Train.objects.all().delete()
-        Station.objects.all().delete()
+        RouteSelectors.topology_cache.invalidate(Route.all_objects.values_list('id', flat=True))
+        # Deleted bottom-up without the cascade collector, which trips over
+        # the unmanaged search output models inheriting from Schedule.
+        with transaction.atomic():
+            for queryset in [
+                Booking.all_objects.all(),
+                SeatInventory.all_objects.all(),
+                ScheduleRun.all_objects.all(),
+                StopPair.all_objects.all(),
+                Stop.all_objects.all(),
+                Schedule.all_objects.all(),
+                Route.all_objects.all(),
+                Train.all_objects.all(),
+                Station.all_objects.all(),
+            ]:
+                queryset._raw_delete(queryset.db)
+            User.objects.filter(username__startswith=ScaledTrainDataGenerator.USER_PREFIX).delete()
+        ScheduleSelectors.timetable_versions.bump(['all'])
         print("✅ All data cleared!")
 
 
+# Route lengths of the scaled generator, the same shape as the hand-tuned one
+SCALED_ROUTE_LENGTH_WEIGHTS = {
+    2: 8, 3: 10, 4: 20, 5: 22, 6: 20, 7: 18, 8: 15, 9: 8, 10: 6, 11: 4, 12: 3,
+    14: 2, 16: 2, 18: 1, 20: 1, 25: 1,
+}
+SCALED_PEAK_HOURS = list(range(6, 11)) + list(range(16, 21))
+SCALED_OFF_PEAK_HOURS = [hour for hour in range(24) if hour not in SCALED_PEAK_HOURS]
+
+
+def plan_scaled_runs(departure_minutes, outbound_weekdays, outbound_minutes, return_minutes):
+    """
+    Plans the week minutes both routes of a train depart at. Every outbound
+    run is followed by a return run once the train is turned around, and
+    runs clashing with the train's earlier runs are dropped.
+    """
+    schedule_index = IntervalUtils.WeekIntervalIndex()
+    outbound_starts, return_starts = [], []
+    for weekday_index in outbound_weekdays:
+        start = weekday_index * IntervalUtils.DAY_MINUTES + departure_minutes
+        end = start + outbound_minutes + TrainDataGenerator.get_buffer_minutes(outbound_minutes)
+        if not schedule_index.overlaps(start, end):
+            schedule_index.add(start, end)
+            outbound_starts.append(start)
+
+    for outbound_start in outbound_starts:
+        # Departs on the next quarter hour after the turnaround
+        turnaround_end = outbound_start + outbound_minutes + TrainDataGenerator.get_buffer_minutes(outbound_minutes)
+        start = -(-turnaround_end // 15) * 15 % IntervalUtils.WEEK_MINUTES
+        end = start + return_minutes + TrainDataGenerator.get_buffer_minutes(return_minutes)
+        if not schedule_index.overlaps(start, end):
+            schedule_index.add(start, end)
+            return_starts.append(start)
+
+    return outbound_starts, return_starts
+
+
+def plan_scaled_routes(seed, chunk_index, first_train_index, train_count, cities, hub_count):
+    """
+    Plans the routes of one chunk as plain tuples. Routes come in pairs run
+    by the same train, the return route reversing the stops and departing
+    after each outbound run has arrived.
+    """
+    rng = random.Random(f'{seed}:routes:{chunk_index}')
+    station_count = len(cities)
+    lengths = list(SCALED_ROUTE_LENGTH_WEIGHTS.keys())
+    length_weights = list(SCALED_ROUTE_LENGTH_WEIGHTS.values())
+
+    route_plans = []
+    for train_index in range(first_train_index, first_train_index + train_count):
+        num_stations = min(rng.choices(lengths, weights=length_weights)[0], station_count)
+        if rng.random() < 0.6 and hub_count >= 2:
+            source, destination = rng.sample(range(hub_count), 2)
+        else:
+            source, destination = rng.sample(range(station_count), 2)
+        intermediate = [index for index in rng.sample(range(station_count), min(station_count, num_stations + 2))
+                        if index not in (source, destination)][:num_stations - 2]
+        stations = [source] + intermediate + [destination]
+
+        segment_minutes = [rng.randint(30, 120) for _ in stations[1:]]
+        dwell_minutes = {index: rng.randint(5, 15) if index < hub_count else rng.randint(2, 8) for index in stations}
+        speeds = [rng.uniform(40, 80) for _ in stations[1:]]
+
+        general_seats = rng.randint(20, 80)
+        tatkal_seats = max(1, int(general_seats * rng.uniform(0.15, 0.25)))
+        base_price = rng.randint(100, 500) + len(stations) * rng.randint(50, 150)
+        pricing = {
+            BookingType.GENERAL.value: base_price,
+            BookingType.TATKAL.value: int(base_price * rng.uniform(1.2, 1.5)),
+        }
+        seats = {BookingType.GENERAL.value: general_seats, BookingType.TATKAL.value: tatkal_seats}
+
+        route_stops = []
+        for direction in range(2):
+            route_stations = stations if direction == 0 else stations[::-1]
+            route_segment_minutes = segment_minutes if direction == 0 else segment_minutes[::-1]
+            route_speeds = speeds if direction == 0 else speeds[::-1]
+
+            stops, minutes, distance = [], 0, 0.0
+            for order, station_index in enumerate(route_stations, 1):
+                if order > 1:
+                    minutes += route_segment_minutes[order - 2]
+                    distance += route_segment_minutes[order - 2] / 60 * route_speeds[order - 2]
+                arrival_minutes = minutes
+                if order == 1:
+                    departure_minutes = rng.randint(0, 5)
+                elif order == len(route_stations):
+                    departure_minutes = arrival_minutes
+                else:
+                    departure_minutes = arrival_minutes + dwell_minutes[station_index]
+                minutes = departure_minutes
+                stops.append((station_index, arrival_minutes, departure_minutes, round(distance, 2)))
+            route_stops.append((route_stations, stops, minutes))
+
+        departure_hour = rng.choice(SCALED_PEAK_HOURS if rng.random() < 0.6 else SCALED_OFF_PEAK_HOURS)
+        departure_minutes = departure_hour * 60 + rng.choice([0, 15, 30, 45])
+        outbound_weekdays = rng.sample(range(len(TrainDataGenerator.WEEKDAYS)), rng.randint(1, 4))
+        runs = plan_scaled_runs(departure_minutes, outbound_weekdays, route_stops[0][2], route_stops[1][2])
+        if not runs[1]:
+            # A single outbound run always leaves room to come back
+            runs = plan_scaled_runs(departure_minutes, outbound_weekdays[:1], route_stops[0][2], route_stops[1][2])
+
+        for (route_stations, stops, minutes), starts in zip(route_stops, runs):
+            route_name = rng.choice(TrainDataGenerator.ROUTE_TEMPLATES).format(
+                source=cities[route_stations[0]],
+                dest=cities[route_stations[-1]],
+            )
+            route_plans.append((
+                train_index,
+                route_name,
+                seats,
+                pricing,
+                stops,
+                [
+                    (
+                        TrainDataGenerator.WEEKDAYS[start // IntervalUtils.DAY_MINUTES % 7],
+                        time(start % IntervalUtils.DAY_MINUTES // 60, start % 60),
+                        time((start + minutes) % IntervalUtils.DAY_MINUTES // 60, (start + minutes) % 60),
+                    )
+                    for start in starts
+                ],
+            ))
+
+    return route_plans
+
+
+def plan_scaled_bookings(seed, chunk_index, route_infos, dates, user_count):
+    """
+    Plans the bookings of one chunk of routes, each route with the number of
+    bookings its popularity earned. Seats are tracked per schedule run and
+    segment: general bookings beyond the quota are waitlisted, tatkal ones
+    beyond the tatkal and general quota are refused, as the booking service does.
+    """
+    rng = random.Random(f'{seed}:bookings:{chunk_index}')
+
+    dates_by_weekday: dict[str, list[tuple[date, int]]] = {}
+    for journey_date, days_from_today in dates:
+        dates_by_weekday.setdefault(TrainDataGenerator.WEEKDAYS[journey_date.weekday()], []).append(
+            (journey_date, days_from_today)
+        )
+
+    booking_plans = []
+    confirmed_seats: dict[tuple[int, date, str, int], int] = {}
+    for general_seats, tatkal_seats, pricing, stops, schedules, booking_count in route_infos:
+        runs = [
+            (schedule_id, departure_time, journey_date, days_from_today)
+            for schedule_id, weekday, departure_time in schedules
+            for journey_date, days_from_today in dates_by_weekday.get(weekday, [])
+        ]
+        if not runs:
+            continue
+        # Nearer runs draw more demand, past runs hold the booking history
+        run_weights = [1 / (1 + abs(days_from_today) / 7) for _, _, _, days_from_today in runs]
+
+        for _ in range(booking_count):
+            schedule_id, departure_time, journey_date, days_from_today = rng.choices(runs, weights=run_weights)[0]
+            if rng.random() < 0.4:
+                from_index, to_index = 0, len(stops) - 1
+            else:
+                from_index = rng.randrange(len(stops) - 1)
+                to_index = rng.randrange(from_index + 1, len(stops))
+            segments = [order for _, order, _ in stops[from_index:to_index]]
+
+            booking_type = BookingType.TATKAL.value if days_from_today <= 0 and rng.random() < 0.15 else BookingType.GENERAL.value
+            if rng.random() < 0.06:
+                booking_status = BookingStatus.CANCELLED.value
+            elif booking_type == BookingType.GENERAL.value:
+                if all(
+                    confirmed_seats.get((schedule_id, journey_date, booking_type, segment), 0) < general_seats
+                    for segment in segments
+                ):
+                    booking_status = BookingStatus.CONFIRMED.value
+                else:
+                    booking_status = BookingStatus.WAITING.value
+            elif all(
+                confirmed_seats.get((schedule_id, journey_date, BookingType.TATKAL.value, segment), 0)
+                + confirmed_seats.get((schedule_id, journey_date, BookingType.GENERAL.value, segment), 0)
+                < tatkal_seats + general_seats
+                for segment in segments
+            ):
+                booking_status = BookingStatus.CONFIRMED.value
+            else:
+                continue
+
+            if booking_status == BookingStatus.CONFIRMED.value:
+                for segment in segments:
+                    run_segment = (schedule_id, journey_date, booking_type, segment)
+                    confirmed_seats[run_segment] = confirmed_seats.get(run_segment, 0) + 1
+
+            booking_plans.append((
+                schedule_id,
+                journey_date,
+                departure_time,
+                stops[from_index][0],
+                stops[to_index][0],
+                stops[from_index][2],
+                pricing[booking_type],
+                booking_type,
+                booking_status,
+                days_from_today < 0,
+                rng.randrange(user_count),
+            ))
+
+    return booking_plans, confirmed_seats
+
+
+def plan_scaled_routes_task(task):
+    seed, chunk_index, first_train_index, train_count, route_limit, station_ids, cities, hub_count = task
+    route_plans = plan_scaled_routes(seed, chunk_index, first_train_index, train_count, cities, hub_count)
+    return route_plans[:route_limit], station_ids
+
+
+def create_scaled_routes(task):
+    return write_scaled_routes(*plan_scaled_routes_task(task))
+
+
+def write_scaled_routes(route_plans, station_ids):
+    """
+    Writes one chunk of routes in its own transaction. Chunks hold disjoint
+    trains, so they never conflict. Returns what the booking chunks need of
+    each route.
+    """
+    with transaction.atomic():
+        trains = {}
+        for train_index, *_ in route_plans:
+            if train_index not in trains:
+                name = TrainDataGenerator.TRAINS_DATA[train_index % len(TrainDataGenerator.TRAINS_DATA)][0]
+                trains[train_index] = Train(
+                    name=name,
+                    number=f"{ScaledTrainDataGenerator.TRAIN_NUMBER_PREFIX}{train_index:06d}",
+                )
+        Train.objects.bulk_create(list(trains.values()), batch_size=ScaledTrainDataGenerator.BATCH_SIZE)
+
+        routes = Route.objects.bulk_create([
+            Route(name=route_name, train=trains[train_index], seats=seats, pricing=pricing)
+            for train_index, route_name, seats, pricing, _, _ in route_plans
+        ], batch_size=ScaledTrainDataGenerator.BATCH_SIZE)
+
+        stops_of_routes, schedules_of_routes = [], []
+        for route, (_, _, _, _, stops, schedules) in zip(routes, route_plans):
+            stops_of_routes.append([
+                Stop(
+                    order=order,
+                    route=route,
+                    station_id=station_ids[station_index],
+                    arrival_minutes_from_source=arrival_minutes,
+                    departure_minutes_from_source=departure_minutes,
+                    distance_kms_from_source=distance_kms,
+                )
+                for order, (station_index, arrival_minutes, departure_minutes, distance_kms) in enumerate(stops, 1)
+            ])
+            schedules_of_routes.append([
+                Schedule(route=route, weekday=weekday, departure_time=departure_time, arrival_time=arrival_time)
+                for weekday, departure_time, arrival_time in schedules
+            ])
+        Stop.objects.bulk_create(
+            [stop for stops in stops_of_routes for stop in stops],
+            batch_size=ScaledTrainDataGenerator.BATCH_SIZE,
+        )
+        Schedule.objects.bulk_create(
+            [schedule for schedules in schedules_of_routes for schedule in schedules],
+            batch_size=ScaledTrainDataGenerator.BATCH_SIZE,
+        )
+        stop_pairs = [
+            stop_pair
+            for route, stops in zip(routes, stops_of_routes)
+            for stop_pair in RouteModelUtils.get_stop_pairs(route, stops)
+        ]
+        StopPair.objects.bulk_create(stop_pairs, batch_size=ScaledTrainDataGenerator.BATCH_SIZE)
+
+    # Per route: (general seats, tatkal seats, pricing,
+    # [(stop id, order, departure minutes)], [(schedule id, weekday, departure time)])
+    route_infos = [
+        (
+            route.general_seats,
+            route.tatkal_seats,
+            route.pricing,
+            [(stop.id, stop.order, stop.departure_minutes_from_source) for stop in stops],
+            [(schedule.id, schedule.weekday, schedule.departure_time) for schedule in schedules],
+        )
+        for route, stops, schedules in zip(routes, stops_of_routes, schedules_of_routes)
+    ]
+    counts = dict(
+        trains=len(trains),
+        routes=len(routes),
+        stops=sum(len(stops) for stops in stops_of_routes),
+        stop_pairs=len(stop_pairs),
+        schedules=sum(len(schedules) for schedules in schedules_of_routes),
+    )
+    return route_infos, counts
+
+
+def plan_scaled_bookings_task(task):
+    seed, chunk_index, route_infos, dates, user_ids = task
+    booking_plans, confirmed_seats = plan_scaled_bookings(seed, chunk_index, route_infos, dates, len(user_ids))
+    return booking_plans, confirmed_seats, user_ids
+
+
+def create_scaled_bookings(task):
+    return write_scaled_bookings(*plan_scaled_bookings_task(task))
+
+
+def write_scaled_bookings(booking_plans, confirmed_seats, user_ids):
+    """
+    Writes the bookings and seat inventory of one chunk of routes in its own
+    transaction. Chunks hold disjoint schedule runs.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        Booking.objects.bulk_create([
+            Booking(
+                user_id=user_ids[user_index],
+                journey_date=journey_date,
+                schedule_id=schedule_id,
+                from_stop_id=from_stop_id,
+                to_stop_id=to_stop_id,
+                amount=amount,
+                boarding_datetime=timezone.make_aware(datetime.combine(journey_date, departure_time))
+                + timedelta(minutes=departure_minutes),
+                confirmation_datetime=now if booking_status == BookingStatus.CONFIRMED.value else None,
+                cancellation_datetime=now if booking_status == BookingStatus.CANCELLED.value else None,
+                notification_sent=departed,
+                status=booking_status,
+                type=booking_type,
+            )
+            for (schedule_id, journey_date, departure_time, from_stop_id, to_stop_id, departure_minutes,
+                 amount, booking_type, booking_status, departed, user_index) in booking_plans
+        ], batch_size=ScaledTrainDataGenerator.BATCH_SIZE)
+        SeatInventory.objects.bulk_create([
+            SeatInventory(
+                schedule_id=schedule_id,
+                journey_date=journey_date,
+                type=booking_type,
+                segment=segment,
+                confirmed=confirmed,
+            )
+            for (schedule_id, journey_date, booking_type, segment), confirmed in confirmed_seats.items()
+        ], batch_size=ScaledTrainDataGenerator.BATCH_SIZE)
+
+    counts = {booking_status.value: 0 for booking_status in BookingStatus}
+    for booking_plan in booking_plans:
+        counts[booking_plan[8]] += 1
+    return counts
+
+
+class ScaledTrainDataGenerator:
+    """
+    Generates a network and a booking history of any size. Chunks of routes
+    and of bookings are planned in memory from their own seed, so the data
+    only depends on the seed, and written with batched bulk_create. Worker
+    processes plan the chunks and, except on SQLite which allows a single
+    writer, write them too. Booking demand follows a Zipf curve over the
+    routes, so a few hot trains run full with waitlists while most have
+    seats left.
+    """
+
+    STATION_CODE_PREFIX = 'G'
+    TRAIN_NUMBER_PREFIX = 'G'
+    USER_PREFIX = 'dummy_user_'
+    HUB_COUNT = 20
+    CHUNK_SIZE = 250
+    BATCH_SIZE = 2000
+
+    def __init__(self, stations, routes, bookings, users=None, seed=42, workers=1, days_ahead=30, history_days=7):
+        self.station_count = stations
+        self.route_count = routes
+        self.booking_count = bookings
+        self.user_count = users if users is not None else max(1, bookings // 20)
+        self.seed = seed
+        self.workers = workers
+        self.days_ahead = days_ahead
+        self.history_days = history_days
+        self.random = random.Random(seed)
+        self.route_infos = []
+
+    def clear_all_data(self):
+        TrainDataGenerator().clear_all_data()
+
+    def generate_all_data(self):
+        print("🚀 Starting scaled dummy data generation...")
+        started_at = timer()
+
+        stations = self.create_stations()
+        # Forked workers open their own connections, the parent's must not
+        # be shared with them
+        connections.close_all()
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('fork')) as executor:
+                self.create_routes_with_schedules(stations, executor.map)
+                if self.booking_count:
+                    self.create_bookings(executor.map)
+        else:
+            self.create_routes_with_schedules(stations, map)
+            if self.booking_count:
+                self.create_bookings(map)
+
+        ScheduleSelectors.timetable_versions.bump(['all'])
+        print(f"✅ Scaled dummy data generation completed in {timer() - started_at:.1f}s")
+
+    def __run_tasks(self, map_tasks, tasks, create, plan_task, write):
+        """
+        Runs create on every task through map_tasks. SQLite takes a single
+        writer, so with workers there they only plan and the plans are
+        written here.
+        """
+        if map_tasks is not map and connections['default'].vendor == 'sqlite':
+            return (write(*plan) for plan in map_tasks(plan_task, tasks))
+        return map_tasks(create, tasks)
+
+    def create_stations(self):
+        print("🏢 Creating stations...")
+        stations_data = list(TrainDataGenerator.STATIONS_DATA[:self.station_count])
+        for index in range(len(stations_data), self.station_count):
+            name, city, state, _ = TrainDataGenerator.STATIONS_DATA[index % len(TrainDataGenerator.STATIONS_DATA)]
+            stations_data.append((f"{name} Halt {index}", city, state, f"{self.STATION_CODE_PREFIX}{index:05d}"))
+
+        existing_stations = {
+            station.code: station
+            for station in Station.objects.filter(code__in=[code for _, _, _, code in stations_data])
+        }
+        new_stations = Station.objects.bulk_create([
+            Station(name=name, city=city, state=state, code=code)
+            for name, city, state, code in stations_data
+            if code not in existing_stations
+        ], batch_size=self.BATCH_SIZE)
+        stations_by_code = {**existing_stations, **{station.code: station for station in new_stations}}
+
+        print(f"✅ Created {len(new_stations)} stations, reused {len(existing_stations)}")
+        return [stations_by_code[code] for _, _, _, code in stations_data]
+
+    def create_routes_with_schedules(self, stations, map_tasks):
+        print("🛤️  Creating routes with schedules...")
+        station_ids = [station.id for station in stations]
+        cities = [station.city for station in stations]
+        first_train_index = Train.all_objects.filter(number__startswith=self.TRAIN_NUMBER_PREFIX).count()
+        connections.close_all()
+
+        train_count = (self.route_count + 1) // 2
+        tasks = [
+            (self.seed, chunk_index, first_train_index + first, min(self.CHUNK_SIZE, train_count - first),
+             self.route_count - 2 * first, station_ids, cities, min(self.HUB_COUNT, len(stations)))
+            for chunk_index, first in enumerate(range(0, train_count, self.CHUNK_SIZE))
+        ]
+
+        counts = dict(trains=0, routes=0, stops=0, stop_pairs=0, schedules=0)
+        for route_infos, chunk_counts in self.__run_tasks(map_tasks, tasks, create_scaled_routes, plan_scaled_routes_task, write_scaled_routes):
+            self.route_infos.extend(route_infos)
+            for name, count in chunk_counts.items():
+                counts[name] += count
+            print(f"📈 Created {counts['routes']} routes...")
+
+        print(
+            f"✅ Created {counts['trains']} trains, {counts['routes']} routes, {counts['stops']} stops, "
+            f"{counts['stop_pairs']} stop pairs and {counts['schedules']} schedules"
+        )
+
+    def create_bookings(self, map_tasks):
+        print("🎫 Creating bookings...")
+        first_user_index = User.objects.filter(username__startswith=self.USER_PREFIX).count()
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(username=f"{self.USER_PREFIX}{index}", email=f"{self.USER_PREFIX}{index}@trainbooking.com", password=password)
+            for index in range(first_user_index, first_user_index + self.user_count)
+        ], batch_size=self.BATCH_SIZE)
+        user_ids = [user.id for user in users]
+        connections.close_all()
+
+        # Zipf demand over a shuffled route order: a handful of hot trains
+        # take a large share of all bookings.
+        route_ranks = list(range(len(self.route_infos)))
+        self.random.shuffle(route_ranks)
+        demand_weights = [1 / (rank + 1) ** 1.1 for rank in route_ranks]
+        total_weight = sum(demand_weights)
+        booking_counts = [int(self.booking_count * weight / total_weight) for weight in demand_weights]
+        for route_index in self.random.choices(range(len(self.route_infos)), weights=demand_weights,
+                                               k=self.booking_count - sum(booking_counts)):
+            booking_counts[route_index] += 1
+
+        today = timezone.now().date()
+        dates = [
+            (today + timedelta(days=days), days)
+            for days in range(-self.history_days, self.days_ahead + 1)
+        ]
+        tasks = [
+            (self.seed, chunk_index, [
+                (*route_info, booking_count)
+                for route_info, booking_count in zip(
+                    self.route_infos[first:first + self.CHUNK_SIZE],
+                    booking_counts[first:first + self.CHUNK_SIZE],
+                )
+            ], dates, user_ids)
+            for chunk_index, first in enumerate(range(0, len(self.route_infos), self.CHUNK_SIZE))
+        ]
+
+        counts = {booking_status.value: 0 for booking_status in BookingStatus}
+        for chunk_counts in self.__run_tasks(map_tasks, tasks, create_scaled_bookings, plan_scaled_bookings_task, write_scaled_bookings):
+            for booking_status, count in chunk_counts.items():
+                counts[booking_status] += count
+            print(f"📈 Created {sum(counts.values())} bookings...")
+
+        print(
+            f"✅ Created {len(users)} users and {sum(counts.values())} bookings: "
+            + ", ".join(f"{count} {booking_status}" for booking_status, count in counts.items())
+        )
+
+
 # Convenience function to run the generator
 def generate_dummy_data():
     generator = TrainDataGenerator()
@@ -665,7 +1186,10 @@ def clear_dummy_data():
 
 
 class Command(BaseCommand):
-    help = 'Generate enhanced dummy train data for testing'
+    help = (
+        'Generate enhanced dummy train data for testing. Pass --routes for the scaled mode, '
+        'which builds any number of stations, routes and bookings with batched inserts'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -673,19 +1197,46 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before generating new data',
         )
+        parser.add_argument('--stations', type=int, help='Scaled mode: stations, the named ones first')
+        parser.add_argument('--routes', type=int, help='Scaled mode: routes, run in pairs by one train')
+        parser.add_argument('--bookings', type=int, default=0, help='Scaled mode: bookings over the generated routes')
+        parser.add_argument('--users', type=int, help='Scaled mode: users holding the bookings, bookings / 20 by default')
+        parser.add_argument('--days-ahead', type=int, default=30, help='Scaled mode: journey dates up to this many days ahead')
+        parser.add_argument('--history-days', type=int, default=7, help='Scaled mode: journey dates up to this many days back')
+        parser.add_argument('--seed', type=int, help='Random seed, the same seed generates the same data')
+        parser.add_argument('--workers', type=int, default=1, help='Scaled mode: processes planning routes and bookings')
 
     def handle(self, *args, **options):
         self.stdout.write(
             self.style.SUCCESS('🚀 Starting enhanced dummy data generation...')
         )
-        
-        generator = TrainDataGenerator()
+
+        scaled = options['routes'] is not None or options['stations'] is not None
+        if options['bookings'] and options['routes'] is None:
+            raise CommandError('Bookings are generated over the routes of the same run, pass --routes')
+
+        if scaled:
+            generator = ScaledTrainDataGenerator(
+                stations=options['stations'] if options['stations'] is not None else len(TrainDataGenerator.STATIONS_DATA),
+                routes=options['routes'] or 0,
+                bookings=options['bookings'],
+                users=options['users'],
+                seed=options['seed'] if options['seed'] is not None else 42,
+                workers=max(1, options['workers']),
+                days_ahead=options['days_ahead'],
+                history_days=options['history_days'],
+            )
+        else:
+            if options['seed'] is not None:
+                random.seed(options['seed'])
+            generator = TrainDataGenerator()
         
         if options['clear']:
             generator.clear_all_data()
             
         generator.generate_all_data()
+        ScheduleSelectors.timetable_versions.bump(['all'])
         
         self.stdout.write(
             self.style.SUCCESS('✅ Successfully generated enhanced dummy data!')
-        ) 
\ No newline at end of file
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from trains.services import TimetableImportService
+
+
+class Command(BaseCommand):
+    help = (
+        'Import a timetable from a JSON lines file, one {"number", "name", "route"} record per line, '
+        'or from a CSV file with one stop per row'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Timetable file')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500, help='Records written per transaction')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or ('csv' if options['path'].lower().endswith('.csv') else 'jsonl')
+        try:
+            stream = open(options['path'], encoding='utf-8', newline='')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'🚆 Importing {file_format} timetable from {options["path"]}')
+        with stream:
+            records = (
+                TimetableImportService.read_csv(stream)
+                if file_format == 'csv'
+                else TimetableImportService.read_jsonl(stream)
+            )
+            try:
+                report = TimetableImportService(
+                    input=TimetableImportService.Input(batch_size=options['batch_size'])
+                ).import_records(records)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(f'   {error}'))
+        self.stdout.write(
+            f'   {report.records} records, {report.skipped} skipped: {report.trains} trains, {report.routes} routes, '
+            f'{report.stops} stops, {report.stop_pairs} stop pairs, {report.schedules} schedules'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {report.rows} rows in {report.elapsed_seconds:.2f}s, {report.rows_per_second:.0f} rows/sec'
+        ))
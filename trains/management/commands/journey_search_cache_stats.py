@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from trains.services import JourneySearchService
+
+
+class Command(BaseCommand):
+    help = 'Show hit and miss counters of the journey search result cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = JourneySearchService.result_cache_metrics.get_stats()
+        self.stdout.write(
+            f'🔎 Journey search cache: {stats["hits"]} hits, {stats["misses"]} misses, '
+            f'hit ratio {stats["hit_ratio"] * 100:.1f}%'
+        )
+
+        if options['reset']:
+            JourneySearchService.result_cache_metrics.reset()
+            self.stdout.write(self.style.SUCCESS('✅ Counters reset'))
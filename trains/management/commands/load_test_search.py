@@ -0,0 +1,112 @@
+import asyncio
+import random
+import statistics
+import time
+from datetime import timedelta
+from urllib.parse import urlencode, urlsplit
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+from trains.models import StopPair
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent journey searches at running servers and compare their latency and throughput. '
+        'Start the servers first, for example '
+        '"python manage.py runserver 8000 --noreload" for the WSGI path and '
+        '"uvicorn backend.asgi:application --port 8001" for the ASGI path.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', metavar='NAME=URL',
+                            help='Search endpoint to load, repeatable. Defaults to the sync and async views')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per target')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once')
+        parser.add_argument('--pairs', type=int, default=50, help='Number of random station pairs to search')
+        parser.add_argument('--compact', action='store_true', help='Request the compact output')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        targets = dict(target.split('=', 1) for target in options['target'] or [
+            'wsgi=http://127.0.0.1:8000/trains/search/',
+            'asgi=http://127.0.0.1:8001/trains/async/search/',
+        ])
+
+        station_pairs = list(StopPair.objects.values_list('from_station__code', 'to_station__code').distinct())
+        if not station_pairs:
+            raise CommandError('No stop pairs found, generate some trains first')
+        station_pairs = random.sample(station_pairs, min(options['pairs'], len(station_pairs)))
+
+        today = timezone.now().date()
+        query_strings = []
+        for _ in range(options['requests']):
+            source_station_code, destination_station_code = random.choice(station_pairs)
+            query = dict(
+                source_station_code=source_station_code,
+                destination_station_code=destination_station_code,
+                journey_date=(today + timedelta(days=random.randint(1, 30))).isoformat(),
+            )
+            if options['compact']:
+                query['compact'] = 'true'
+            query_strings.append(urlencode(query))
+
+        self.stdout.write(
+            f'🚦 {options["requests"]} requests per target, {options["concurrency"]} in flight, '
+            f'{len(station_pairs)} station pairs'
+        )
+        for name, url in targets.items():
+            try:
+                durations, errors, elapsed = asyncio.run(
+                    self.load(url, query_strings, options['concurrency'])
+                )
+            except OSError as e:
+                self.stdout.write(self.style.WARNING(f'   {name:<6} {url} unreachable: {e}'))
+                continue
+
+            durations.sort()
+            percentiles = statistics.quantiles(durations, n=100) if len(durations) > 1 else durations * 99
+            self.stdout.write(
+                f'   {name:<6} {len(durations) / elapsed:>8.1f} req/s, p50 {percentiles[49]:.1f}ms, '
+                f'p95 {percentiles[94]:.1f}ms, p99 {percentiles[98]:.1f}ms, {errors} errors'
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Load test finished'))
+
+    async def load(self, url: str, query_strings: list[str], concurrency: int) -> tuple[list[float], int, float]:
+        url_parts = urlsplit(url)
+        # Fail fast when nothing listens on the target
+        _, writer = await asyncio.open_connection(url_parts.hostname, url_parts.port or 80)
+        writer.close()
+
+        semaphore = asyncio.Semaphore(concurrency)
+        durations: list[float] = []
+        errors = 0
+
+        async def send(query_string: str) -> None:
+            nonlocal errors
+            async with semaphore:
+                started_at = time.perf_counter()
+                try:
+                    status_code = await self.get(url_parts, query_string)
+                except OSError:
+                    status_code = None
+                durations.append((time.perf_counter() - started_at) * 1000)
+                if status_code != 200:
+                    errors += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(send(query_string) for query_string in query_strings))
+        return durations, errors, time.perf_counter() - started_at
+
+    async def get(self, url_parts, query_string: str) -> int:
+        reader, writer = await asyncio.open_connection(url_parts.hostname, url_parts.port or 80)
+        writer.write((
+            f'GET {url_parts.path}?{query_string} HTTP/1.1\r\n'
+            f'Host: {url_parts.netloc}\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return int(response.split(b' ', 2)[1])
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:27
+
+import django.db.models.deletion
+import django.db.models.manager
+from django.db import migrations, models
+
+
+def populate_stop_pairs(apps, schema_editor):
+    Stop = apps.get_model('trains', 'Stop')
+    StopPair = apps.get_model('trains', 'StopPair')
+
+    stops_by_route_id = {}
+    for stop in Stop._default_manager.filter(deleted=False).order_by('route_id', 'order'):
+        stops_by_route_id.setdefault(stop.route_id, []).append(stop)
+
+    stop_pairs = []
+    for route_id, stops_of_route in stops_by_route_id.items():
+        for idx, from_stop in enumerate(stops_of_route):
+            for to_stop in stops_of_route[idx + 1:]:
+                stop_pairs.append(StopPair(
+                    route_id=route_id,
+                    from_stop_id=from_stop.id,
+                    to_stop_id=to_stop.id,
+                    from_order=from_stop.order,
+                    to_order=to_stop.order,
+                    from_station_id=from_stop.station_id,
+                    to_station_id=to_stop.station_id,
+                ))
+
+    StopPair._default_manager.bulk_create(stop_pairs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trains', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StopPair',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('metadata', models.JSONField(default=dict)),
+                ('from_order', models.PositiveIntegerField()),
+                ('to_order', models.PositiveIntegerField()),
+                ('from_station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stop_pairs_of_from_station', to='trains.station')),
+                ('from_stop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stop_pairs_of_from_stop', to='trains.stop')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stop_pairs_of_route', to='trains.route')),
+                ('to_station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stop_pairs_of_to_station', to='trains.station')),
+                ('to_stop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stop_pairs_of_to_stop', to='trains.stop')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['from_station', 'to_station', 'route'], name='stop_pair_stations_idx')],
+                'unique_together': {('from_stop', 'to_stop')},
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RunPython(populate_stop_pairs, migrations.RunPython.noop),
+    ]
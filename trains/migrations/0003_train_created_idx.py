@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trains', '0002_stoppair'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='train',
+            index=models.Index(fields=['-created_at', '-id'], name='train_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trains', '0003_train_created_idx'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='stop',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['train'], name='route_live_train_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['route', 'weekday'], name='schedule_live_route_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stop',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted', False)), fields=('route', 'order'), name='stop_live_route_order_unique'),
+        ),
+    ]
@@ -1,4 +1,10 @@
-from trains.models import Route, Stop
+from datetime import time
+from typing import Iterable
+from trains.models import Route, Stop, StopPair
+from utils.enums import Weekday
+from utils.intervals import IntervalUtils
+
+WEEKDAYS = list(Weekday)
 
 
 class StationModelUtils:
@@ -47,10 +53,102 @@ class RouteModelUtils:
         
         return float(ordered_stops[-1].distance_kms_from_source - ordered_stops[0].distance_kms_from_source)
 
+    @staticmethod
+    def get_stop_pairs(
+        route: Route,
+        stops_of_route: list[Stop],
+    ) -> list[StopPair]:
+        ordered_stops = sorted(list(stops_of_route), key=lambda x: x.order)
+
+        stop_pairs: list[StopPair] = []
+        for idx, from_stop in enumerate(ordered_stops):
+            for to_stop in ordered_stops[idx + 1:]:
+                stop_pairs.append(StopPair(
+                    route=route,
+                    from_stop=from_stop,
+                    to_stop=to_stop,
+                    from_order=from_stop.order,
+                    to_order=to_stop.order,
+                    from_station_id=from_stop.station_id,
+                    to_station_id=to_stop.station_id,
+                ))
+
+        return stop_pairs
+
 
 class StopModelUtils:
     pass
 
 
+class StopPairModelUtils:
+    VALUES = ('route_id', 'from_stop_id', 'to_stop_id', 'from_order', 'to_order')
+
+    @staticmethod
+    def get_shortest_stop_pairs_by_route_id(
+        stop_pair_values: Iterable[tuple[int, int, int, int, int]],
+    ) -> dict[int, tuple[int, int]]:
+        """
+        A loop route passes a station more than once, so it can have several
+        stop pairs between the same two stations. Each schedule is one journey,
+        so keep the pair with the fewest stops in between, boarding earliest
+        on a tie. Takes rows of StopPairModelUtils.VALUES.
+        """
+        shortest_stop_pairs: dict[int, tuple[int, int, int, int]] = {}
+        for route_id, from_stop_id, to_stop_id, from_order, to_order in stop_pair_values:
+            stop_pair = (to_order - from_order, from_order, from_stop_id, to_stop_id)
+            if route_id not in shortest_stop_pairs or stop_pair < shortest_stop_pairs[route_id]:
+                shortest_stop_pairs[route_id] = stop_pair
+
+        return {
+            route_id: (from_stop_id, to_stop_id)
+            for route_id, (_, _, from_stop_id, to_stop_id) in shortest_stop_pairs.items()
+        }
+
+
 class ScheduleModelUtils:
-    pass
\ No newline at end of file
+
+    @staticmethod
+    def get_week_interval(
+        weekday: str,
+        departure_time: time,
+        arrival_time: time,
+        journey_minutes: int | None = None,
+        buffer_minutes: int = 0,
+    ) -> tuple[int, int]:
+        """
+        Returns the [start, end) minutes of the week a schedule keeps its train
+        busy, Monday 00:00 being minute 0. The journey length of the route is
+        preferred over the arrival time since runs may last several days.
+        """
+        start = (
+            WEEKDAYS.index(Weekday(weekday)) * IntervalUtils.DAY_MINUTES
+            + departure_time.hour * 60 + departure_time.minute
+        )
+        if journey_minutes is None:
+            journey_minutes = (
+                (arrival_time.hour * 60 + arrival_time.minute)
+                - (departure_time.hour * 60 + departure_time.minute)
+            ) % IntervalUtils.DAY_MINUTES
+
+        return start, start + journey_minutes + buffer_minutes
+
+    @staticmethod
+    def get_week_interval_index(
+        schedules: Iterable[dict],
+    ) -> IntervalUtils.WeekIntervalIndex:
+        """
+        Indexes rows of ScheduleSelectors.get_week_intervals_queryset, each
+        row being the payload of its interval.
+        """
+        return IntervalUtils.WeekIntervalIndex(
+            (
+                *ScheduleModelUtils.get_week_interval(
+                    weekday=schedule['weekday'],
+                    departure_time=schedule['departure_time'],
+                    arrival_time=schedule['arrival_time'],
+                    journey_minutes=schedule.get('journey_minutes'),
+                ),
+                schedule,
+            )
+            for schedule in schedules
+        )
@@ -16,6 +16,14 @@ class Station(ModelUtils.BaseModel):
 class Train(ModelUtils.BaseModel):
     name = models.CharField(max_length=256, null=False, blank=False)
     number = models.CharField(max_length=16, unique=True, null=False, blank=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='train_created_idx',
+            ),
+        ]
     
     def __str__(self) -> str:
         return f"[{self.number}] {self.name}"
@@ -26,6 +34,15 @@ class Route(ModelUtils.BaseModel):
     train = models.ForeignKey(Train, on_delete=models.CASCADE, related_name='routes_of_train', null=False, blank=False)
     pricing = models.JSONField(default=dict, null=False, blank=False)
     seats = models.JSONField(default=dict, null=False, blank=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['train'],
+                condition=models.Q(deleted=False),
+                name='route_live_train_idx',
+            ),
+        ]
     
     @property
     def tatkal_price(self) -> float:
@@ -64,8 +81,15 @@ class Stop(ModelUtils.BaseModel):
         return self.arrival_minutes_from_source - self.departure_minutes_from_source
 
     class Meta:
-        unique_together = ['route', 'order']
         ordering = ['route', 'order']
+        # Retired stops keep their order, so a route's stops can be replaced
+        constraints = [
+            models.UniqueConstraint(
+                fields=['route', 'order'],
+                condition=models.Q(deleted=False),
+                name='stop_live_route_order_unique',
+            ),
+        ]
     
     def __str__(self) -> str:
         return f"[{self.id}] {self.station.code} \t ON ROUTE [{self.route.id}]"
@@ -77,5 +101,33 @@ class Schedule(ModelUtils.BaseModel):
     departure_time = models.TimeField(null=False, blank=False)
     arrival_time = models.TimeField(null=False, blank=False)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['route', 'weekday'],
+                condition=models.Q(deleted=False),
+                name='schedule_live_route_day_idx',
+            ),
+        ]
+
     def __str__(self):
-        return f"{self.weekday} [{self.id}] \t ON ROUTE [{self.route.id}]"
\ No newline at end of file
+        return f"{self.weekday} [{self.id}] \t ON ROUTE [{self.route.id}]"
+
+
+class StopPair(ModelUtils.BaseModel):
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name='stop_pairs_of_route', null=False, blank=False)
+    from_stop = models.ForeignKey(Stop, on_delete=models.CASCADE, related_name='stop_pairs_of_from_stop', null=False, blank=False)
+    to_stop = models.ForeignKey(Stop, on_delete=models.CASCADE, related_name='stop_pairs_of_to_stop', null=False, blank=False)
+    from_station = models.ForeignKey(Station, on_delete=models.CASCADE, related_name='stop_pairs_of_from_station', null=False, blank=False)
+    to_station = models.ForeignKey(Station, on_delete=models.CASCADE, related_name='stop_pairs_of_to_station', null=False, blank=False)
+    from_order = models.PositiveIntegerField(null=False, blank=False)
+    to_order = models.PositiveIntegerField(null=False, blank=False)
+
+    class Meta:
+        unique_together = ['from_stop', 'to_stop']
+        indexes = [
+            models.Index(fields=['from_station', 'to_station', 'route'], name='stop_pair_stations_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"[{self.id}] {self.from_stop_id} -> {self.to_stop_id} \t ON ROUTE [{self.route_id}]"
@@ -1,10 +1,12 @@
 from datetime import date
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import QuerySet
+from django.db.models import QuerySet, Max, Min, Q
 from django.db.models.query import Prefetch
-from trains.models import Schedule, Stop, Train, Route, Station
+from trains.models import Schedule, Stop, StopPair, Train, Route, Station
 from bookings.selectors import BookingSelectors
 from utils.selectors import BaseSelectors
+from utils.cache import CacheUtils
 
 
 class StationSelectors(BaseSelectors):
@@ -48,43 +50,151 @@ class TrainSelectors(BaseSelectors):
 class RouteSelectors(BaseSelectors):
     model = Route
 
+    @staticmethod
+    def get_route_topology_queryset(
+        query_options: 'RouteSelectors.Options | None' = None,
+        stop_query_options: 'StopSelectors.Options | None' = None,
+    ) -> QuerySet[Route]:
+        routes_queryset = RouteSelectors.generate_queryset(query_options)
+        stops_queryset = StopSelectors.generate_queryset(stop_query_options)
+
+        return (
+            routes_queryset
+            .select_related('train').prefetch_related(
+                Prefetch(
+                    'stops_of_route',
+                    queryset=stops_queryset.select_related('station').order_by('order'),
+                ),
+            )
+        )
+
+    @staticmethod
+    def load_route_topologies(route_ids: list[int]) -> dict[int, Route]:
+        query_options = RouteSelectors.Options(
+            filters={'id__in': route_ids},
+            include_deleted=True,
+        )
+        return {
+            route.id: route
+            for route in RouteSelectors.get_route_topology_queryset(query_options=query_options)
+        }
+
+    topology_cache = CacheUtils.VersionedCache(
+        namespace='route_topology',
+        loader=load_route_topologies,
+        timeout=settings.ROUTE_TOPOLOGY_CACHE_TIMEOUT,
+        local_size=settings.ROUTE_TOPOLOGY_LOCAL_CACHE_SIZE,
+    )
+
+    @staticmethod
+    def get_cached_route_topologies(route_ids: list[int]) -> dict[int, Route]:
+        """
+        Routes with their train and ordered stops (with stations), served
+        from the topology cache. Invalidated by the TrainService writes.
+        """
+        return RouteSelectors.topology_cache.get_many(route_ids)
+
 
 class StopSelectors(BaseSelectors):
     model = Stop
 
 
+class StopPairSelectors(BaseSelectors):
+    model = StopPair
+
+    @staticmethod
+    def get_stop_pairs_between_stations_queryset(
+        source_station_code: str,
+        destination_station_code: str,
+        query_options: 'StopPairSelectors.Options | None' = None,
+    ) -> QuerySet[StopPair]:
+        query_options = query_options or StopPairSelectors.Options()
+        query_options.add_multiple_filters(dict(
+            from_station__code=source_station_code,
+            to_station__code=destination_station_code,
+        ))
+        return StopPairSelectors.generate_queryset(query_options)
+
+
 class ScheduleSelectors(BaseSelectors):
     model = Schedule
 
+    # One token for the whole timetable, any route, stop or schedule write
+    # bumps it. Cached search results are keyed by it.
+    timetable_versions = CacheUtils.VersionTokens(namespace='timetable')
+
+    @staticmethod
+    def get_timetable_version() -> str:
+        return ScheduleSelectors.timetable_versions.get_many(['all'])['all']
+
+    @staticmethod
+    def get_bookings_prefetch(
+        booking_query_options: 'BookingSelectors.Options | None' = None,
+        journey_date: date | None = None,
+    ) -> Prefetch:
+        booking_query_options = booking_query_options or BookingSelectors.Options()
+        if journey_date:
+            booking_query_options.add_filter('journey_date', journey_date)
+
+        bookings_queryset = BookingSelectors.generate_queryset(booking_query_options)
+        return Prefetch(
+            'bookings_of_schedule',
+            queryset=bookings_queryset.select_related('user', 'from_stop', 'to_stop'),
+        )
+
     @staticmethod
     def get_schedule_complete_details_queryset(
         query_options: 'ScheduleSelectors.Options | None' = None,
         stop_query_options: 'StopSelectors.Options | None' = None,
         booking_query_options: 'BookingSelectors.Options | None' = None,
         journey_date: date | None = None,
+        prefetch_route: bool = True,
+        prefetch_bookings: bool = False,
     ) -> QuerySet[Schedule]:
-        stops_queryset = StopSelectors.generate_queryset(stop_query_options)
-        schedules_queryset = ScheduleSelectors.generate_queryset(query_options)
-        bookings_queryset = BookingSelectors.generate_queryset(booking_query_options)
-        
+        """
+        Schedules running on the journey date. Seat counts don't need the
+        bookings prefetch, see BookingSelectors.get_overlapping_booking_counts_queryset.
+        """
+        query_options = query_options or ScheduleSelectors.Options()
         now = timezone.now().date()
         if journey_date:
             if journey_date < now:
                 raise ValueError('Journey date cannot be in the past')
 
             query_options.add_filter('weekday', journey_date.strftime('%a').upper()[:3])
-            query_options.add_filter('journey_date', journey_date)
 
-        return (
-            schedules_queryset
-            .select_related('route__train').prefetch_related(
+        stops_queryset = StopSelectors.generate_queryset(stop_query_options)
+        schedules_queryset = ScheduleSelectors.generate_queryset(query_options)
+
+        if prefetch_route:
+            schedules_queryset = schedules_queryset.select_related('route__train').prefetch_related(
                 Prefetch(   
                     'route__stops_of_route',
                     queryset=stops_queryset.select_related('station').order_by('order'),
                 ),
-                Prefetch(
-                    'bookings_of_schedule',
-                    queryset=bookings_queryset.select_related('user', 'from_stop', 'to_stop'),
-                )
-            ).distinct()
+            )
+
+        if prefetch_bookings:
+            schedules_queryset = schedules_queryset.prefetch_related(
+                ScheduleSelectors.get_bookings_prefetch(booking_query_options, journey_date=journey_date),
+            )
+
+        return schedules_queryset
+
+    @staticmethod
+    def get_week_intervals_queryset(
+        query_options: 'ScheduleSelectors.Options | None' = None,
+    ) -> QuerySet:
+        """
+        Schedule values with the journey length of their route in minutes,
+        as ScheduleModelUtils.get_week_interval expects them.
+        """
+        live_stops = Q(route__stops_of_route__deleted=False)
+        return ScheduleSelectors.generate_queryset(query_options).values(
+            'weekday', 'departure_time', 'arrival_time', 'route__name', 'route__train__number',
+        ).annotate(
+            journey_minutes=(
+                Max('route__stops_of_route__arrival_minutes_from_source', filter=live_stops)
+                - Min('route__stops_of_route__departure_minutes_from_source', filter=live_stops)
+            ),
         )
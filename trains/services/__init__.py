@@ -1,9 +1,15 @@
 from trains.services.journey_search import JourneySearchService
 from trains.services.journey_details import JourneyDetailsService
+from trains.services.journey_calendar import JourneyCalendarService
+from trains.services.transfer_search import TransferSearchService
 from trains.services.train import TrainService
+from trains.services.timetable_import import TimetableImportService
 
 __all__ = [
     'JourneySearchService',
     'JourneyDetailsService',
+    'JourneyCalendarService',
+    'TransferSearchService',
     'TrainService',
+    'TimetableImportService',
 ]
@@ -0,0 +1,170 @@
+from datetime import date, datetime, timedelta
+from django.utils import timezone
+from dataclasses import dataclass
+from rest_framework import serializers
+from dataclasses_json import dataclass_json
+from bookings.selectors import BookingSelectors, SeatInventorySelectors
+from trains.selectors import ScheduleSelectors, StopPairSelectors, RouteSelectors
+from trains.services.journey_details import JourneyDetailsService
+from trains.models import Schedule, Stop
+from trains.model_utils import StopPairModelUtils
+from utils.enums import BookingType
+from utils.serializers import JourneyDateSerializer
+
+
+class JourneyCalendarService:
+
+    @dataclass_json
+    @dataclass
+    class Input:
+        start_date: date
+        end_date: date
+        source_station_code: str
+        destination_station_code: str
+
+    @dataclass_json
+    @dataclass
+    class JourneyAvailability:
+        schedule_id: int
+        train_name: str
+        train_number: str
+        departure_datetime: datetime
+        general_booking_open: bool
+        tatkal_booking_open: bool
+        available_seats: 'JourneyDetailsService.SeatAvailability'
+        waiting_seats: 'JourneyDetailsService.SeatAvailability'
+        pricing: 'JourneyDetailsService.Pricing'
+
+    @dataclass_json
+    @dataclass
+    class DateAvailability:
+        journey_date: date
+        journeys: list['JourneyCalendarService.JourneyAvailability']
+
+    class OutputSerializer(serializers.Serializer):
+        def to_representation(self, instance: 'JourneyCalendarService.DateAvailability'):
+            return instance.to_dict()
+
+    def __init__(self, input: 'JourneyCalendarService.Input'):
+        self.start_date = input.start_date
+        self.end_date = input.end_date
+        self.source_station_code = input.source_station_code
+        self.destination_station_code = input.destination_station_code
+
+    def get_calendar(self) -> list['JourneyCalendarService.DateAvailability']:
+        if self.end_date < self.start_date:
+            raise ValueError('End date cannot be before start date')
+        today = timezone.now().date()
+        if self.start_date < today:
+            raise ValueError('Start date cannot be in the past')
+        # The queries are grouped over the whole range, a longer one costs no extra round trips
+        if self.end_date > today + timedelta(days=JourneyDateSerializer.MAX_DAYS_AHEAD):
+            raise ValueError(f'End date cannot be more than {JourneyDateSerializer.MAX_DAYS_AHEAD} days from today')
+
+        journey_dates = [
+            self.start_date + timedelta(days=days)
+            for days in range((self.end_date - self.start_date).days + 1)
+        ]
+        stop_pairs_queryset = StopPairSelectors.get_stop_pairs_between_stations_queryset(
+            source_station_code=self.source_station_code,
+            destination_station_code=self.destination_station_code,
+        )
+        stop_pairs_by_route_id = StopPairModelUtils.get_shortest_stop_pairs_by_route_id(
+            stop_pairs_queryset.values_list(*StopPairModelUtils.VALUES)
+        )
+
+        schedules_queryset = ScheduleSelectors.generate_queryset(
+            ScheduleSelectors.Options(
+                filters=dict(
+                    route_id__in=list(stop_pairs_by_route_id.keys()),
+                    weekday__in={self.__get_weekday(journey_date) for journey_date in journey_dates},
+                ),
+                order_by=['departure_time'],
+            )
+        )
+        schedules: list[Schedule] = list(schedules_queryset)
+        routes_by_id = RouteSelectors.get_cached_route_topologies(
+            route_ids=[schedule.route_id for schedule in schedules],
+        )
+
+        journey_stops_by_schedule_id: dict[int, tuple[Stop, Stop]] = {}
+        for schedule in schedules:
+            schedule.route = routes_by_id[schedule.route_id]
+            stops_by_id: dict[int, Stop] = {stop.id: stop for stop in schedule.route.stops_of_route.all()}
+            from_stop_id, to_stop_id = stop_pairs_by_route_id[schedule.route_id]
+            if from_stop_id in stops_by_id and to_stop_id in stops_by_id:
+                journey_stops_by_schedule_id[schedule.id] = (stops_by_id[from_stop_id], stops_by_id[to_stop_id])
+
+        stop_orders_by_schedule_id = {
+            schedule_id: (source_stop.order, destination_stop.order)
+            for schedule_id, (source_stop, destination_stop) in journey_stops_by_schedule_id.items()
+        }
+        confirmed_seats_by_schedule_run: dict[tuple[int, date], dict[str, int]] = {}
+        for max_confirmed_seats in SeatInventorySelectors.get_max_confirmed_seats_queryset(
+            stop_orders_by_schedule_id=stop_orders_by_schedule_id,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        ):
+            schedule_run = (max_confirmed_seats['schedule_id'], max_confirmed_seats['journey_date'])
+            confirmed_seats_by_schedule_run.setdefault(schedule_run, {})[max_confirmed_seats['type']] = max_confirmed_seats['confirmed']
+
+        waiting_seats_by_schedule_run: dict[tuple[int, date], int] = {
+            (waiting_count['schedule_id'], waiting_count['journey_date']): waiting_count['waiting']
+            for waiting_count in BookingSelectors.get_waiting_counts_queryset(
+                stop_orders_by_schedule_id=stop_orders_by_schedule_id,
+                start_date=self.start_date,
+                end_date=self.end_date,
+            )
+        }
+
+        calendar: list[JourneyCalendarService.DateAvailability] = []
+        for journey_date in journey_dates:
+            weekday = self.__get_weekday(journey_date)
+            journeys: list[JourneyCalendarService.JourneyAvailability] = []
+            for schedule in schedules:
+                if schedule.weekday != weekday or schedule.id not in journey_stops_by_schedule_id:
+                    continue
+
+                source_stop, destination_stop = journey_stops_by_schedule_id[schedule.id]
+                journey_details_service = JourneyDetailsService(
+                    input=JourneyDetailsService.Input(
+                        schedule=schedule,
+                        journey_date=journey_date,
+                        destination_stop=destination_stop,
+                        source_stop=source_stop,
+                    )
+                )
+
+                confirmed_seats = confirmed_seats_by_schedule_run.get((schedule.id, journey_date), {})
+                booking_window_details = journey_details_service.get_booking_window_details()
+                available_seats = journey_details_service.get_available_seats(
+                    JourneyDetailsService.SeatAvailability(
+                        general=confirmed_seats.get(BookingType.GENERAL.value, 0),
+                        tatkal=confirmed_seats.get(BookingType.TATKAL.value, 0),
+                    )
+                )
+
+                journeys.append(JourneyCalendarService.JourneyAvailability(
+                    schedule_id=schedule.id,
+                    train_name=schedule.route.train.name,
+                    train_number=schedule.route.train.number,
+                    departure_datetime=booking_window_details.departure_datetime,
+                    general_booking_open=booking_window_details.general_booking_open,
+                    tatkal_booking_open=booking_window_details.tatkal_booking_open,
+                    available_seats=available_seats,
+                    waiting_seats=JourneyDetailsService.SeatAvailability(
+                        general=waiting_seats_by_schedule_run.get((schedule.id, journey_date), 0),
+                        tatkal=0,
+                    ),
+                    pricing=journey_details_service.get_journey_details().pricing,
+                ))
+
+            calendar.append(JourneyCalendarService.DateAvailability(
+                journey_date=journey_date,
+                journeys=journeys,
+            ))
+
+        return calendar
+
+    def __get_weekday(self, journey_date: date) -> str:
+        return journey_date.strftime('%a').upper()[:3]
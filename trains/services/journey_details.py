@@ -6,7 +6,8 @@ from utils.enums import BookingType, BookingStatus
 from trains.model_utils import RouteModelUtils
 from trains.models import Schedule, Stop
 from rest_framework import serializers
-from bookings.models import Booking
+from bookings.model_utils import SeatInventoryModelUtils
+from bookings.models import SeatInventory
 
 
 class JourneyDetailsService:
@@ -102,9 +103,13 @@ class JourneyDetailsService:
         self.journey_details: JourneyDetailsService.GeneralDetails | None = None
         self.booking_window_details: JourneyDetailsService.BookingWindowDetails | None = None
 
-    def get_complete_details(self, journey_bookings: list[Booking]) -> 'JourneyDetailsService.CompleteDetails':
+    def get_complete_details(
+        self,
+        overlapping_booking_counts: dict[tuple[str, str], int],
+        seat_inventory: list[SeatInventory],
+    ) -> 'JourneyDetailsService.CompleteDetails':
         self.booking_window_details = self.get_booking_window_details()
-        self.seat_details = self.get_seat_details(journey_bookings)
+        self.seat_details = self.get_seat_details(overlapping_booking_counts, seat_inventory)
         self.journey_details = self.get_journey_details()
 
         return JourneyDetailsService.CompleteDetails(
@@ -113,7 +118,15 @@ class JourneyDetailsService:
             seat_details=self.seat_details,
         )
 
-    def get_seat_details(self, journey_bookings: list[Booking]) -> 'JourneyDetailsService.SeatDetails':
+    def get_seat_details(
+        self,
+        overlapping_booking_counts: dict[tuple[str, str], int],
+        seat_inventory: list[SeatInventory],
+    ) -> 'JourneyDetailsService.SeatDetails':
+        """
+        overlapping_booking_counts holds, per (type, status), the bookings whose
+        journey overlaps this one, see BookingModelUtils.get_overlapping_booking_counts.
+        """
         if self.seat_details:
             return self.seat_details
 
@@ -122,53 +135,16 @@ class JourneyDetailsService:
         tatkal_seats = self.schedule.route.tatkal_seats
         general_seats = self.schedule.route.general_seats
 
-        overlapping_bookings: list[Booking] = []
-        for booking in journey_bookings:
-            booking_to_order = booking.to_stop.order
-            booking_from_order = booking.from_stop.order
-            if max(self.source_stop.order, booking_from_order) < min(self.destination_stop.order, booking_to_order):
-                overlapping_bookings.append(booking)
-
-        waiting_general_seats = 0
-        confirmed_tatkal_seats = 0
-        confirmed_general_seats = 0
-        cancelled_general_seats = 0
-
-        for booking in overlapping_bookings:
-            if booking.type == BookingType.GENERAL.value:
-                if booking.status == BookingStatus.CONFIRMED.value:
-                    confirmed_general_seats += 1
-                elif booking.status == BookingStatus.WAITING.value:
-                    waiting_general_seats += 1
-                elif booking.status == BookingStatus.CANCELLED.value:
-                    cancelled_general_seats += 1
-            elif booking.type == BookingType.TATKAL.value:
-                if booking.status == BookingStatus.CONFIRMED.value:
-                    confirmed_tatkal_seats += 1
-
-        if self.booking_window_details.tatkal_booking_open:
-            available_tatkal_seats = (tatkal_seats - confirmed_tatkal_seats)
-            available_tatkal_seats += (general_seats - confirmed_general_seats)
-            available_general_seats = 0
-        elif self.booking_window_details.general_booking_open:
-            available_tatkal_seats = 0
-            available_general_seats = (general_seats - confirmed_general_seats)
-        else:
-            available_tatkal_seats = 0
-            available_general_seats = 0
+        waiting_general_seats = overlapping_booking_counts.get((BookingType.GENERAL.value, BookingStatus.WAITING.value), 0)
+        cancelled_general_seats = overlapping_booking_counts.get((BookingType.GENERAL.value, BookingStatus.CANCELLED.value), 0)
+
+        confirmed_seats = self.get_confirmed_seats(seat_inventory)
+        available_seats = self.get_available_seats(confirmed_seats)
 
         seats = JourneyDetailsService.SeatAvailability(
             general=general_seats,
             tatkal=tatkal_seats,
         )
-        available_seats = JourneyDetailsService.SeatAvailability(
-            general=available_general_seats,
-            tatkal=available_tatkal_seats,
-        )
-        confirmed_seats = JourneyDetailsService.SeatAvailability(
-            general=confirmed_general_seats,
-            tatkal=confirmed_tatkal_seats,
-        )
         cancelled_seats = JourneyDetailsService.SeatAvailability(
             general=cancelled_general_seats,
             tatkal=0,
@@ -189,6 +165,42 @@ class JourneyDetailsService:
 
         return self.seat_details
 
+    def get_confirmed_seats(self, seat_inventory: list[SeatInventory]) -> 'JourneyDetailsService.SeatAvailability':
+        max_confirmed_seats = SeatInventoryModelUtils.get_max_confirmed_seats(
+            seat_inventory=seat_inventory,
+            from_order=self.source_stop.order,
+            to_order=self.destination_stop.order,
+        )
+
+        return JourneyDetailsService.SeatAvailability(
+            general=max_confirmed_seats[BookingType.GENERAL.value],
+            tatkal=max_confirmed_seats[BookingType.TATKAL.value],
+        )
+
+    def get_available_seats(
+        self,
+        confirmed_seats: 'JourneyDetailsService.SeatAvailability',
+    ) -> 'JourneyDetailsService.SeatAvailability':
+        booking_window_details = self.get_booking_window_details()
+        tatkal_seats = self.schedule.route.tatkal_seats
+        general_seats = self.schedule.route.general_seats
+
+        if booking_window_details.tatkal_booking_open:
+            available_tatkal_seats = (tatkal_seats - confirmed_seats.tatkal)
+            available_tatkal_seats += (general_seats - confirmed_seats.general)
+            available_general_seats = 0
+        elif booking_window_details.general_booking_open:
+            available_tatkal_seats = 0
+            available_general_seats = (general_seats - confirmed_seats.general)
+        else:
+            available_tatkal_seats = 0
+            available_general_seats = 0
+
+        return JourneyDetailsService.SeatAvailability(
+            general=available_general_seats,
+            tatkal=available_tatkal_seats,
+        )
+
     def get_booking_window_details(self) -> 'JourneyDetailsService.BookingWindowDetails':
         if self.booking_window_details:
             return self.booking_window_details
@@ -1,11 +1,23 @@
+import asyncio
 from typing import Optional
 from datetime import date
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from operator import attrgetter
+from dataclasses import asdict
+from rest_framework import serializers
+from django.conf import settings
+from django.core.cache import cache
 from trains.models import Stop
+from trains.model_utils import StopPairModelUtils
 from dataclasses import dataclass
-from bookings.models import Booking
+from bookings.models import SeatInventory
+from bookings.model_utils import BookingModelUtils, SeatInventoryModelUtils
+from bookings.selectors import SeatInventorySelectors
 from dataclasses_json import dataclass_json
-from django.contrib.auth.models import User
-from trains.selectors import ScheduleSelectors, BookingSelectors, StopSelectors
+from utils.enums import BookingStatus
+from utils.cache import CacheUtils
+from trains.selectors import ScheduleSelectors, BookingSelectors, StopSelectors, StopPairSelectors, RouteSelectors
 from trains.serializers import RouteSerializers, StopSerializers, ScheduleSerializers
 from trains.services.journey_details import JourneyDetailsService
 from trains.models import Schedule, Route, Station, Train
@@ -34,19 +46,11 @@ class JourneySearchService:
         class Meta:
             abstract = True
         
-    class BookingOutputModel(Booking):
-        user: User
-        to_stop: Stop
-        from_stop: Stop
-        class Meta:
-            abstract = True
-
     class ScheduleOutputModel(Schedule):
         route: 'JourneySearchService.RouteOutputModel'
         stops: list['JourneySearchService.StopOutputModel']
         source_stop: 'JourneySearchService.StopOutputModel'
         destination_stop: 'JourneySearchService.StopOutputModel'
-        bookings_of_schedule: list['JourneySearchService.BookingOutputModel']
         booking_window_details: JourneyDetailsService.BookingWindowDetails
         general_details: JourneyDetailsService.GeneralDetails
         class Meta:
@@ -61,6 +65,61 @@ class JourneySearchService:
         general_details = JourneyDetailsService.GeneralDetailsSerializer()
         seat_details = JourneyDetailsService.SeatDetailsSerializer()
 
+    class CompactOutputSerializer(serializers.Serializer):
+        """
+        Plain dicts built with precompiled attribute getters, without the stop
+        list, metadata and timestamps the model serializers emit.
+        """
+        get_stop_values = attrgetter(
+            'id', 'order', 'arrival_minutes_from_source', 'departure_minutes_from_source', 'distance_kms_from_source',
+        )
+        get_station_values = attrgetter('id', 'code', 'name', 'city')
+
+        def to_representation(self, instance: 'JourneySearchService.ScheduleOutputModel'):
+            route = instance.route
+            train = route.train
+            return {
+                'id': instance.id,
+                'weekday': instance.weekday,
+                'departure_time': instance.departure_time.isoformat(),
+                'arrival_time': instance.arrival_time.isoformat(),
+                'route': {
+                    'id': route.id,
+                    'name': route.name,
+                    'pricing': route.pricing,
+                    'seats': route.seats,
+                    'train': {'id': train.id, 'name': train.name, 'number': train.number},
+                },
+                'source_stop': self.get_stop(instance.source_stop),
+                'destination_stop': self.get_stop(instance.destination_stop),
+                'booking_window_details': asdict(instance.booking_window_details),
+                'general_details': asdict(instance.general_details),
+                'seat_details': asdict(instance.seat_details),
+            }
+
+        def get_stop(self, stop: Stop) -> dict:
+            id, order, arrival_minutes_from_source, departure_minutes_from_source, distance_kms_from_source = self.get_stop_values(stop)
+            station_id, station_code, station_name, station_city = self.get_station_values(stop.station)
+            return {
+                'id': id,
+                'order': order,
+                'arrival_minutes_from_source': arrival_minutes_from_source,
+                'departure_minutes_from_source': departure_minutes_from_source,
+                'distance_kms_from_source': distance_kms_from_source,
+                'station': {'id': station_id, 'code': station_code, 'name': station_name, 'city': station_city},
+            }
+
+    OUTPUT_FIELDS = (
+        'id', 'deleted', 'created_at', 'updated_at', 'metadata', 'weekday', 'departure_time', 'arrival_time',
+        'route', 'source_stop', 'destination_stop', 'stops', 'booking_window_details', 'general_details', 'seat_details',
+    )
+    COMPACT_OUTPUT_FIELDS = (
+        'id', 'weekday', 'departure_time', 'arrival_time',
+        'route', 'source_stop', 'destination_stop', 'booking_window_details', 'general_details', 'seat_details',
+    )
+
+    result_cache_metrics = CacheUtils.CacheMetrics(namespace='journey_search')
+
     def __init__(self, input: 'JourneySearchService.Input'):
         self.journey_date = input.journey_date
         self.source_station_code = input.source_station_code
@@ -68,44 +127,166 @@ class JourneySearchService:
         self.schedule_query_options = input.schedule_query_options
         self.booking_query_options = input.booking_query_options
         self.stop_query_options = input.stop_query_options
+        self.inventory_versions: dict[int, str] = {}
 
     def search_journeys(self, journey_date: date | None = None) -> list[ScheduleOutputModel]:
         new_journey_date = journey_date or self.journey_date
+        stop_pairs_by_route_id = self.get_stop_pairs_by_route_id()
+
+        # Copied so the caller's options don't pick up this search's route filter
+        schedule_query_options = self.schedule_query_options.copy() if self.schedule_query_options else ScheduleSelectors.Options()
+        schedule_query_options.add_filter('route_id__in', list(stop_pairs_by_route_id.keys()))
+        # Custom stop filters can't be served from the shared topology cache.
+        use_route_topology_cache = self.stop_query_options is None
         schedules_queryset = ScheduleSelectors.get_schedule_complete_details_queryset(
-            query_options=self.schedule_query_options,
+            query_options=schedule_query_options,
             booking_query_options=self.booking_query_options,
             stop_query_options=self.stop_query_options,
             journey_date=new_journey_date,
+            prefetch_route=not use_route_topology_cache,
+            prefetch_bookings=False,
+        )
+
+        schedules: list[Schedule] = list(schedules_queryset)
+        if use_route_topology_cache:
+            routes_by_id = RouteSelectors.get_cached_route_topologies(
+                route_ids=[schedule.route_id for schedule in schedules],
+            )
+            for schedule in schedules:
+                schedule.route = routes_by_id[schedule.route_id]
+
+        valid_schedules = self.get_valid_schedules(schedules, stop_pairs_by_route_id)
+
+        valid_schedule_ids = [schedule.id for schedule in valid_schedules]
+        # Versions are read before the bookings and inventory, so a result built
+        # from them is never stored under a version newer than its data.
+        self.inventory_versions = SeatInventorySelectors.get_inventory_versions(
+            schedule_ids=valid_schedule_ids,
+            journey_date=new_journey_date,
+        )
+        overlapping_booking_counts_by_schedule_id = self.get_overlapping_booking_counts_by_schedule_id(
+            schedules=valid_schedules,
+            journey_date=new_journey_date,
+        )
+        seat_inventory_by_schedule_id = SeatInventoryModelUtils.group_by_schedule_id(
+            seat_inventory=SeatInventorySelectors.get_seat_inventory_queryset(
+                schedule_ids=valid_schedule_ids,
+                journey_date=new_journey_date,
+            ),
+            schedule_ids=valid_schedule_ids,
+        )
+
+        self.set_journey_details(
+            schedules=valid_schedules,
+            journey_date=new_journey_date,
+            overlapping_booking_counts_by_schedule_id=overlapping_booking_counts_by_schedule_id,
+            seat_inventory_by_schedule_id=seat_inventory_by_schedule_id,
+        )
+        return valid_schedules
+
+    async def asearch_journeys(self, journey_date: date | None = None) -> list[ScheduleOutputModel]:
+        """
+        search_journeys on the async ORM. Cache lookups are awaited together
+        with the reads they don't depend on, custom stop filters fall back to
+        the sync path as they bypass the topology cache.
+        """
+        if self.stop_query_options is not None:
+            return await sync_to_async(self.search_journeys)(journey_date)
+
+        new_journey_date = journey_date or self.journey_date
+        stop_pairs_queryset = StopPairSelectors.get_stop_pairs_between_stations_queryset(
+            source_station_code=self.source_station_code,
+            destination_station_code=self.destination_station_code,
+        )
+        stop_pairs_by_route_id = StopPairModelUtils.get_shortest_stop_pairs_by_route_id([
+            stop_pair_values
+            async for stop_pair_values in stop_pairs_queryset.values_list(*StopPairModelUtils.VALUES)
+        ])
+
+        schedule_query_options = self.schedule_query_options.copy() if self.schedule_query_options else ScheduleSelectors.Options()
+        schedule_query_options.add_filter('route_id__in', list(stop_pairs_by_route_id.keys()))
+        schedules_queryset = ScheduleSelectors.get_schedule_complete_details_queryset(
+            query_options=schedule_query_options,
+            journey_date=new_journey_date,
+            prefetch_route=False,
+            prefetch_bookings=False,
+        )
+        schedules: list[Schedule] = [schedule async for schedule in schedules_queryset.aiterator()]
+
+        # Versions are read before the bookings and inventory, as in search_journeys.
+        routes_by_id, inventory_versions = await asyncio.gather(
+            sync_to_async(RouteSelectors.get_cached_route_topologies)(
+                route_ids=[schedule.route_id for schedule in schedules],
+            ),
+            sync_to_async(SeatInventorySelectors.get_inventory_versions, thread_sensitive=False)(
+                schedule_ids=[schedule.id for schedule in schedules],
+                journey_date=new_journey_date,
+            ),
+        )
+        for schedule in schedules:
+            schedule.route = routes_by_id[schedule.route_id]
+
+        valid_schedules = self.get_valid_schedules(schedules, stop_pairs_by_route_id)
+        valid_schedule_ids = [schedule.id for schedule in valid_schedules]
+        self.inventory_versions = {
+            schedule_id: inventory_versions[schedule_id]
+            for schedule_id in valid_schedule_ids
+        }
+
+        overlapping_booking_counts_by_schedule_id, seat_inventory = await asyncio.gather(
+            sync_to_async(self.get_overlapping_booking_counts_by_schedule_id)(
+                schedules=valid_schedules,
+                journey_date=new_journey_date,
+            ),
+            self.__alist(SeatInventorySelectors.get_seat_inventory_queryset(
+                schedule_ids=valid_schedule_ids,
+                journey_date=new_journey_date,
+            )),
+        )
+        self.set_journey_details(
+            schedules=valid_schedules,
+            journey_date=new_journey_date,
+            overlapping_booking_counts_by_schedule_id=overlapping_booking_counts_by_schedule_id,
+            seat_inventory_by_schedule_id=SeatInventoryModelUtils.group_by_schedule_id(
+                seat_inventory=seat_inventory,
+                schedule_ids=valid_schedule_ids,
+            ),
         )
 
-        valid_schedules: list[JourneySearchService.Output] = []
-        for schedule in schedules_queryset:
+        return valid_schedules
+
+    def get_valid_schedules(
+        self,
+        schedules: list[Schedule],
+        stop_pairs_by_route_id: dict[int, tuple[int, int]],
+    ) -> list[Schedule]:
+        valid_schedules: list[Schedule] = []
+        for schedule in schedules:
             route = schedule.route
             stops_of_route: list[Stop] = list(route.stops_of_route.all())
-            bookings_of_schedule: list[Booking] = list(schedule.bookings_of_schedule.all())
-
-            destination_stop: Stop = None
-            source_stop: Stop = None
-
-            for stop in stops_of_route:
-                if stop.station.code == self.source_station_code:
-                    source_stop = stop
-                elif stop.station.code == self.destination_station_code:
-                    destination_stop = stop
-
-            if (
-                source_stop and
-                destination_stop and
-                source_stop.order < destination_stop.order
-            ):
+            stops_by_id: dict[int, Stop] = {stop.id: stop for stop in stops_of_route}
+
+            from_stop_id, to_stop_id = stop_pairs_by_route_id[route.id]
+            source_stop: Stop = stops_by_id.get(from_stop_id)
+            destination_stop: Stop = stops_by_id.get(to_stop_id)
+
+            if source_stop and destination_stop:
                 setattr(schedule, 'source_stop', source_stop)
                 setattr(schedule, 'destination_stop', destination_stop)
                 valid_schedules.append(schedule)
 
-        for schedule in valid_schedules:
+        return valid_schedules
+
+    def set_journey_details(
+        self,
+        schedules: list[Schedule],
+        journey_date: date,
+        overlapping_booking_counts_by_schedule_id: dict[int, dict[tuple[str, str], int]],
+        seat_inventory_by_schedule_id: dict[int, list[SeatInventory]],
+    ) -> None:
+        for schedule in schedules:
             route = schedule.route
             stops_of_route: list[Stop] = list(route.stops_of_route.all())
-            bookings_of_schedule: list[Booking] = list(schedule.bookings_of_schedule.all())
 
             source_stop: Stop = getattr(schedule, 'source_stop')
             destination_stop: Stop = getattr(schedule, 'destination_stop')
@@ -113,16 +294,174 @@ class JourneySearchService:
             journey_details_service = JourneyDetailsService(
                 input=JourneyDetailsService.Input(
                     schedule=schedule,
-                    journey_date=new_journey_date,
+                    journey_date=journey_date,
                     destination_stop=destination_stop,
                     source_stop=source_stop,
                 )
             )
 
-            complete_details = journey_details_service.get_complete_details(journey_bookings=bookings_of_schedule)
+            complete_details = journey_details_service.get_complete_details(
+                overlapping_booking_counts=overlapping_booking_counts_by_schedule_id[schedule.id],
+                seat_inventory=seat_inventory_by_schedule_id[schedule.id],
+            )
             setattr(schedule, 'booking_window_details', complete_details.booking_window_details)
             setattr(schedule, 'general_details', complete_details.general_details)
             setattr(schedule, 'seat_details', complete_details.seat_details)
             setattr(schedule, 'stops', stops_of_route)
 
-        return valid_schedules
+    def get_overlapping_booking_counts_by_schedule_id(
+        self,
+        schedules: list[Schedule],
+        journey_date: date,
+    ) -> dict[int, dict[tuple[str, str], int]]:
+        # Confirmed seats come from the inventory, only waiting and cancelled
+        # bookings are counted, for every schedule at once.
+        stop_orders_by_schedule_id = {
+            schedule.id: (getattr(schedule, 'source_stop').order, getattr(schedule, 'destination_stop').order)
+            for schedule in schedules
+        }
+        statuses = [BookingStatus.WAITING.value, BookingStatus.CANCELLED.value]
+
+        if settings.SEAT_COUNTS_IN_SQL:
+            return BookingModelUtils.group_booking_counts_by_schedule_id(
+                booking_counts=BookingSelectors.get_overlapping_booking_counts_queryset(
+                    stop_orders_by_schedule_id=stop_orders_by_schedule_id,
+                    journey_date=journey_date,
+                    statuses=statuses,
+                    query_options=self.booking_query_options,
+                ),
+                schedule_ids=list(stop_orders_by_schedule_id.keys()),
+            )
+
+        return BookingModelUtils.get_overlapping_booking_counts(
+            booking_rows=list(BookingSelectors.get_overlap_rows_queryset(
+                schedule_ids=list(stop_orders_by_schedule_id.keys()),
+                journey_date=journey_date,
+                statuses=statuses,
+                query_options=self.booking_query_options,
+            )),
+            stop_orders_by_schedule_id=stop_orders_by_schedule_id,
+        )
+
+    def get_serialized_journeys(
+        self,
+        compact: bool = False,
+        fields: list[str] | None = None,
+    ) -> tuple[list[dict], bool]:
+        """
+        Serialized search result and whether it came from the result cache.
+        A cached result is served while the timetable and the inventory
+        version of every listed schedule run are unchanged, and never once
+        it is older than JOURNEY_SEARCH_CACHE_TIMEOUT seconds, which also
+        bounds how late the booking window flags flip.
+        Compact output skips the stop list, fields keeps only the given keys.
+        """
+        serialized_data, cache_hit = self.get_serialized_journeys_of_mode(compact=compact)
+        if fields:
+            serialized_data = [
+                {field: journey[field] for field in fields if field in journey}
+                for journey in serialized_data
+            ]
+        return serialized_data, cache_hit
+
+    def get_serialized_journeys_of_mode(self, compact: bool) -> tuple[list[dict], bool]:
+        output_serializer_class = self.get_output_serializer_class(compact)
+        if self.schedule_query_options or self.booking_query_options or self.stop_query_options:
+            journey_schedules = self.search_journeys()
+            return output_serializer_class(journey_schedules, many=True).data, False
+
+        result_cache_key = self.get_result_cache_key(compact, ScheduleSelectors.get_timetable_version())
+        cached_result = cache.get(result_cache_key)
+        if cached_result:
+            inventory_versions = SeatInventorySelectors.get_inventory_versions(
+                schedule_ids=list(cached_result['inventory_versions'].keys()),
+                journey_date=self.journey_date,
+            )
+            if inventory_versions == cached_result['inventory_versions']:
+                JourneySearchService.result_cache_metrics.record_hit()
+                return cached_result['result'], True
+
+        JourneySearchService.result_cache_metrics.record_miss()
+        journey_schedules = self.search_journeys()
+        serialized_data = output_serializer_class(journey_schedules, many=True).data
+        cache.set(result_cache_key, {
+            'inventory_versions': self.inventory_versions,
+            'result': [dict(journey_schedule) for journey_schedule in serialized_data],
+        }, timeout=settings.JOURNEY_SEARCH_CACHE_TIMEOUT)
+        return serialized_data, False
+
+    async def aget_serialized_journeys(
+        self,
+        compact: bool = False,
+        fields: list[str] | None = None,
+    ) -> tuple[list[dict], bool]:
+        """
+        get_serialized_journeys for async views, sharing the same result cache.
+        """
+        serialized_data, cache_hit = await self.aget_serialized_journeys_of_mode(compact=compact)
+        if fields:
+            serialized_data = [
+                {field: journey[field] for field in fields if field in journey}
+                for journey in serialized_data
+            ]
+        return serialized_data, cache_hit
+
+    async def aget_serialized_journeys_of_mode(self, compact: bool) -> tuple[list[dict], bool]:
+        output_serializer_class = self.get_output_serializer_class(compact)
+        if self.schedule_query_options or self.booking_query_options or self.stop_query_options:
+            journey_schedules = await self.asearch_journeys()
+            return output_serializer_class(journey_schedules, many=True).data, False
+
+        timetable_version = await sync_to_async(ScheduleSelectors.get_timetable_version, thread_sensitive=False)()
+        result_cache_key = self.get_result_cache_key(compact, timetable_version)
+        cached_result = await cache.aget(result_cache_key)
+        if cached_result:
+            inventory_versions = await sync_to_async(SeatInventorySelectors.get_inventory_versions, thread_sensitive=False)(
+                schedule_ids=list(cached_result['inventory_versions'].keys()),
+                journey_date=self.journey_date,
+            )
+            if inventory_versions == cached_result['inventory_versions']:
+                await sync_to_async(JourneySearchService.result_cache_metrics.record_hit, thread_sensitive=False)()
+                return cached_result['result'], True
+
+        await sync_to_async(JourneySearchService.result_cache_metrics.record_miss, thread_sensitive=False)()
+        journey_schedules = await self.asearch_journeys()
+        serialized_data = output_serializer_class(journey_schedules, many=True).data
+        await cache.aset(result_cache_key, {
+            'inventory_versions': self.inventory_versions,
+            'result': [dict(journey_schedule) for journey_schedule in serialized_data],
+        }, timeout=settings.JOURNEY_SEARCH_CACHE_TIMEOUT)
+        return serialized_data, False
+
+    @staticmethod
+    def get_output_fields(compact: bool) -> tuple[str, ...]:
+        if compact:
+            return JourneySearchService.COMPACT_OUTPUT_FIELDS
+        return JourneySearchService.OUTPUT_FIELDS
+
+    def get_output_serializer_class(self, compact: bool) -> type[serializers.Serializer]:
+        if compact:
+            return JourneySearchService.CompactOutputSerializer
+        return JourneySearchService.OutputSerializer
+
+    def get_result_cache_key(self, compact: bool, timetable_version: str) -> str:
+        return ':'.join([
+            'journey_search:result' if not compact else 'journey_search:compact_result',
+            self.source_station_code,
+            self.destination_station_code,
+            self.journey_date.isoformat(),
+            timetable_version,
+        ])
+
+    def get_stop_pairs_by_route_id(self) -> dict[int, tuple[int, int]]:
+        stop_pairs_queryset = StopPairSelectors.get_stop_pairs_between_stations_queryset(
+            source_station_code=self.source_station_code,
+            destination_station_code=self.destination_station_code,
+        )
+
+        return StopPairModelUtils.get_shortest_stop_pairs_by_route_id(
+            stop_pairs_queryset.values_list(*StopPairModelUtils.VALUES)
+        )
+
+    async def __alist(self, queryset: QuerySet) -> list:
+        return [instance async for instance in queryset.aiterator()]
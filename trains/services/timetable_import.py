@@ -0,0 +1,395 @@
+import csv
+import json
+import time
+from itertools import islice
+from datetime import time as time_of_day
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator
+from django.db import transaction
+from dataclasses_json import dataclass_json
+from trains.models import Train, Route, Stop, StopPair, Station, Schedule
+from trains.model_utils import RouteModelUtils, ScheduleModelUtils
+from trains.selectors import RouteSelectors, ScheduleSelectors
+from trains.services.train import TrainService
+from utils.enums import BookingType, Weekday
+from utils.intervals import IntervalUtils
+
+
+class TimetableImportService:
+    """
+    Imports whole timetables. Every record holds one route of one train, in
+    the shape TrainView.post accepts: {"number", "name", "route": {"name",
+    "seats", "pricing", "stops", "schedules"}}. Records are validated without
+    queries, and each batch is written with bulk_create in its own transaction.
+    """
+
+    MAX_REPORTED_ERRORS = 100
+    WEEKDAYS = frozenset(weekday.value for weekday in Weekday)
+
+    @dataclass_json
+    @dataclass
+    class Input:
+        batch_size: int = 500
+
+    @dataclass
+    class Report:
+        records: int = 0
+        skipped: int = 0
+        trains: int = 0
+        routes: int = 0
+        stops: int = 0
+        stop_pairs: int = 0
+        schedules: int = 0
+        elapsed_seconds: float = 0.0
+        errors: list[str] = field(default_factory=list)
+
+        @property
+        def rows(self) -> int:
+            return self.trains + self.routes + self.stops + self.stop_pairs + self.schedules
+
+        @property
+        def rows_per_second(self) -> float:
+            return self.rows / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+        def to_dict(self) -> dict:
+            return {
+                'records': self.records,
+                'skipped': self.skipped,
+                'trains': self.trains,
+                'routes': self.routes,
+                'stops': self.stops,
+                'stop_pairs': self.stop_pairs,
+                'schedules': self.schedules,
+                'rows': self.rows,
+                'elapsed_seconds': round(self.elapsed_seconds, 3),
+                'rows_per_second': round(self.rows_per_second, 1),
+                'errors': self.errors,
+            }
+
+    def __init__(self, input: 'TimetableImportService.Input'):
+        self.batch_size = input.batch_size
+        self.report = TimetableImportService.Report()
+        self.stations_by_code: dict[str, Station] = {}
+        self.trains_by_number: dict[str, Train] = {}
+        # Every schedule of the trains seen so far, existing and imported,
+        # on the week timeline. Payloads are schedule value dicts.
+        self.schedule_indexes_by_train_number: dict[str, IntervalUtils.WeekIntervalIndex] = {}
+
+    @staticmethod
+    def read_jsonl(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f'Line {line_number} is not valid JSON: {e}')
+
+    @staticmethod
+    def read_csv(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+        """
+        Reads one stop per row, the rows of one route next to each other:
+        number, name, route_name, general_seats, tatkal_seats, general_price,
+        tatkal_price, weekdays, departure_time, arrival_time, order,
+        station_code, distance_kms_from_source, arrival_minutes_from_source,
+        departure_minutes_from_source. The route and schedule columns are read
+        from the first row of each route, weekdays separated by "|".
+        """
+        reader = csv.DictReader(stream)
+        line_number, record = 0, None
+        for row in reader:
+            key = (row['number'], row['route_name'])
+            if record is None or key != (record['number'], record['route']['name']):
+                if record is not None:
+                    yield line_number, record
+                line_number = reader.line_num
+                record = {
+                    'number': row['number'],
+                    'name': row['name'],
+                    'route': {
+                        'name': row['route_name'],
+                        'seats': {
+                            BookingType.GENERAL.value: row['general_seats'],
+                            BookingType.TATKAL.value: row['tatkal_seats'],
+                        },
+                        'pricing': {
+                            BookingType.GENERAL.value: row['general_price'],
+                            BookingType.TATKAL.value: row['tatkal_price'],
+                        },
+                        'stops': [],
+                        'schedules': [
+                            {
+                                'weekday': weekday.strip(),
+                                'departure_time': row['departure_time'],
+                                'arrival_time': row['arrival_time'],
+                            }
+                            for weekday in row['weekdays'].split('|') if weekday.strip()
+                        ],
+                    },
+                }
+            record['route']['stops'].append({
+                'order': row['order'],
+                'station_code': row['station_code'],
+                'distance_kms_from_source': row['distance_kms_from_source'],
+                'arrival_minutes_from_source': row['arrival_minutes_from_source'],
+                'departure_minutes_from_source': row['departure_minutes_from_source'],
+            })
+        if record is not None:
+            yield line_number, record
+
+    def import_records(self, records: Iterable[tuple[int, dict]]) -> 'TimetableImportService.Report':
+        started_at = time.perf_counter()
+        self.stations_by_code = {station.code: station for station in Station.objects.all()}
+
+        records = iter(records)
+        while batch := list(islice(records, self.batch_size)):
+            self.__import_batch(batch)
+
+        self.report.elapsed_seconds = time.perf_counter() - started_at
+        return self.report
+
+    def __import_batch(self, batch: list[tuple[int, dict]]) -> None:
+        train_inputs: list[tuple[int, TrainService.CreateTrainInput]] = []
+        for record_number, record in batch:
+            self.report.records += 1
+            try:
+                train_inputs.append((record_number, self.__parse_record(record)))
+            except KeyError as e:
+                self.__skip(record_number, f'Missing field {e}')
+            except (ValueError, TypeError, AttributeError) as e:
+                self.__skip(record_number, str(e))
+
+        with transaction.atomic():
+            self.__load_trains(train_inputs=[train_input for _, train_input in train_inputs])
+
+            valid_train_inputs: list[TrainService.CreateTrainInput] = []
+            for record_number, train_input in train_inputs:
+                try:
+                    self.__add_schedules_of_train(train_input)
+                except ValueError as e:
+                    self.__skip(record_number, str(e))
+                    continue
+                valid_train_inputs.append(train_input)
+            if not valid_train_inputs:
+                return
+
+            self.__create_missing_trains(train_inputs=valid_train_inputs)
+            route_inputs: list[tuple[Train, TrainService.CreateRouteInput]] = [
+                (self.trains_by_number[train_input.number], train_input.route)
+                for train_input in valid_train_inputs
+            ]
+
+            routes = Route.objects.bulk_create([
+                Route(
+                    train=train,
+                    name=route_input.name,
+                    seats=route_input.seats,
+                    pricing=route_input.pricing,
+                )
+                for train, route_input in route_inputs
+            ], batch_size=self.batch_size)
+
+            stops_by_route: list[tuple[Route, list[Stop]]] = []
+            bulk_stops: list[Stop] = []
+            bulk_schedules: list[Schedule] = []
+            for route, (_, route_input) in zip(routes, route_inputs):
+                stops_of_route = [
+                    Stop(
+                        route=route,
+                        order=stop.order,
+                        station=stop.station,
+                        distance_kms_from_source=stop.distance_kms_from_source,
+                        arrival_minutes_from_source=stop.arrival_minutes_from_source,
+                        departure_minutes_from_source=stop.departure_minutes_from_source,
+                    )
+                    for stop in route_input.stops
+                ]
+                stops_by_route.append((route, stops_of_route))
+                bulk_stops.extend(stops_of_route)
+                bulk_schedules.extend(
+                    Schedule(
+                        route=route,
+                        weekday=schedule.weekday,
+                        arrival_time=schedule.arrival_time,
+                        departure_time=schedule.departure_time,
+                    )
+                    for schedule in route_input.schedules
+                )
+            Stop.objects.bulk_create(bulk_stops, batch_size=self.batch_size)
+
+            bulk_stop_pairs: list[StopPair] = []
+            for route, stops_of_route in stops_by_route:
+                bulk_stop_pairs.extend(RouteModelUtils.get_stop_pairs(route=route, stops_of_route=stops_of_route))
+            StopPair.objects.bulk_create(bulk_stop_pairs, batch_size=self.batch_size)
+            Schedule.objects.bulk_create(bulk_schedules, batch_size=self.batch_size)
+
+            route_ids = [route.id for route in routes]
+            transaction.on_commit(lambda: RouteSelectors.topology_cache.invalidate(route_ids))
+            transaction.on_commit(lambda: ScheduleSelectors.timetable_versions.bump(['all']))
+
+        self.report.routes += len(routes)
+        self.report.stops += len(bulk_stops)
+        self.report.stop_pairs += len(bulk_stop_pairs)
+        self.report.schedules += len(bulk_schedules)
+
+    def __load_trains(
+        self,
+        train_inputs: list['TrainService.CreateTrainInput'],
+    ) -> None:
+        """
+        Fetches the trains of the batch not seen yet and their schedules,
+        in one query each.
+        """
+        new_numbers = {train_input.number for train_input in train_inputs} - self.schedule_indexes_by_train_number.keys()
+        if not new_numbers:
+            return
+
+        # Numbers stay taken by retired trains
+        for train in Train.all_objects.filter(number__in=new_numbers):
+            self.trains_by_number[train.number] = train
+        schedules_by_train_number: dict[str, list[dict]] = {number: [] for number in new_numbers}
+        for schedule in ScheduleSelectors.get_week_intervals_queryset(
+            ScheduleSelectors.Options(filters={'route__train__number__in': new_numbers})
+        ):
+            schedules_by_train_number[schedule['route__train__number']].append(schedule)
+        for number, schedules in schedules_by_train_number.items():
+            self.schedule_indexes_by_train_number[number] = ScheduleModelUtils.get_week_interval_index(schedules)
+
+    def __create_missing_trains(
+        self,
+        train_inputs: list['TrainService.CreateTrainInput'],
+    ) -> None:
+        names_by_number = {}
+        for train_input in train_inputs:
+            if train_input.number not in self.trains_by_number:
+                names_by_number.setdefault(train_input.number, train_input.name)
+        if not names_by_number:
+            return
+
+        missing_trains = Train.objects.bulk_create([
+            Train(number=number, name=name)
+            for number, name in names_by_number.items()
+        ], batch_size=self.batch_size)
+        for train in missing_trains:
+            self.trains_by_number[train.number] = train
+        self.report.trains += len(missing_trains)
+
+    def __add_schedules_of_train(self, train_input: 'TrainService.CreateTrainInput') -> None:
+        train = self.trains_by_number.get(train_input.number)
+        if train is not None and train.deleted:
+            raise ValueError(f'Train {train_input.number} is retired')
+
+        schedule_index = self.schedule_indexes_by_train_number[train_input.number]
+        journey_minutes = RouteModelUtils.get_total_duration_minutes(stops_of_route=train_input.route.stops)
+        new_schedules = [
+            dict(
+                weekday=schedule.weekday,
+                departure_time=schedule.departure_time,
+                arrival_time=schedule.arrival_time,
+                route__name=train_input.route.name,
+                journey_minutes=journey_minutes,
+            )
+            for schedule in train_input.route.schedules
+        ]
+        new_intervals = [
+            (
+                *ScheduleModelUtils.get_week_interval(
+                    weekday=schedule['weekday'],
+                    departure_time=schedule['departure_time'],
+                    arrival_time=schedule['arrival_time'],
+                    journey_minutes=journey_minutes,
+                ),
+                schedule,
+            )
+            for schedule in new_schedules
+        ]
+
+        conflicts = schedule_index.find_conflicts(new_intervals)
+        if conflicts:
+            schedule, existing = conflicts[0]
+            raise ValueError(
+                f"Schedule conflict for train {train_input.number} on {schedule['weekday']}: "
+                f"({schedule['departure_time']}-{schedule['arrival_time']}) overlaps with route "
+                f"'{existing['route__name']}' on {existing['weekday']} "
+                f"({existing['departure_time']}-{existing['arrival_time']})"
+            )
+        schedule_index.add_many(new_intervals)
+
+    def __parse_record(self, record: dict) -> 'TrainService.CreateTrainInput':
+        """
+        Applies the checks of TrainView.TrainPostInputSerializer with plain
+        dict lookups, raising ValueError on the first invalid field.
+        """
+        number = str(record['number']).strip()
+        name = str(record['name']).strip()
+        route = record['route']
+        route_name = str(route['name']).strip()
+        if not number or not name or not route_name:
+            raise ValueError('Train number, train name and route name are required')
+
+        seats = {booking_type: int(route['seats'][booking_type]) for booking_type in route['seats']}
+        pricing = {booking_type: float(route['pricing'][booking_type]) for booking_type in route['pricing']}
+        for booking_type in (BookingType.GENERAL.value, BookingType.TATKAL.value):
+            if not seats.get(booking_type) or not pricing.get(booking_type):
+                raise ValueError('Seats and pricing must have general and tatkal keys')
+
+        stops = [
+            TrainService.CreateStopInput(
+                order=int(stop['order']),
+                station=None,
+                station_code=str(stop['station_code']).strip(),
+                distance_kms_from_source=float(stop['distance_kms_from_source']),
+                arrival_minutes_from_source=int(stop['arrival_minutes_from_source']),
+                departure_minutes_from_source=int(stop['departure_minutes_from_source']),
+            )
+            for stop in route['stops']
+        ]
+        if len(stops) < 2:
+            raise ValueError('At least 2 stations are required')
+
+        previous_order = None
+        for stop in sorted(stops, key=lambda x: x.departure_minutes_from_source):
+            if stop.arrival_minutes_from_source >= stop.departure_minutes_from_source:
+                raise ValueError('Stop arrival minutes must be less than departure minutes')
+            if min(stop.order, stop.distance_kms_from_source, stop.arrival_minutes_from_source) < 0:
+                raise ValueError('Stop order, distance and minutes must be greater than 0')
+            if previous_order is not None and stop.order <= previous_order:
+                raise ValueError('Stop order must be greater than previous stop order')
+            previous_order = stop.order
+
+            stop.station = self.stations_by_code.get(stop.station_code)
+            if stop.station is None:
+                raise ValueError(f'Invalid station code {stop.station_code}')
+
+        schedules = []
+        for schedule in route['schedules']:
+            schedule = TrainService.CreateScheduleInput(
+                weekday=schedule['weekday'],
+                departure_time=self.__parse_time(schedule['departure_time']),
+                arrival_time=self.__parse_time(schedule['arrival_time']),
+            )
+            if schedule.weekday not in TimetableImportService.WEEKDAYS:
+                raise ValueError(f'Invalid weekday {schedule.weekday}')
+            if schedule.arrival_time <= schedule.departure_time:
+                raise ValueError('Schedule arrival time must be greater than departure time')
+            schedules.append(schedule)
+
+        return TrainService.CreateTrainInput(
+            name=name,
+            number=number,
+            route=TrainService.CreateRouteInput(
+                name=route_name,
+                seats=seats,
+                pricing=pricing,
+                stops=stops,
+                schedules=schedules,
+            ),
+        )
+
+    def __parse_time(self, value) -> time_of_day:
+        return value if isinstance(value, time_of_day) else time_of_day.fromisoformat(value)
+
+    def __skip(self, record_number: int, error: str) -> None:
+        self.report.skipped += 1
+        if len(self.report.errors) < TimetableImportService.MAX_REPORTED_ERRORS:
+            self.report.errors.append(f'Record {record_number}: {error}')
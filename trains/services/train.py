@@ -1,12 +1,16 @@
-from datetime import time
+from datetime import datetime, time
 from dataclasses import dataclass
 from django.db import transaction
+from django.utils import timezone
 from django.db.models import QuerySet
 from dataclasses_json import dataclass_json
 from django.core.exceptions import ValidationError
-from trains.models import Train, Route, Stop, Station, Schedule
+from trains.models import Train, Route, Stop, StopPair, Station, Schedule
+from trains.model_utils import RouteModelUtils, ScheduleModelUtils
 from trains.selectors import TrainSelectors, StopSelectors, RouteSelectors, ScheduleSelectors
 from trains.serializers import TrainSerializers, RouteSerializers, StopSerializers, ScheduleSerializers
+from bookings.selectors import BookingSelectors
+from utils.enums import BookingStatus
 
 class TrainService:
 
@@ -95,10 +99,13 @@ class TrainService:
         number: str,
         name: str = '',
     ) -> Train:
-        train, _ = Train.objects.get_or_create(
+        # Numbers stay taken by retired trains
+        train, _ = Train.all_objects.get_or_create(
             number=number,
             defaults={'name': name},
         )
+        if train.deleted:
+            raise ValidationError(f'Train {number} is retired')
         return train
     
     def add_routes_to_train(
@@ -107,15 +114,14 @@ class TrainService:
         route_data: 'TrainService.CreateRouteInput',
     ) -> None:
         with transaction.atomic():
-            existing_schedules = Schedule.objects.filter(
-                route__train=train
-            ).select_related('route').values(
-                'weekday', 'departure_time', 'arrival_time', 'route__name'
+            existing_schedules = ScheduleSelectors.get_week_intervals_queryset(
+                ScheduleSelectors.Options(filters={'route__train': train})
             )
 
             self.__validate_schedule_conflicts(
                 train=train,
                 new_schedules=route_data.schedules,
+                journey_minutes=RouteModelUtils.get_total_duration_minutes(stops_of_route=route_data.stops),
                 existing_schedules=existing_schedules,
             )
             
@@ -138,6 +144,8 @@ class TrainService:
                 ))
 
             Stop.objects.bulk_create(bulk_stops)
+            self.__rebuild_stop_pairs_of_route(route=route, stops_of_route=bulk_stops)
+            self.__invalidate_route_topologies(route_ids=[route.id])
 
             bulk_schedules = []
             for schedule in route_data.schedules:
@@ -154,76 +162,105 @@ class TrainService:
         self,
         train: Train,
         new_schedules: list['TrainService.CreateScheduleInput'],
-        existing_schedules: QuerySet[Schedule],
+        journey_minutes: int | None,
+        existing_schedules: QuerySet,
     ) -> None:
-        existing_by_weekday = {}
-        for schedule in existing_schedules:
-            weekday = schedule['weekday']
-            if weekday not in existing_by_weekday:
-                existing_by_weekday[weekday] = []
-            existing_by_weekday[weekday].append(schedule)
-        
-        for new_schedule in new_schedules:
-            weekday = new_schedule.weekday
-            new_departure = new_schedule.departure_time
-            new_arrival = new_schedule.arrival_time
-            
-            if weekday not in existing_by_weekday:
-                continue
-            
-            for existing in existing_by_weekday[weekday]:
-                existing_departure = existing['departure_time']
-                existing_arrival = existing['arrival_time']
-                if self.__check_schedules_overlap(
-                    new_departure, new_arrival,
-                    existing_departure, existing_arrival
-                ):
-                    raise ValidationError(
-                        f"Schedule conflict detected for train {train.number} on {weekday}. "
-                        f"New schedule ({new_departure}-{new_arrival}) overlaps with "
-                        f"existing route '{existing['route__name']}' "
-                        f"({existing_departure}-{existing_arrival}). "
-                        f"A train can only run one route at a time."
-                    )
-
-    def __check_schedules_overlap(
-        self,
-        start1, end1,
-        start2, end2
-    ) -> bool:
-        def time_to_minutes(time_obj):
-            return time_obj.hour * 60 + time_obj.minute
-        
-        start1_min = time_to_minutes(start1)
-        end1_min = time_to_minutes(end1)
-        start2_min = time_to_minutes(start2)
-        end2_min = time_to_minutes(end2)
-        
-        if end1_min < start1_min:
-            end1_min += 24 * 60
-        if end2_min < start2_min:
-            end2_min += 24 * 60
-        
-        return not (end1_min <= start2_min or end2_min <= start1_min)
-    
+        """
+        Checks the new schedules against the train's existing ones and each
+        other on the week timeline, so runs spilling past midnight into the
+        next weekday are caught too.
+        """
+        schedule_index = ScheduleModelUtils.get_week_interval_index(existing_schedules)
+        conflicts = schedule_index.find_conflicts(
+            (
+                *ScheduleModelUtils.get_week_interval(
+                    weekday=new_schedule.weekday,
+                    departure_time=new_schedule.departure_time,
+                    arrival_time=new_schedule.arrival_time,
+                    journey_minutes=journey_minutes,
+                ),
+                new_schedule,
+            )
+            for new_schedule in new_schedules
+        )
+        if not conflicts:
+            return
+
+        new_schedule, existing = conflicts[0]
+        if isinstance(existing, TrainService.CreateScheduleInput):
+            raise ValidationError(
+                f"Schedule conflict detected for train {train.number} on {new_schedule.weekday}. "
+                f"New schedule ({new_schedule.departure_time}-{new_schedule.arrival_time}) overlaps with "
+                f"new schedule on {existing.weekday} ({existing.departure_time}-{existing.arrival_time}). "
+                f"A train can only run one route at a time."
+            )
+        raise ValidationError(
+            f"Schedule conflict detected for train {train.number} on {new_schedule.weekday}. "
+            f"New schedule ({new_schedule.departure_time}-{new_schedule.arrival_time}) overlaps with "
+            f"existing route '{existing['route__name']}' on {existing['weekday']} "
+            f"({existing['departure_time']}-{existing['arrival_time']}). "
+            f"A train can only run one route at a time."
+        )
+
     def remove_route_from_train(
         self,
         route_id: int,
     ) -> None:
         with transaction.atomic():
-            route = Route.objects.get(id=route_id)
-            route.deleted = True
-            route.save()
-
-            stops_of_route: list[Stop] = list(route.stops_of_route.all())
-            for stop in stops_of_route:
-                stop.deleted = True
-                stop.save()
-
-            schedules_of_route: list[Schedule] = list(route.schedules_of_route.all())
-            for schedule in schedules_of_route:
-                schedule.deleted = True
-                schedule.save()
+            if not Route.objects.filter(id=route_id).exists():
+                raise Route.DoesNotExist('Route matching query does not exist.')
+
+            self.__retire_routes(route_ids=[route_id], now=timezone.now())
+
+    def retire_train(
+        self,
+        train_id: int,
+    ) -> int:
+        """
+        Soft deletes the train with its routes, stops and schedules, and
+        flags the upcoming bookings on them. Returns the number of retired
+        routes.
+        """
+        with transaction.atomic():
+            now = timezone.now()
+            if not Train.objects.filter(id=train_id).update(deleted=True, updated_at=now):
+                raise Train.DoesNotExist('Train matching query does not exist.')
+
+            route_ids = list(Route.all_objects.filter(train_id=train_id, deleted=False).values_list('id', flat=True))
+            self.__retire_routes(route_ids=route_ids, now=now)
+            return len(route_ids)
+
+    def __retire_routes(
+        self,
+        route_ids: list[int],
+        now: datetime,
+    ) -> None:
+        """
+        Soft deletes the routes and everything hanging off them with one
+        UPDATE per table, whatever the number of routes.
+        """
+        Route.all_objects.filter(id__in=route_ids, deleted=False).update(deleted=True, updated_at=now)
+        Stop.all_objects.filter(route_id__in=route_ids, deleted=False).update(deleted=True, updated_at=now)
+        Schedule.all_objects.filter(route_id__in=route_ids, deleted=False).update(deleted=True, updated_at=now)
+        StopPair.all_objects.filter(route_id__in=route_ids).delete()
+        self.__flag_disrupted_bookings(filters={'schedule__route_id__in': route_ids}, now=now)
+        self.__invalidate_route_topologies(route_ids=route_ids)
+
+    def __flag_disrupted_bookings(
+        self,
+        filters: dict,
+        now: datetime,
+    ) -> int:
+        return BookingSelectors.generate_queryset(
+            BookingSelectors.Options(
+                filters=dict(
+                    journey_date__gte=now.date(),
+                    status__in=[BookingStatus.CONFIRMED.value, BookingStatus.WAITING.value],
+                    disruption_datetime__isnull=True,
+                    **filters,
+                ),
+            )
+        ).update(disruption_datetime=now, updated_at=now)
     
     def add_schedule_to_route(
         self,
@@ -232,15 +269,17 @@ class TrainService:
         schedule: 'TrainService.CreateScheduleInput',
     ) -> None:
         with transaction.atomic():
-            existing_schedules = Schedule.objects.filter(
-                route__train=train
-            ).select_related('route').values(
-                'weekday', 'departure_time', 'arrival_time', 'route__name'
+            existing_schedules = ScheduleSelectors.get_week_intervals_queryset(
+                ScheduleSelectors.Options(filters={'route__train': train})
             )
+            stops_of_route: list[Stop] = list(StopSelectors.generate_queryset(
+                StopSelectors.Options(filters={'route': route})
+            ))
 
             self.__validate_schedule_conflicts(
                 train=train,
                 new_schedules=[schedule],
+                journey_minutes=RouteModelUtils.get_total_duration_minutes(stops_of_route=stops_of_route) if stops_of_route else None,
                 existing_schedules=existing_schedules,
             )
 
@@ -250,15 +289,19 @@ class TrainService:
                 arrival_time=schedule.arrival_time,
                 departure_time=schedule.departure_time,
             )
+            self.__invalidate_timetable()
     
     def remove_schedule_from_route(
         self,
         schedule_id: int,
     ) -> None:
         with transaction.atomic():
-            schedule = Schedule.objects.get(id=schedule_id)
-            schedule.deleted = True
-            schedule.save()
+            now = timezone.now()
+            if not Schedule.objects.filter(id=schedule_id).update(deleted=True, updated_at=now):
+                raise Schedule.DoesNotExist('Schedule matching query does not exist.')
+
+            self.__flag_disrupted_bookings(filters={'schedule_id': schedule_id}, now=now)
+            self.__invalidate_timetable()
 
     def update_stops_of_route(
         self,
@@ -266,11 +309,11 @@ class TrainService:
         stops: list['TrainService.CreateStopInput'],
     ) -> None:
         with transaction.atomic():
+            now = timezone.now()
             route = Route.objects.get(id=route_id)
-            stops_of_route: list[Stop] = list(route.stops_of_route.all())
-            for stop in stops_of_route:
-                stop.deleted = True
-                stop.save()
+            Stop.all_objects.filter(route=route, deleted=False).update(deleted=True, updated_at=now)
+            # Upcoming bookings still point at the retired stops
+            self.__flag_disrupted_bookings(filters={'schedule__route': route}, now=now)
 
             bulk_stops = []
             for stop in stops:
@@ -284,5 +327,28 @@ class TrainService:
                 ))
 
             Stop.objects.bulk_create(bulk_stops)
+            self.__rebuild_stop_pairs_of_route(route=route, stops_of_route=bulk_stops)
+            self.__invalidate_route_topologies(route_ids=[route.id])
 
-    
+    def __rebuild_stop_pairs_of_route(
+        self,
+        route: Route,
+        stops_of_route: list[Stop],
+    ) -> None:
+        StopPair.all_objects.filter(route=route).delete()
+        StopPair.objects.bulk_create(RouteModelUtils.get_stop_pairs(
+            route=route,
+            stops_of_route=stops_of_route,
+        ))
+
+    def __invalidate_route_topologies(
+        self,
+        route_ids: list[int],
+    ) -> None:
+        # Bumped only after commit, so no reader can cache the old rows
+        # under the new version.
+        transaction.on_commit(lambda: RouteSelectors.topology_cache.invalidate(route_ids))
+        self.__invalidate_timetable()
+
+    def __invalidate_timetable(self) -> None:
+        transaction.on_commit(lambda: ScheduleSelectors.timetable_versions.bump(['all']))
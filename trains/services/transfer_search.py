@@ -0,0 +1,300 @@
+import math
+import threading
+from dataclasses import dataclass
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from dataclasses_json import dataclass_json
+from datetime import date, datetime, time, timedelta
+from trains.selectors import ScheduleSelectors, StationSelectors, RouteSelectors, StopSelectors
+from utils.enums import Weekday
+
+
+MINUTES_PER_DAY = 24 * 60
+WEEKDAYS = [weekday.value for weekday in Weekday]
+
+
+class TransferSearchService:
+
+    @dataclass_json
+    @dataclass
+    class Input:
+        journey_date: date
+        source_station_code: str
+        destination_station_code: str
+        min_connection_minutes: int | None = None
+        max_connection_minutes: int | None = None
+        max_results: int | None = None
+
+    @dataclass_json
+    @dataclass
+    class Leg:
+        schedule_id: int
+        train_name: str
+        train_number: str
+        journey_date: date
+        source_station_code: str
+        destination_station_code: str
+        departure_datetime: datetime
+        arrival_datetime: datetime
+
+    @dataclass_json
+    @dataclass
+    class Itinerary:
+        transfer_station_code: str
+        connection_minutes: int
+        duration_minutes: int
+        legs: list['TransferSearchService.Leg']
+
+    class OutputSerializer(serializers.Serializer):
+        def to_representation(self, instance: 'TransferSearchService.Itinerary'):
+            return instance.to_dict()
+
+    class TimetableIndex:
+        """
+        Whole timetable flattened into plain dicts and tuples for the transfer
+        search. Times are minutes after midnight of the schedule run date, so a
+        run reaching a stop the next day simply has a value past 1440.
+        """
+
+        def __init__(
+            self,
+            version: str,
+            stations: list[tuple[int, str]],
+            routes: list[tuple[int, str, str]],
+            stops: list[tuple[int, int, int, int]],
+            schedules: list[tuple[int, int, str, time]],
+        ):
+            self.version = version
+            self.station_code_by_id: dict[int, str] = {station_id: code for station_id, code in stations}
+            self.station_id_by_code: dict[str, int] = {code: station_id for station_id, code in stations}
+            self.train_by_route_id: dict[int, tuple[str, str]] = {
+                route_id: (train_name, train_number)
+                for route_id, train_name, train_number in routes
+            }
+
+            # Stops of every route in order as (station_id, arrival, departure).
+            self.stops_by_route_id: dict[int, list[tuple[int, int, int]]] = {}
+            for route_id, station_id, arrival_minutes, departure_minutes in stops:
+                if route_id in self.train_by_route_id:
+                    self.stops_by_route_id.setdefault(route_id, []).append((station_id, arrival_minutes, departure_minutes))
+
+            self.position_by_route_id: dict[int, dict[int, int]] = {}
+            self.route_ids_by_station_id: dict[int, list[int]] = {}
+            for route_id, stops_of_route in self.stops_by_route_id.items():
+                positions: dict[int, int] = {}
+                for position, (station_id, _, _) in enumerate(stops_of_route):
+                    positions.setdefault(station_id, position)
+                self.position_by_route_id[route_id] = positions
+                for station_id in positions:
+                    self.route_ids_by_station_id.setdefault(station_id, []).append(route_id)
+
+            # Runs of every route as (schedule_id, weekday index, departure minutes).
+            self.schedules_by_route_id: dict[int, list[tuple[int, int, int]]] = {}
+            for schedule_id, route_id, weekday, departure_time in schedules:
+                if route_id in self.stops_by_route_id and weekday in WEEKDAYS:
+                    self.schedules_by_route_id.setdefault(route_id, []).append((
+                        schedule_id,
+                        WEEKDAYS.index(weekday),
+                        departure_time.hour * 60 + departure_time.minute,
+                    ))
+
+        @staticmethod
+        def build(version: str) -> 'TransferSearchService.TimetableIndex':
+            stations = StationSelectors.generate_queryset().values_list('id', 'code')
+            routes = RouteSelectors.generate_queryset().values_list('id', 'train__name', 'train__number')
+            stops = StopSelectors.generate_queryset(
+                StopSelectors.Options(order_by=['route_id', 'order'])
+            ).values_list('route_id', 'station_id', 'arrival_minutes_from_source', 'departure_minutes_from_source')
+            schedules = ScheduleSelectors.generate_queryset().values_list('id', 'route_id', 'weekday', 'departure_time')
+
+            return TransferSearchService.TimetableIndex(
+                version=version,
+                stations=list(stations),
+                routes=list(routes),
+                stops=list(stops),
+                schedules=list(schedules),
+            )
+
+        def get_event_count(self) -> int:
+            return sum(
+                len(self.stops_by_route_id[route_id]) * len(schedules_of_route)
+                for route_id, schedules_of_route in self.schedules_by_route_id.items()
+            )
+
+    timetable_index: 'TransferSearchService.TimetableIndex | None' = None
+    timetable_index_lock = threading.Lock()
+
+    @staticmethod
+    def get_timetable_index() -> 'TransferSearchService.TimetableIndex':
+        """
+        Process wide index, rebuilt when the timetable version moves. The
+        version is read before the rows, like every other versioned cache.
+        """
+        version = ScheduleSelectors.get_timetable_version()
+        timetable_index = TransferSearchService.timetable_index
+        if timetable_index and timetable_index.version == version:
+            return timetable_index
+
+        with TransferSearchService.timetable_index_lock:
+            timetable_index = TransferSearchService.timetable_index
+            if not timetable_index or timetable_index.version != version:
+                timetable_index = TransferSearchService.TimetableIndex.build(version)
+                TransferSearchService.timetable_index = timetable_index
+
+        return timetable_index
+
+    def __init__(self, input: 'TransferSearchService.Input'):
+        self.journey_date = input.journey_date
+        self.source_station_code = input.source_station_code
+        self.destination_station_code = input.destination_station_code
+        self.min_connection_minutes = (
+            input.min_connection_minutes
+            if input.min_connection_minutes is not None
+            else settings.TRANSFER_MIN_CONNECTION_MINUTES
+        )
+        self.max_connection_minutes = input.max_connection_minutes or settings.TRANSFER_MAX_CONNECTION_MINUTES
+        self.max_results = input.max_results or settings.TRANSFER_SEARCH_MAX_RESULTS
+
+    def search_itineraries(
+        self,
+        timetable_index: 'TransferSearchService.TimetableIndex | None' = None,
+    ) -> list['TransferSearchService.Itinerary']:
+        """
+        Two round RAPTOR style scan. Round one rides every run leaving the
+        source on the journey date and marks each station it reaches. Round
+        two boards, at those stations, every run of a route going on to the
+        destination that departs inside the connection window. Only itineraries no other one beats
+        on both departure and arrival are returned.
+        """
+        if self.min_connection_minutes > self.max_connection_minutes:
+            raise ValueError('Minimum connection time cannot exceed the maximum connection time')
+
+        timetable_index = timetable_index or TransferSearchService.get_timetable_index()
+        source_station_id = timetable_index.station_id_by_code.get(self.source_station_code)
+        destination_station_id = timetable_index.station_id_by_code.get(self.destination_station_code)
+        if source_station_id is None or destination_station_id is None or source_station_id == destination_station_id:
+            return []
+
+        destination_position_by_route_id = {
+            route_id: timetable_index.position_by_route_id[route_id][destination_station_id]
+            for route_id in timetable_index.route_ids_by_station_id.get(destination_station_id, [])
+        }
+        weekday_index = self.journey_date.weekday()
+
+        # Round one: every station reachable from the source without a change.
+        first_legs_by_station_id: dict[int, list[tuple[int, int, int, int]]] = {}
+        for route_id in timetable_index.route_ids_by_station_id.get(source_station_id, []):
+            stops_of_route = timetable_index.stops_by_route_id[route_id]
+            source_position = timetable_index.position_by_route_id[route_id][source_station_id]
+            for schedule_id, schedule_weekday_index, departure_minutes in timetable_index.schedules_by_route_id.get(route_id, []):
+                if schedule_weekday_index != weekday_index:
+                    continue
+                source_departure = departure_minutes + stops_of_route[source_position][2]
+                for station_id, arrival_minutes, _ in stops_of_route[source_position + 1:]:
+                    # Riding past the destination to change back is never useful.
+                    if station_id == destination_station_id:
+                        break
+                    if station_id == source_station_id:
+                        continue
+                    first_legs_by_station_id.setdefault(station_id, []).append(
+                        (schedule_id, route_id, source_departure, departure_minutes + arrival_minutes)
+                    )
+
+        # Round two: one change onto a route that reaches the destination.
+        itineraries_by_runs: dict[tuple, tuple] = {}
+        for transfer_station_id, first_legs in first_legs_by_station_id.items():
+            for route_id in timetable_index.route_ids_by_station_id.get(transfer_station_id, []):
+                destination_position = destination_position_by_route_id.get(route_id)
+                transfer_position = timetable_index.position_by_route_id[route_id][transfer_station_id]
+                if destination_position is None or transfer_position >= destination_position:
+                    continue
+
+                stops_of_route = timetable_index.stops_by_route_id[route_id]
+                transfer_departure_offset = stops_of_route[transfer_position][2]
+                destination_arrival_offset = stops_of_route[destination_position][1]
+                for first_schedule_id, first_route_id, source_departure, transfer_arrival in first_legs:
+                    if first_route_id == route_id:
+                        continue
+                    earliest_departure = transfer_arrival + self.min_connection_minutes
+                    latest_departure = transfer_arrival + self.max_connection_minutes
+                    for schedule_id, schedule_weekday_index, departure_minutes in timetable_index.schedules_by_route_id.get(route_id, []):
+                        run_departure = departure_minutes + transfer_departure_offset
+                        first_day_offset = max(0, math.ceil((earliest_departure - run_departure) / MINUTES_PER_DAY))
+                        last_day_offset = math.floor((latest_departure - run_departure) / MINUTES_PER_DAY)
+                        for day_offset in range(first_day_offset, last_day_offset + 1):
+                            if (weekday_index + day_offset) % 7 != schedule_weekday_index:
+                                continue
+                            run_key = (first_schedule_id, schedule_id, day_offset)
+                            transfer_departure = day_offset * MINUTES_PER_DAY + run_departure
+                            itinerary = (
+                                source_departure,
+                                day_offset * MINUTES_PER_DAY + departure_minutes + destination_arrival_offset,
+                                transfer_arrival,
+                                transfer_departure,
+                                transfer_station_id,
+                                first_schedule_id,
+                                first_route_id,
+                                schedule_id,
+                                route_id,
+                                day_offset,
+                            )
+                            # Same two runs through several stations: change at the
+                            # one giving the longest connection.
+                            best_itinerary = itineraries_by_runs.get(run_key)
+                            if not best_itinerary or (transfer_departure - transfer_arrival) > (best_itinerary[3] - best_itinerary[2]):
+                                itineraries_by_runs[run_key] = itinerary
+
+        pareto_itineraries = []
+        latest_source_departure = None
+        for itinerary in sorted(itineraries_by_runs.values(), key=lambda x: (x[1], -x[0], x[3] - x[2])):
+            if latest_source_departure is None or itinerary[0] > latest_source_departure:
+                pareto_itineraries.append(itinerary)
+                latest_source_departure = itinerary[0]
+
+        return [
+            self.__get_itinerary(timetable_index, itinerary)
+            for itinerary in pareto_itineraries[:self.max_results]
+        ]
+
+    def __get_itinerary(
+        self,
+        timetable_index: 'TransferSearchService.TimetableIndex',
+        itinerary: tuple,
+    ) -> 'TransferSearchService.Itinerary':
+        (
+            source_departure, destination_arrival, transfer_arrival, transfer_departure,
+            transfer_station_id, first_schedule_id, first_route_id, schedule_id, route_id, day_offset,
+        ) = itinerary
+        midnight = timezone.make_aware(datetime.combine(self.journey_date, time.min))
+        first_train_name, first_train_number = timetable_index.train_by_route_id[first_route_id]
+        train_name, train_number = timetable_index.train_by_route_id[route_id]
+        transfer_station_code = timetable_index.station_code_by_id[transfer_station_id]
+
+        return TransferSearchService.Itinerary(
+            transfer_station_code=transfer_station_code,
+            connection_minutes=transfer_departure - transfer_arrival,
+            duration_minutes=destination_arrival - source_departure,
+            legs=[
+                TransferSearchService.Leg(
+                    schedule_id=first_schedule_id,
+                    train_name=first_train_name,
+                    train_number=first_train_number,
+                    journey_date=self.journey_date,
+                    source_station_code=self.source_station_code,
+                    destination_station_code=transfer_station_code,
+                    departure_datetime=midnight + timedelta(minutes=source_departure),
+                    arrival_datetime=midnight + timedelta(minutes=transfer_arrival),
+                ),
+                TransferSearchService.Leg(
+                    schedule_id=schedule_id,
+                    train_name=train_name,
+                    train_number=train_number,
+                    journey_date=self.journey_date + timedelta(days=day_offset),
+                    source_station_code=transfer_station_code,
+                    destination_station_code=self.destination_station_code,
+                    departure_datetime=midnight + timedelta(minutes=transfer_departure),
+                    arrival_datetime=midnight + timedelta(minutes=destination_arrival),
+                ),
+            ],
+        )
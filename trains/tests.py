@@ -0,0 +1,632 @@
+from datetime import date, datetime, time, timedelta
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from unittest import skipIf
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth.models import User
+from bookings.models import Booking
+from bookings.services import SeatAllocationService
+from bookings.model_utils import numpy
+from trains.models import Station, Train, Route, Stop, StopPair, Schedule
+from trains.model_utils import RouteModelUtils
+from trains.selectors import StationSelectors
+from trains.services import JourneyCalendarService, JourneySearchService, TimetableImportService, TrainService, TransferSearchService
+from utils.enums import BookingType
+from utils.intervals import IntervalUtils
+from utils.serializers import JourneyDateSerializer
+
+
+class ScheduleTestMixin:
+    """
+    Builds routes over the stations of STATION_CODES with a small seat quota.
+    """
+
+    STATION_CODES = ('AAA', 'BBB', 'CCC')
+    GENERAL_SEATS = 4
+    TATKAL_SEATS = 2
+
+    def setUp(self):
+        cache.clear()
+        self.stations = [
+            Station.objects.create(name=f'Station {code}', city=code, state='State', code=code)
+            for code in self.STATION_CODES
+        ]
+
+    def create_schedule(
+        self,
+        journey_date: date,
+        departure_time: time,
+        stations: list[Station] | None = None,
+        minutes_between_stops: int = 60,
+    ) -> Schedule:
+        stations = stations or self.stations
+        train = Train.objects.create(name='Test Express', number=f'T{Train.all_objects.count()}')
+        route = Route.objects.create(
+            train=train,
+            name='Test Route',
+            seats={BookingType.GENERAL.value: self.GENERAL_SEATS, BookingType.TATKAL.value: self.TATKAL_SEATS},
+            pricing={BookingType.GENERAL.value: 100, BookingType.TATKAL.value: 150},
+        )
+        stops = Stop.objects.bulk_create([
+            Stop(
+                route=route,
+                station=station,
+                order=order,
+                distance_kms_from_source=order * 50,
+                arrival_minutes_from_source=order * minutes_between_stops,
+                departure_minutes_from_source=order * minutes_between_stops + (5 if order else 0),
+            )
+            for order, station in enumerate(stations)
+        ])
+        StopPair.objects.bulk_create(RouteModelUtils.get_stop_pairs(route=route, stops_of_route=stops))
+        journey_minutes = (len(stations) - 1) * minutes_between_stops + 5
+        return Schedule.objects.create(
+            route=route,
+            weekday=journey_date.strftime('%a').upper()[:3],
+            departure_time=departure_time,
+            arrival_time=(datetime.combine(journey_date, departure_time) + timedelta(minutes=journey_minutes)).time(),
+        )
+
+
+class JourneyDateValidationTest(ScheduleTestMixin, TestCase):
+    """
+    Every journey date field only takes dates from today up to
+    JourneyDateSerializer.MAX_DAYS_AHEAD days ahead.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='date_user')
+        self.client.force_login(self.user)
+        self.journey_date = timezone.now().date() + timedelta(days=2)
+        self.schedule = self.create_schedule(self.journey_date, time(10, 0))
+
+    def get_query_params(self, journey_date: date) -> dict:
+        return dict(
+            journey_date=journey_date.isoformat(),
+            source_station_code='AAA',
+            destination_station_code='CCC',
+            schedule_id=self.schedule.id,
+            booking_type=BookingType.GENERAL.value,
+        )
+
+    def test_search_and_details_reject_dates_outside_window(self):
+        today = timezone.now().date()
+        for url_name in ('journey-search', 'journey-details'):
+            for journey_date in (today - timedelta(days=1), today + timedelta(days=121)):
+                response = self.client.get(reverse(url_name), self.get_query_params(journey_date))
+                self.assertEqual(response.status_code, 400, (url_name, journey_date))
+                self.assertIn('journey_date', response.json())
+
+    def test_search_and_details_accept_dates_inside_window(self):
+        for url_name in ('journey-search', 'journey-details'):
+            response = self.client.get(reverse(url_name), self.get_query_params(self.journey_date))
+            self.assertEqual(response.status_code, 200, url_name)
+            self.assertTrue(response.json()['status'], url_name)
+
+
+class JourneyCalendarTest(ScheduleTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='calendar_user')
+        self.client.force_login(self.user)
+        self.journey_date = timezone.now().date() + timedelta(days=2)
+        self.schedule = self.create_schedule(self.journey_date, time(10, 0))
+
+    def allocate(self, source_station_code: str, destination_station_code: str, passenger_count: int) -> None:
+        SeatAllocationService(
+            input=SeatAllocationService.Input(
+                user=self.user,
+                journey_date=self.journey_date,
+                booking_type=BookingType.GENERAL.value,
+                schedule_id=self.schedule.id,
+                source_station_code=source_station_code,
+                destination_station_code=destination_station_code,
+            )
+        ).allocate_group(passenger_count=passenger_count)
+
+    def test_calendar_matches_search_journeys(self):
+        self.allocate('AAA', 'BBB', passenger_count=self.GENERAL_SEATS + 2)
+        self.allocate('BBB', 'CCC', passenger_count=1)
+
+        for source_station_code, destination_station_code in (('AAA', 'CCC'), ('BBB', 'CCC')):
+            calendar = JourneyCalendarService(
+                input=JourneyCalendarService.Input(
+                    start_date=self.journey_date,
+                    end_date=self.journey_date,
+                    source_station_code=source_station_code,
+                    destination_station_code=destination_station_code,
+                )
+            ).get_calendar()
+            journeys = JourneySearchService(
+                input=JourneySearchService.Input(
+                    journey_date=self.journey_date,
+                    source_station_code=source_station_code,
+                    destination_station_code=destination_station_code,
+                )
+            ).search_journeys()
+
+            [journey_availability] = calendar[0].journeys
+            [journey] = journeys
+            self.assertEqual(journey_availability.schedule_id, journey.id)
+            self.assertEqual(journey_availability.available_seats, journey.seat_details.available_seats)
+            self.assertEqual(journey_availability.waiting_seats.general, journey.seat_details.waiting_seats.general)
+            self.assertEqual(journey_availability.pricing, journey.general_details.pricing)
+            self.assertEqual(
+                journey_availability.general_booking_open,
+                journey.booking_window_details.general_booking_open,
+            )
+
+    def test_calendar_covers_whole_journey_date_window(self):
+        today = timezone.now().date()
+        end_date = today + timedelta(days=JourneyDateSerializer.MAX_DAYS_AHEAD)
+        query_params = dict(source_station_code='AAA', destination_station_code='CCC', start_date=today.isoformat())
+
+        response = self.client.get(reverse('journey-calendar'), dict(query_params, end_date=end_date.isoformat()))
+        self.assertEqual(response.status_code, 200)
+        calendar = response.json()['result']
+        self.assertEqual(len(calendar), JourneyDateSerializer.MAX_DAYS_AHEAD + 1)
+        # One run a week, starting two days from today
+        self.assertEqual(
+            sum(len(date_availability['journeys']) for date_availability in calendar),
+            len(range(2, JourneyDateSerializer.MAX_DAYS_AHEAD + 1, 7)),
+        )
+
+        response = self.client.get(
+            reverse('journey-calendar'),
+            dict(query_params, end_date=(end_date + timedelta(days=1)).isoformat()),
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class JourneySearchResultCacheTest(ScheduleTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='cache_user')
+        self.journey_date = timezone.now().date() + timedelta(days=2)
+        self.schedule = self.create_schedule(self.journey_date, time(10, 0))
+
+    def search(self, journey_date: date) -> tuple[list[dict], bool]:
+        return JourneySearchService(
+            input=JourneySearchService.Input(
+                journey_date=journey_date,
+                source_station_code='AAA',
+                destination_station_code='CCC',
+            )
+        ).get_serialized_journeys()
+
+    def allocate(self, journey_date: date, source_station_code: str, destination_station_code: str) -> None:
+        # Inventory versions are bumped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            SeatAllocationService(
+                input=SeatAllocationService.Input(
+                    user=self.user,
+                    journey_date=journey_date,
+                    booking_type=BookingType.GENERAL.value,
+                    schedule_id=self.schedule.id,
+                    source_station_code=source_station_code,
+                    destination_station_code=destination_station_code,
+                )
+            ).allocate()
+
+    def test_booking_invalidates_cached_result_of_its_schedule_run(self):
+        result, cache_hit = self.search(self.journey_date)
+        self.assertFalse(cache_hit)
+        self.assertEqual(result[0]['seat_details']['available_seats']['general'], self.GENERAL_SEATS)
+        self.assertTrue(self.search(self.journey_date)[1])
+
+        # A booking on an overlapping segment changes the seats of the listed journey
+        self.allocate(self.journey_date, 'BBB', 'CCC')
+        result, cache_hit = self.search(self.journey_date)
+        self.assertFalse(cache_hit)
+        self.assertEqual(result[0]['seat_details']['available_seats']['general'], self.GENERAL_SEATS - 1)
+        self.assertTrue(self.search(self.journey_date)[1])
+
+    def test_booking_on_another_date_keeps_cached_result(self):
+        self.search(self.journey_date)
+
+        self.allocate(self.journey_date + timedelta(days=7), 'AAA', 'CCC')
+        result, cache_hit = self.search(self.journey_date)
+        self.assertTrue(cache_hit)
+        self.assertEqual(result[0]['seat_details']['available_seats']['general'], self.GENERAL_SEATS)
+
+
+class TransferSearchTest(ScheduleTestMixin, TestCase):
+    """
+    AAA -> BBB arrives at 09:00, BBB -> CCC leaves BBB at 09:20 and 09:45.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.journey_date = timezone.now().date() + timedelta(days=2)
+        station_aaa, station_bbb, station_ccc = self.stations
+        self.create_schedule(self.journey_date, time(8, 0), stations=[station_aaa, station_bbb])
+        self.early_connection = self.create_schedule(self.journey_date, time(9, 20), stations=[station_bbb, station_ccc])
+        self.late_connection = self.create_schedule(self.journey_date, time(9, 45), stations=[station_bbb, station_ccc])
+        self.timetable_index = TransferSearchService.TimetableIndex.build(version='test')
+
+    def search(self, min_connection_minutes: int | None = None) -> list['TransferSearchService.Itinerary']:
+        return TransferSearchService(
+            input=TransferSearchService.Input(
+                journey_date=self.journey_date,
+                source_station_code='AAA',
+                destination_station_code='CCC',
+                min_connection_minutes=min_connection_minutes,
+            )
+        ).search_itineraries(timetable_index=self.timetable_index)
+
+    def test_connections_shorter_than_minimum_are_skipped(self):
+        [itinerary] = self.search(min_connection_minutes=15)
+        self.assertEqual((itinerary.legs[1].schedule_id, itinerary.connection_minutes), (self.early_connection.id, 20))
+
+        [itinerary] = self.search(min_connection_minutes=30)
+        self.assertEqual((itinerary.legs[1].schedule_id, itinerary.connection_minutes), (self.late_connection.id, 45))
+        self.assertEqual(itinerary.transfer_station_code, 'BBB')
+        self.assertEqual(
+            itinerary.legs[1].departure_datetime - itinerary.legs[0].arrival_datetime,
+            timedelta(minutes=45),
+        )
+
+        self.assertEqual(self.search(min_connection_minutes=46), [])
+
+    @override_settings(TRANSFER_MIN_CONNECTION_MINUTES=25)
+    def test_minimum_defaults_to_setting(self):
+        [itinerary] = self.search()
+        self.assertEqual(itinerary.connection_minutes, 45)
+
+
+@skipIf(numpy is None, 'NumPy is not installed')
+class SeatCountPathsTest(ScheduleTestMixin, TestCase):
+    """
+    Seat details are the same whether overlapping bookings are counted in
+    SQL, in the plain loop or with NumPy.
+    """
+
+    STATION_CODES = ('AAA', 'BBB', 'CCC', 'DDD')
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='seat_count_user')
+        self.client.force_login(self.user)
+        self.journey_date = timezone.now().date() + timedelta(days=2)
+        self.schedule = self.create_schedule(self.journey_date, time(10, 0))
+
+    def allocate(self, source_station_code: str, destination_station_code: str, passenger_count: int) -> list:
+        return SeatAllocationService(
+            input=SeatAllocationService.Input(
+                user=self.user,
+                journey_date=self.journey_date,
+                booking_type=BookingType.GENERAL.value,
+                schedule_id=self.schedule.id,
+                source_station_code=source_station_code,
+                destination_station_code=destination_station_code,
+            )
+        ).allocate_group(passenger_count=passenger_count)
+
+    def test_counting_paths_agree(self):
+        self.allocate('AAA', 'CCC', passenger_count=3)
+        bookings = self.allocate('BBB', 'DDD', passenger_count=3)
+        self.allocate('CCC', 'DDD', passenger_count=2)
+        for booking in bookings[:2]:
+            self.assertTrue(self.client.post(reverse('booking-cancel', args=[booking.id])).json()['status'])
+
+        cancelled_and_waiting_seats = 0
+        for source_station_code, destination_station_code in (('AAA', 'BBB'), ('BBB', 'CCC'), ('AAA', 'DDD'), ('CCC', 'DDD')):
+            seat_details = []
+            for seat_counts_in_sql, seat_overlap_use_numpy in ((True, False), (False, False), (False, True)):
+                with override_settings(SEAT_COUNTS_IN_SQL=seat_counts_in_sql, SEAT_OVERLAP_USE_NUMPY=seat_overlap_use_numpy):
+                    [journey] = JourneySearchService(
+                        input=JourneySearchService.Input(
+                            journey_date=self.journey_date,
+                            source_station_code=source_station_code,
+                            destination_station_code=destination_station_code,
+                        )
+                    ).search_journeys()
+                    seat_details.append(journey.seat_details)
+            self.assertEqual(seat_details[1], seat_details[0], (source_station_code, destination_station_code))
+            self.assertEqual(seat_details[2], seat_details[0], (source_station_code, destination_station_code))
+            cancelled_and_waiting_seats += seat_details[0].cancelled_seats.general + seat_details[0].waiting_seats.general
+        self.assertGreater(cancelled_and_waiting_seats, 0)
+
+
+class TimetableImportTest(ScheduleTestMixin, TestCase):
+    """
+    Invalid records are skipped and reported by record number while the
+    valid ones of the same batch are imported.
+    """
+
+    def get_record(self, number: str, route_name: str = 'Test Route', weekday: str = 'MON', **route_fields) -> dict:
+        route = {
+            'name': route_name,
+            'seats': {BookingType.GENERAL.value: self.GENERAL_SEATS, BookingType.TATKAL.value: self.TATKAL_SEATS},
+            'pricing': {BookingType.GENERAL.value: 100, BookingType.TATKAL.value: 150},
+            'stops': [
+                {
+                    'order': order,
+                    'station_code': code,
+                    'distance_kms_from_source': order * 50,
+                    'arrival_minutes_from_source': order * 60,
+                    'departure_minutes_from_source': order * 60 + 5,
+                }
+                for order, code in enumerate(self.STATION_CODES)
+            ],
+            'schedules': [{'weekday': weekday, 'departure_time': '10:00', 'arrival_time': '12:05'}],
+        }
+        route.update(route_fields)
+        return {'number': number, 'name': 'Test Express', 'route': route}
+
+    def import_records(self, records: list[dict]) -> 'TimetableImportService.Report':
+        with self.captureOnCommitCallbacks(execute=True):
+            return TimetableImportService(
+                input=TimetableImportService.Input(batch_size=3)
+            ).import_records(enumerate(records, start=1))
+
+    def test_invalid_records_are_skipped_and_reported(self):
+        valid_record = self.get_record('T100')
+        missing_name_record = self.get_record('T101')
+        del missing_name_record['name']
+        unknown_station_record = self.get_record('T102')
+        unknown_station_record['route']['stops'][1]['station_code'] = 'ZZZ'
+        report = self.import_records([
+            valid_record,
+            missing_name_record,
+            unknown_station_record,
+            self.get_record('T103', schedules=[{'weekday': 'XYZ', 'departure_time': '10:00', 'arrival_time': '12:05'}]),
+            self.get_record('T104', schedules=[{'weekday': 'MON', 'departure_time': '12:05', 'arrival_time': '10:00'}]),
+            self.get_record('T105', stops=valid_record['route']['stops'][:1]),
+        ])
+
+        self.assertEqual(report.records, 6)
+        self.assertEqual(report.skipped, 5)
+        self.assertEqual(report.errors, [
+            "Record 2: Missing field 'name'",
+            'Record 3: Invalid station code ZZZ',
+            'Record 4: Invalid weekday XYZ',
+            'Record 5: Schedule arrival time must be greater than departure time',
+            'Record 6: At least 2 stations are required',
+        ])
+        self.assertEqual((report.trains, report.routes, report.stops, report.schedules), (1, 1, 3, 1))
+        self.assertEqual(list(Train.objects.values_list('number', flat=True)), ['T100'])
+
+    def test_schedule_conflicts_and_retired_trains_are_skipped(self):
+        retired_train = Train.objects.create(name='Retired Express', number='T200', deleted=True)
+        self.create_schedule(timezone.now().date(), time(10, 0))
+        existing_number = Train.objects.exclude(id=retired_train.id).get().number
+        existing_weekday = timezone.now().date().strftime('%a').upper()[:3]
+
+        report = self.import_records([
+            self.get_record('T200'),
+            self.get_record(existing_number, route_name='Overlapping Route', weekday=existing_weekday),
+            self.get_record('T201', route_name='Morning Route'),
+            self.get_record('T201', route_name='Overlapping Route'),
+            self.get_record('T201', route_name='Evening Route', weekday='TUE'),
+        ])
+
+        self.assertEqual(report.skipped, 3)
+        self.assertEqual(report.errors[0], 'Record 1: Train T200 is retired')
+        self.assertTrue(report.errors[1].startswith(f'Record 2: Schedule conflict for train {existing_number}'))
+        self.assertTrue(report.errors[2].startswith('Record 4: Schedule conflict for train T201'))
+        self.assertEqual(
+            sorted(Route.objects.filter(train__number='T201').values_list('name', flat=True)),
+            ['Evening Route', 'Morning Route'],
+        )
+        self.assertFalse(Route.all_objects.filter(train=retired_train).exists())
+
+
+class WeekIntervalIndexTest(SimpleTestCase):
+    """
+    Intervals running past Sunday midnight wrap around to Monday.
+    """
+
+    SUNDAY_23_00 = 6 * IntervalUtils.DAY_MINUTES + 23 * 60
+
+    def test_stored_interval_wrapping_the_week_end_overlaps_monday(self):
+        index = IntervalUtils.WeekIntervalIndex([(self.SUNDAY_23_00, self.SUNDAY_23_00 + 120, 'sunday night')])
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.find_conflict(30, 60), 'sunday night')
+        self.assertTrue(index.overlaps(IntervalUtils.WEEK_MINUTES + 30, IntervalUtils.WEEK_MINUTES + 60))
+        self.assertFalse(index.overlaps(60, 90))
+        self.assertFalse(index.overlaps(self.SUNDAY_23_00 - 60, self.SUNDAY_23_00))
+
+    def test_new_interval_wrapping_the_week_end_overlaps_monday(self):
+        index = IntervalUtils.WeekIntervalIndex([(30, 90, 'monday morning')])
+
+        self.assertEqual(index.find_conflict(self.SUNDAY_23_00, self.SUNDAY_23_00 + 120), 'monday morning')
+        self.assertIsNone(index.find_conflict(self.SUNDAY_23_00, self.SUNDAY_23_00 + 60))
+        self.assertEqual(
+            index.find_conflicts([
+                (self.SUNDAY_23_00, self.SUNDAY_23_00 + 90, 'first'),
+                (10, 20, 'second'),
+            ]),
+            [('second', 'first')],
+        )
+
+
+class TrainScheduleConflictTest(ScheduleTestMixin, TestCase):
+    """
+    A schedule of a Sunday night run is checked against the Monday schedules
+    of the same train.
+    """
+
+    def setUp(self):
+        super().setUp()
+        today = timezone.now().date()
+        sunday = today + timedelta(days=6 - today.weekday())
+        # Runs Sunday 23:00 to Monday 01:05
+        self.schedule = self.create_schedule(sunday, time(23, 0))
+
+    def add_schedule(self, weekday: str, departure_time: time, arrival_time: time) -> None:
+        TrainService().add_schedule_to_route(
+            train=self.schedule.route.train,
+            route=self.schedule.route,
+            schedule=TrainService.CreateScheduleInput(
+                weekday=weekday,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+            ),
+        )
+
+    def test_monday_schedule_overlapping_sunday_run_is_rejected(self):
+        with self.assertRaisesMessage(ValidationError, "overlaps with existing route 'Test Route' on SUN"):
+            self.add_schedule('MON', time(0, 30), time(2, 35))
+        self.assertEqual(Schedule.objects.filter(route=self.schedule.route).count(), 1)
+
+    def test_monday_schedule_after_sunday_run_is_added(self):
+        self.add_schedule('MON', time(1, 30), time(3, 35))
+        self.assertEqual(Schedule.objects.filter(route=self.schedule.route).count(), 2)
+
+
+class TrainRetireTest(ScheduleTestMixin, TestCase):
+    """
+    Retiring a train soft deletes everything hanging off it and flags the
+    upcoming bookings on it, leaving other trains alone.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='retire_user')
+        self.admin = User.objects.create(username='retire_admin', is_staff=True)
+        self.journey_date = timezone.now().date() + timedelta(days=2)
+        self.schedule = self.create_schedule(self.journey_date, time(10, 0))
+        self.train = self.schedule.route.train
+        # A second route of the same train, later in the day
+        self.other_route_schedule = self.create_schedule(self.journey_date, time(14, 0))
+        Route.objects.filter(id=self.other_route_schedule.route_id).update(train=self.train)
+        Train.objects.exclude(id=self.train.id).delete()
+        self.other_train_schedule = self.create_schedule(self.journey_date, time(10, 0))
+
+    def allocate(self, schedule: Schedule, passenger_count: int = 1) -> list:
+        return SeatAllocationService(
+            input=SeatAllocationService.Input(
+                user=self.user,
+                journey_date=self.journey_date,
+                booking_type=BookingType.GENERAL.value,
+                schedule_id=schedule.id,
+                source_station_code='AAA',
+                destination_station_code='CCC',
+            )
+        ).allocate_group(passenger_count=passenger_count)
+
+    def retire(self, user: User, train_id: int):
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('train-retire'), {'train_id': train_id})
+
+    def test_retire_train_cascades_and_flags_upcoming_bookings(self):
+        # Confirmed and waiting bookings on the train
+        confirmed_and_waiting = self.allocate(self.schedule, passenger_count=self.GENERAL_SEATS + 1)
+        other_route_booking = self.allocate(self.other_route_schedule)[0]
+        past_booking, cancelled_booking = self.allocate(self.schedule, passenger_count=2)
+        Booking.objects.filter(id=past_booking.id).update(journey_date=timezone.now().date() - timedelta(days=1))
+        self.client.force_login(self.user)
+        self.assertTrue(self.client.post(reverse('booking-cancel', args=[cancelled_booking.id])).json()['status'])
+        other_train_booking = self.allocate(self.other_train_schedule)[0]
+
+        response = self.retire(self.admin, self.train.id).json()
+        self.assertTrue(response['status'], response)
+        self.assertEqual(response['result'], 'Train retired with 2 routes')
+
+        route_ids = [self.schedule.route_id, self.other_route_schedule.route_id]
+        self.assertFalse(Train.objects.filter(id=self.train.id).exists())
+        self.assertFalse(Route.objects.filter(id__in=route_ids).exists())
+        self.assertFalse(Stop.objects.filter(route_id__in=route_ids).exists())
+        self.assertFalse(Schedule.objects.filter(route_id__in=route_ids).exists())
+        self.assertFalse(StopPair.all_objects.filter(route_id__in=route_ids).exists())
+        self.assertEqual(Stop.all_objects.filter(route_id__in=route_ids, deleted=True).count(), 2 * len(self.STATION_CODES))
+        self.assertTrue(Schedule.objects.filter(id=self.other_train_schedule.id).exists())
+
+        flagged_ids = set(Booking.objects.filter(disruption_datetime__isnull=False).values_list('id', flat=True))
+        self.assertEqual(flagged_ids, {booking.id for booking in confirmed_and_waiting} | {other_route_booking.id})
+        self.assertNotIn(other_train_booking.id, flagged_ids)
+
+    def test_retire_train_twice_or_without_admin_fails(self):
+        self.assertEqual(self.retire(self.user, self.train.id).status_code, 403)
+        self.assertTrue(self.retire(self.admin, self.train.id).json()['status'])
+        response = self.retire(self.admin, self.train.id).json()
+        self.assertFalse(response['status'])
+        self.assertEqual(response['result'], 'Train matching query does not exist.')
+
+
+class SoftDeleteManagerTest(ScheduleTestMixin, TestCase):
+    """
+    objects hides soft-deleted rows, all_objects and related lookups still
+    reach them.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.journey_date = timezone.now().date() + timedelta(days=2)
+        self.schedule = self.create_schedule(self.journey_date, time(10, 0))
+
+    def search(self) -> list:
+        return JourneySearchService(
+            input=JourneySearchService.Input(
+                journey_date=self.journey_date,
+                source_station_code='AAA',
+                destination_station_code='CCC',
+            )
+        ).search_journeys()
+
+    def test_objects_excludes_deleted_rows(self):
+        Station.objects.filter(code='BBB').update(deleted=True)
+
+        self.assertEqual(sorted(Station.objects.values_list('code', flat=True)), ['AAA', 'CCC'])
+        self.assertEqual(Station.all_objects.count(), len(self.STATION_CODES))
+        self.assertFalse(StationSelectors.generate_queryset(
+            StationSelectors.Options(filters={'code': 'BBB'})
+        ).exists())
+        self.assertTrue(StationSelectors.generate_queryset(
+            StationSelectors.Options(filters={'code': 'BBB'}, include_deleted=True)
+        ).exists())
+
+    def test_deleted_schedule_is_not_searched(self):
+        self.assertEqual(len(self.search()), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            TrainService().remove_schedule_from_route(schedule_id=self.schedule.id)
+
+        self.assertEqual(self.search(), [])
+        self.assertFalse(Schedule.objects.filter(id=self.schedule.id).exists())
+        self.assertTrue(Schedule.all_objects.get(id=self.schedule.id).deleted)
+
+    def test_replaced_stops_stay_reachable_from_bookings(self):
+        user = User.objects.create(username='soft_delete_user')
+        booking = SeatAllocationService(
+            input=SeatAllocationService.Input(
+                user=user,
+                journey_date=self.journey_date,
+                booking_type=BookingType.GENERAL.value,
+                schedule_id=self.schedule.id,
+                source_station_code='AAA',
+                destination_station_code='CCC',
+            )
+        ).allocate()
+        old_stop_ids = set(Stop.objects.filter(route=self.schedule.route).values_list('id', flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TrainService().update_stops_of_route(
+                route_id=self.schedule.route_id,
+                stops=[
+                    TrainService.CreateStopInput(
+                        order=stop.order,
+                        station=stop.station,
+                        station_code=stop.station.code,
+                        distance_kms_from_source=stop.distance_kms_from_source,
+                        arrival_minutes_from_source=stop.arrival_minutes_from_source,
+                        departure_minutes_from_source=stop.departure_minutes_from_source + 10,
+                    )
+                    for stop in Stop.objects.filter(route=self.schedule.route).select_related('station')
+                ],
+            )
+
+        live_stops = Stop.objects.filter(route=self.schedule.route)
+        self.assertEqual(live_stops.count(), len(self.STATION_CODES))
+        self.assertFalse(live_stops.filter(id__in=old_stop_ids).exists())
+        booking = Booking.objects.select_related('from_stop').get(id=booking.id)
+        self.assertIn(booking.from_stop.id, old_stop_ids)
+        self.assertTrue(booking.from_stop.deleted)
+        self.assertIsNotNone(booking.disruption_datetime)
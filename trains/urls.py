@@ -1,8 +1,17 @@
 from django.urls import path
-from trains.views import journey_search_view, journey_details_view, TrainView
+from trains.views import (
+    journey_search_view, journey_calendar_view, transfer_search_view, journey_details_view, TrainView, TrainRetireView, TimetableImportView,
+    async_journey_search_view, async_journey_details_view,
+)
 
 urlpatterns = [
     path('', TrainView.as_view(), name='trains'),
+    path('retire/', TrainRetireView.as_view(), name='train-retire'),
+    path('import/', TimetableImportView.as_view(), name='timetable-import'),
     path('search/', journey_search_view, name='journey-search'),
+    path('calendar/', journey_calendar_view, name='journey-calendar'),
+    path('transfer-search/', transfer_search_view, name='transfer-search'),
     path('details/', journey_details_view, name='journey-details'),
+    path('async/search/', async_journey_search_view, name='async-journey-search'),
+    path('async/details/', async_journey_details_view, name='async-journey-details'),
 ]
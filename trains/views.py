@@ -1,9 +1,14 @@
+import io
 from datetime import time
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
 from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework import serializers
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from trains.services import JourneySearchService, TrainService
+from rest_framework.parsers import MultiPartParser
+from trains.services import JourneySearchService, JourneyCalendarService, TransferSearchService, TrainService, TimetableImportService
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.contrib.auth.decorators import login_required
 from utils.serializers import JourneyDateSerializer
@@ -13,7 +18,7 @@ from utils.enums import BookingType, Weekday
 from rest_framework.decorators import action
 from django.contrib.auth.models import User
 from rest_framework.views import APIView
-from utils.pagination import Paginator
+from utils.pagination import CursorPaginator, Paginator
 from utils.queries import QueryUtils
 from trains.models import Station
 from django.db import transaction
@@ -23,6 +28,21 @@ class JourneySearchInputSerializer(serializers.Serializer):
     source_station_code = serializers.CharField(required=True)
     destination_station_code = serializers.CharField(required=True)
     journey_date = JourneyDateSerializer(required=True)
+    compact = serializers.BooleanField(required=False, default=False)
+    fields = serializers.CharField(required=False)
+
+    def validate_fields(self, value):
+        return [field.strip() for field in value.split(',') if field.strip()]
+
+    def validate(self, attrs):
+        # Compact output leaves out some fields, asking for them would silently drop them
+        fields = attrs.get('fields') or []
+        unknown_fields = set(fields) - set(JourneySearchService.get_output_fields(attrs['compact']))
+        if unknown_fields:
+            raise serializers.ValidationError({
+                'fields': f"Unknown fields{' in compact mode' if attrs['compact'] else ''}: {', '.join(sorted(unknown_fields))}"
+            })
+        return attrs
 
 @api_view(['GET'])
 @QueryUtils.log_queries
@@ -36,21 +56,136 @@ def journey_search_view(request):
         journey_date = serializer.validated_data['journey_date']
         source_station_code = serializer.validated_data['source_station_code']
         destination_station_code = serializer.validated_data['destination_station_code']
-        schedule_query_options = ScheduleSelectors.Options(
-            filters=dict(route__stops_of_route__station__code__in=[source_station_code, destination_station_code]),
-        )
 
         journey_search_service = JourneySearchService(
             input=JourneySearchService.Input(
                 journey_date=journey_date,
                 source_station_code=source_station_code,
                 destination_station_code=destination_station_code,
-                schedule_query_options=schedule_query_options,
             )
         )
 
-        journey_schedules = journey_search_service.search_journeys()
-        serialized_data = JourneySearchService.OutputSerializer(journey_schedules, many=True)
+        serialized_data, cache_hit = journey_search_service.get_serialized_journeys(
+            compact=serializer.validated_data['compact'],
+            fields=serializer.validated_data.get('fields'),
+        )
+        return Response({
+            'status': True,
+            'status_code': status.HTTP_200_OK,
+            'result': serialized_data,
+        }, headers={'X-Cache': 'HIT' if cache_hit else 'MISS'})
+    except Exception as e:
+        return Response({
+            'status': False,
+            'status_code': status.HTTP_400_BAD_REQUEST,
+            'result': str(e),
+        })
+
+
+@require_GET
+@QueryUtils.log_queries
+async def async_journey_search_view(request):
+    try :
+        serializer = JourneySearchInputSerializer(data=request.GET)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST, encoder=JSONEncoder)
+
+        journey_search_service = JourneySearchService(
+            input=JourneySearchService.Input(
+                journey_date=serializer.validated_data['journey_date'],
+                source_station_code=serializer.validated_data['source_station_code'],
+                destination_station_code=serializer.validated_data['destination_station_code'],
+            )
+        )
+
+        serialized_data, cache_hit = await journey_search_service.aget_serialized_journeys(
+            compact=serializer.validated_data['compact'],
+            fields=serializer.validated_data.get('fields'),
+        )
+        return JsonResponse({
+            'status': True,
+            'status_code': status.HTTP_200_OK,
+            'result': serialized_data,
+        }, headers={'X-Cache': 'HIT' if cache_hit else 'MISS'}, encoder=JSONEncoder)
+    except Exception as e:
+        return JsonResponse({
+            'status': False,
+            'status_code': status.HTTP_400_BAD_REQUEST,
+            'result': str(e),
+        }, encoder=JSONEncoder)
+
+
+class TransferSearchInputSerializer(serializers.Serializer):
+    source_station_code = serializers.CharField(required=True)
+    destination_station_code = serializers.CharField(required=True)
+    journey_date = JourneyDateSerializer(required=True)
+    min_connection_minutes = serializers.IntegerField(required=False, min_value=0)
+    max_connection_minutes = serializers.IntegerField(required=False, min_value=1)
+
+@api_view(['GET'])
+@QueryUtils.log_queries
+def transfer_search_view(request):
+    try :
+        serializer = TransferSearchInputSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        transfer_search_service = TransferSearchService(
+            input=TransferSearchService.Input(
+                journey_date=serializer.validated_data['journey_date'],
+                source_station_code=serializer.validated_data['source_station_code'],
+                destination_station_code=serializer.validated_data['destination_station_code'],
+                min_connection_minutes=serializer.validated_data.get('min_connection_minutes'),
+                max_connection_minutes=serializer.validated_data.get('max_connection_minutes'),
+            )
+        )
+
+        itineraries = transfer_search_service.search_itineraries()
+        serialized_data = TransferSearchService.OutputSerializer(itineraries, many=True)
+        return Response({
+            'status': True,
+            'status_code': status.HTTP_200_OK,
+            'result': serialized_data.data,
+        })
+    except Exception as e:
+        return Response({
+            'status': False,
+            'status_code': status.HTTP_400_BAD_REQUEST,
+            'result': str(e),
+        })
+
+
+class JourneyCalendarInputSerializer(serializers.Serializer):
+    source_station_code = serializers.CharField(required=True)
+    destination_station_code = serializers.CharField(required=True)
+    start_date = JourneyDateSerializer(required=True)
+    end_date = JourneyDateSerializer(required=True)
+
+    def validate(self, attrs):
+        if attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError('End date cannot be before start date')
+        return attrs
+
+@api_view(['GET'])
+@login_required
+@QueryUtils.log_queries
+def journey_calendar_view(request):
+    try :
+        serializer = JourneyCalendarInputSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        journey_calendar_service = JourneyCalendarService(
+            input=JourneyCalendarService.Input(
+                start_date=serializer.validated_data['start_date'],
+                end_date=serializer.validated_data['end_date'],
+                source_station_code=serializer.validated_data['source_station_code'],
+                destination_station_code=serializer.validated_data['destination_station_code'],
+            )
+        )
+
+        calendar = journey_calendar_service.get_calendar()
+        serialized_data = JourneyCalendarService.OutputSerializer(calendar, many=True)
         return Response({
             'status': True,
             'status_code': status.HTTP_200_OK,
@@ -120,14 +255,59 @@ def journey_details_view(request):
         })
     
 
+@require_GET
+@login_required
+@QueryUtils.log_queries
+async def async_journey_details_view(request):
+    try :
+        serializer = JourneyDetailsInputSerializer(data=request.GET)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST, encoder=JSONEncoder)
+
+        journey_search_service = JourneySearchService(
+            input=JourneySearchService.Input(
+                journey_date=serializer.validated_data['journey_date'],
+                source_station_code=serializer.validated_data['source_station_code'],
+                destination_station_code=serializer.validated_data['destination_station_code'],
+                schedule_query_options=ScheduleSelectors.Options(
+                    filters=dict(id=serializer.validated_data['schedule_id']),
+                ),
+                booking_query_options=BookingSelectors.Options(
+                    filters=dict(type=serializer.validated_data['booking_type']),
+                ),
+            )
+        )
+
+        journey_schedules = await journey_search_service.asearch_journeys()
+        journey_schedule = journey_schedules[0]
+        serialized_data = JourneySearchService.OutputSerializer(journey_schedule)
+        data = {
+            "seat_details": serialized_data.data['seat_details'],
+            "general_details": serialized_data.data['general_details'],
+            "booking_window_details": serialized_data.data['booking_window_details'],
+        }
+
+        return JsonResponse({
+            'status': True,
+            'result': data,
+            'status_code': status.HTTP_200_OK,
+        }, encoder=JSONEncoder)
+    except Exception as e:
+        return JsonResponse({
+            'status': False,
+            'status_code': status.HTTP_400_BAD_REQUEST,
+            'result': str(e),
+        }, encoder=JSONEncoder)
+    
+
 class TrainView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
     
     def get(self, request, *args, **kwargs):
         user: User = request.user
-        paginator = Paginator()
+        paginator = CursorPaginator() if CursorPaginator.is_requested(request) else Paginator()
         train_service = TrainService()
-        trains_queryset = train_service.get_trains_queryset()        
+        trains_queryset = train_service.get_trains_queryset().order_by('-created_at', '-id')        
         paginated_trains = paginator.paginate_queryset(trains_queryset, request)
         serialized_data = TrainService.OutputSerializer(paginated_trains, many=True)
         return paginator.get_paginated_response(serialized_data.data)
@@ -154,26 +334,28 @@ class TrainView(APIView):
         
     class StopListInputSerializer(serializers.ListSerializer):
         def __init__(self, *args, **kwargs):
+            kwargs.setdefault('child', TrainView.StopPostInputSerializer())
             super().__init__(*args, **kwargs)
-            self.child = TrainView.StopPostInputSerializer()
 
         def validate(self, value):
             if not value or len(value) < 2:
                 raise serializers.ValidationError('At least 2 stations are required')
             
             sorted_stops = sorted(value, key=lambda x: x['departure_minutes_from_source'])
-            for idx, stop in enumerate(sorted_stops):
-                stop_orders = [x['order'] for x in sorted_stops[0:idx]]
-                if idx != 0 and stop['order'] <= max(stop_orders):
+            for previous_stop, stop in zip(sorted_stops, sorted_stops[1:]):
+                if stop['order'] <= previous_stop['order']:
                     raise serializers.ValidationError('Stop order must be greater than previous stop order')
-                
-            stations = Station.objects.filter(code__in=[stop['station_code'] for stop in sorted_stops])
-            stations = list(stations)
-            if len(stations) != len(sorted_stops):
+
+            station_codes = {stop['station_code'] for stop in sorted_stops}
+            stations_by_code = {
+                station.code: station
+                for station in Station.objects.filter(code__in=station_codes)
+            }
+            if len(stations_by_code) != len(station_codes):
                 raise serializers.ValidationError('Invalid station codes')
 
             for stop in sorted_stops:
-                stop['station'] = next((station for station in stations if station.code == stop['station_code']), None)
+                stop['station'] = stations_by_code[stop['station_code']]
 
             return value
 
@@ -189,8 +371,8 @@ class TrainView(APIView):
         
     class ScheduleListInputSerializer(serializers.ListSerializer):
         def __init__(self, *args, **kwargs):
+            kwargs.setdefault('child', TrainView.SchedulePostInputSerializer())
             super().__init__(*args, **kwargs)
-            self.child = TrainView.SchedulePostInputSerializer()
     
     class RoutePostInputSerializer(serializers.Serializer):
         name = serializers.CharField(required=True)
@@ -381,3 +563,75 @@ class TrainView(APIView):
                 'status_code': status.HTTP_400_BAD_REQUEST,
                 'result': str(e),
             })
+
+
+class TrainRetireView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    class PostInputSerializer(serializers.Serializer):
+        train_id = serializers.IntegerField(required=True)
+
+    def post(self, request, *args, **kwargs):
+        try :
+            serializer = TrainRetireView.PostInputSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            route_count = TrainService().retire_train(train_id=serializer.validated_data['train_id'])
+
+            return Response({
+                'status': True,
+                'status_code': status.HTTP_200_OK,
+                'result': f'Train retired with {route_count} routes',
+            })
+        except Exception as e:
+            return Response({
+                'status': False,
+                'status_code': status.HTTP_400_BAD_REQUEST,
+                'result': str(e),
+            })
+
+
+class TimetableImportView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    class PostInputSerializer(serializers.Serializer):
+        file = serializers.FileField(required=True)
+        format = serializers.ChoiceField(required=False, choices=['jsonl', 'csv'])
+        batch_size = serializers.IntegerField(required=False, min_value=1, max_value=5000, default=500)
+
+    def post(self, request, *args, **kwargs):
+        try :
+            serializer = TimetableImportView.PostInputSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            uploaded_file = serializer.validated_data['file']
+            file_format = serializer.validated_data.get('format') or (
+                'csv' if uploaded_file.name.lower().endswith('.csv') else 'jsonl'
+            )
+            stream = io.TextIOWrapper(uploaded_file, encoding='utf-8', newline='')
+            records = (
+                TimetableImportService.read_csv(stream)
+                if file_format == 'csv'
+                else TimetableImportService.read_jsonl(stream)
+            )
+
+            report = TimetableImportService(
+                input=TimetableImportService.Input(
+                    batch_size=serializer.validated_data['batch_size'],
+                )
+            ).import_records(records)
+
+            return Response({
+                'status': True,
+                'status_code': status.HTTP_200_OK,
+                'result': report.to_dict(),
+            })
+        except Exception as e:
+            return Response({
+                'status': False,
+                'status_code': status.HTTP_400_BAD_REQUEST,
+                'result': str(e),
+            })
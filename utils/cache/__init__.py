@@ -0,0 +1,192 @@
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable
+from django.core.cache import caches
+
+
+class CacheUtils:
+
+    class VersionTokens:
+        """
+        Random version tokens kept in the shared cache, one per id.
+        Bumping a token invalidates everything cached under the old one.
+        """
+
+        def __init__(self, namespace: str, alias: str = 'default'):
+            self.namespace = namespace
+            self.alias = alias
+
+        @property
+        def cache(self):
+            return caches[self.alias]
+
+        def get_many(self, ids: Iterable[Hashable]) -> dict[Hashable, str]:
+            ids = list(dict.fromkeys(ids))
+            version_keys = {self.__get_version_key(id): id for id in ids}
+            versions = {
+                version_keys[version_key]: version
+                for version_key, version in self.cache.get_many(list(version_keys.keys())).items()
+            }
+
+            for id in ids:
+                if id in versions:
+                    continue
+                # Fresh random tokens never match a value cached under a version
+                # that was evicted, so losing a version key only costs a reload.
+                version = uuid.uuid4().hex
+                if not self.cache.add(self.__get_version_key(id), version, timeout=None):
+                    version = self.cache.get(self.__get_version_key(id), version)
+                versions[id] = version
+
+            return versions
+
+        def bump(self, ids: Iterable[Hashable]) -> None:
+            self.cache.set_many({
+                self.__get_version_key(id): uuid.uuid4().hex
+                for id in dict.fromkeys(ids)
+            }, timeout=None)
+
+        def __get_version_key(self, id: Hashable) -> str:
+            return f'{self.namespace}:version:{id}'
+
+    class CacheMetrics:
+        """
+        Hit and miss counters kept in the shared cache, so they add up
+        across processes.
+        """
+
+        def __init__(self, namespace: str, alias: str = 'default'):
+            self.namespace = namespace
+            self.alias = alias
+
+        @property
+        def cache(self):
+            return caches[self.alias]
+
+        def record_hit(self) -> None:
+            self.__increment('hits')
+
+        def record_miss(self) -> None:
+            self.__increment('misses')
+
+        def get_stats(self) -> dict[str, int | float]:
+            counters = self.cache.get_many([self.__get_counter_key('hits'), self.__get_counter_key('misses')])
+            hits = counters.get(self.__get_counter_key('hits'), 0)
+            misses = counters.get(self.__get_counter_key('misses'), 0)
+            return {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            }
+
+        def reset(self) -> None:
+            self.cache.delete_many([self.__get_counter_key('hits'), self.__get_counter_key('misses')])
+
+        def __increment(self, counter: str) -> None:
+            counter_key = self.__get_counter_key(counter)
+            self.cache.add(counter_key, 0, timeout=None)
+            try:
+                self.cache.incr(counter_key)
+            except ValueError:
+                # Evicted between add and incr, the next call starts over.
+                pass
+
+        def __get_counter_key(self, counter: str) -> str:
+            return f'{self.namespace}:metrics:{counter}'
+
+    class VersionedCache:
+        """
+        Read-through cache for rarely changing values keyed by id.
+
+        Each id has a version token in the shared cache (Redis in
+        production). Values are stored under (id, version) in the shared
+        cache and in a small in-process LRU, so one version bump
+        invalidates the value in every process. Values served from the
+        in-process level are shared between callers and must be treated
+        as read-only.
+        """
+
+        def __init__(
+            self,
+            namespace: str,
+            loader: Callable[[list[Hashable]], dict[Hashable, Any]],
+            timeout: int | None = None,
+            local_size: int = 1024,
+            alias: str = 'default',
+        ):
+            self.namespace = namespace
+            self.loader = loader
+            self.timeout = timeout
+            self.local_size = local_size
+            self.alias = alias
+            self.versions = CacheUtils.VersionTokens(namespace=namespace, alias=alias)
+            self.local_values: OrderedDict[Hashable, tuple[str, Any]] = OrderedDict()
+            self.lock = threading.Lock()
+
+        @property
+        def cache(self):
+            return caches[self.alias]
+
+        def get(self, id: Hashable) -> Any:
+            return self.get_many([id]).get(id)
+
+        def get_many(self, ids: Iterable[Hashable]) -> dict[Hashable, Any]:
+            ids = list(dict.fromkeys(ids))
+            if not ids:
+                return {}
+
+            versions = self.versions.get_many(ids)
+
+            values: dict[Hashable, Any] = {}
+            missing_ids: list[Hashable] = []
+            with self.lock:
+                for id in ids:
+                    local_value = self.local_values.get(id)
+                    if local_value and local_value[0] == versions[id]:
+                        self.local_values.move_to_end(id)
+                        values[id] = local_value[1]
+                    else:
+                        missing_ids.append(id)
+
+            if not missing_ids:
+                return values
+
+            value_keys = {self.__get_value_key(id, versions[id]): id for id in missing_ids}
+            for value_key, value in self.cache.get_many(list(value_keys.keys())).items():
+                values[value_keys[value_key]] = value
+
+            # A loader reading after the version was fetched can only see newer
+            # rows than the version describes, never older ones, since writers
+            # bump the version after their transaction commits.
+            unloaded_ids = [id for id in missing_ids if id not in values]
+            if unloaded_ids:
+                loaded_values = self.loader(unloaded_ids)
+                self.cache.set_many({
+                    self.__get_value_key(id, versions[id]): value
+                    for id, value in loaded_values.items()
+                }, timeout=self.timeout)
+                values.update(loaded_values)
+
+            with self.lock:
+                for id in missing_ids:
+                    if id in values:
+                        self.local_values[id] = (versions[id], values[id])
+                        self.local_values.move_to_end(id)
+                while len(self.local_values) > self.local_size:
+                    self.local_values.popitem(last=False)
+
+            return values
+
+        def invalidate(self, ids: Iterable[Hashable]) -> None:
+            ids = list(dict.fromkeys(ids))
+            if not ids:
+                return
+
+            self.versions.bump(ids)
+            with self.lock:
+                for id in ids:
+                    self.local_values.pop(id, None)
+
+        def __get_value_key(self, id: Hashable, version: str) -> str:
+            return f'{self.namespace}:value:{id}:{version}'
@@ -0,0 +1,126 @@
+import bisect
+from heapq import merge
+from typing import Any, Iterable
+
+
+class IntervalUtils:
+
+    DAY_MINUTES = 24 * 60
+    WEEK_MINUTES = 7 * DAY_MINUTES
+
+    @staticmethod
+    def split_week_interval(start: int, end: int) -> list[tuple[int, int]]:
+        """
+        Maps [start, end) onto the week, wrapping what runs past its end
+        around to its start.
+        """
+        if end <= start:
+            return []
+        if end - start >= IntervalUtils.WEEK_MINUTES:
+            return [(0, IntervalUtils.WEEK_MINUTES)]
+
+        start, end = start % IntervalUtils.WEEK_MINUTES, start % IntervalUtils.WEEK_MINUTES + (end - start)
+        if end <= IntervalUtils.WEEK_MINUTES:
+            return [(start, end)]
+        return [(start, IntervalUtils.WEEK_MINUTES), (0, end - IntervalUtils.WEEK_MINUTES)]
+
+    class WeekIntervalIndex:
+        """
+        Half-open [start, end) intervals on a weekly minute timeline, minute 0
+        being Monday 00:00, each carrying a payload reported on conflicts.
+        Intervals are kept sorted by start next to the running maximum of
+        their ends, so whether anything overlaps a new interval is answered
+        with one binary search, even when stored intervals overlap.
+        """
+
+        def __init__(self, intervals: Iterable[tuple[int, int, Any]] = ()):
+            self.starts: list[int] = []
+            self.ends: list[int] = []
+            self.payloads: list[Any] = []
+            # Position of the interval ending last among the first i + 1
+            self.max_end_positions: list[int] = []
+            # Intervals wrapping around the week end are stored as two parts
+            self.interval_count = 0
+            self.add_many(intervals)
+
+        def __len__(self) -> int:
+            return self.interval_count
+
+        def overlaps(self, start: int, end: int) -> bool:
+            return self.__find_conflict_position(start, end) is not None
+
+        def find_conflict(self, start: int, end: int) -> Any | None:
+            """
+            Returns the payload of a stored interval overlapping [start, end),
+            or None when there is none.
+            """
+            position = self.__find_conflict_position(start, end)
+            return None if position is None else self.payloads[position]
+
+        def find_conflicts(self, intervals: Iterable[tuple[int, int, Any]]) -> list[tuple[Any, Any]]:
+            """
+            Checks new intervals against the stored ones and against each
+            other without adding them, in O((n + m) log n). Returns the
+            (new payload, conflicting payload) pairs found.
+            """
+            conflicts = []
+            new_parts = []
+            for start, end, payload in intervals:
+                position = self.__find_conflict_position(start, end)
+                if position is not None:
+                    conflicts.append((payload, self.payloads[position]))
+                new_parts.extend(
+                    (part_start, part_end, payload)
+                    for part_start, part_end in IntervalUtils.split_week_interval(start, end)
+                )
+
+            # The wrapped parts of one interval never overlap each other, so
+            # any overlap found by the sweep is between two new intervals.
+            new_parts.sort(key=lambda part: part[0])
+            max_end, max_end_payload = None, None
+            for start, end, payload in new_parts:
+                if max_end is not None and max_end > start:
+                    conflicts.append((payload, max_end_payload))
+                if max_end is None or end > max_end:
+                    max_end, max_end_payload = end, payload
+            return conflicts
+
+        def __find_conflict_position(self, start: int, end: int) -> int | None:
+            for part_start, part_end in IntervalUtils.split_week_interval(start, end):
+                position = bisect.bisect_left(self.starts, part_end)
+                if not position:
+                    continue
+                max_end_position = self.max_end_positions[position - 1]
+                if self.ends[max_end_position] > part_start:
+                    return max_end_position
+            return None
+
+        def add(self, start: int, end: int, payload: Any = None) -> None:
+            self.add_many([(start, end, payload)])
+
+        def add_many(self, intervals: Iterable[tuple[int, int, Any]]) -> None:
+            new_parts = []
+            for start, end, payload in intervals:
+                week_parts = IntervalUtils.split_week_interval(start, end)
+                if week_parts:
+                    self.interval_count += 1
+                new_parts.extend((part_start, part_end, payload) for part_start, part_end in week_parts)
+            new_parts.sort(key=lambda part: part[0])
+            if not new_parts:
+                return
+
+            parts = list(merge(
+                zip(self.starts, self.ends, self.payloads),
+                new_parts,
+                key=lambda part: part[0],
+            ))
+            self.starts = [start for start, _, _ in parts]
+            self.ends = [end for _, end, _ in parts]
+            self.payloads = [payload for _, _, payload in parts]
+
+            self.max_end_positions = []
+            max_end_position = 0
+            for position, end in enumerate(self.ends):
+                if end > self.ends[max_end_position]:
+                    max_end_position = position
+                self.max_end_positions.append(max_end_position)
@@ -0,0 +1,57 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from utils.queries import QueryUtils
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records the queries of every request, reports them with QueryUtils.report
+    and exposes them in a Server-Timing header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        started_at = time.perf_counter()
+        with QueryUtils.QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.process_response(request, response, recorder, time.perf_counter() - started_at)
+
+    async def __acall__(self, request):
+        started_at = time.perf_counter()
+        with QueryUtils.QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self.process_response(request, response, recorder, time.perf_counter() - started_at)
+
+    def process_response(self, request, response, recorder: 'QueryUtils.QueryRecorder', duration: float):
+        if not recorder.name:
+            resolver_match = getattr(request, 'resolver_match', None)
+            recorder.name = resolver_match.view_name if resolver_match else request.path
+
+        stats = QueryUtils.report(recorder, extra=dict(
+            method=request.method,
+            path=request.path,
+            status_code=response.status_code,
+            total_ms=round(duration * 1000, 2),
+        ))
+
+        if settings.QUERY_SERVER_TIMING:
+            server_timing = [
+                f'db;dur={stats["db_ms"]};desc="{stats["queries"]} queries"',
+                f'db-slowest;dur={stats["slowest_ms"]}',
+                f'total;dur={stats["total_ms"]}',
+            ]
+            if stats['duplicates']:
+                server_timing.append(f'db-duplicates;desc="{len(stats["duplicates"])} repeated queries"')
+            response.headers['Server-Timing'] = ', '.join(server_timing)
+        return response
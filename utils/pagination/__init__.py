@@ -1,5 +1,11 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class Paginator(PageNumberPagination):
@@ -22,4 +28,107 @@ class Paginator(PageNumberPagination):
                 },
             },
             'result': data
-        }) 
\ No newline at end of file
+        })
+
+
+class CursorPaginator(BasePagination):
+    """
+    Keyset pagination over (created_at, id), newest first. Pages are read with
+    a range filter on the last seen key instead of COUNT(*) and OFFSET, so every
+    page costs the same however deep the client scrolls.
+    """
+    page_size = 10
+    max_page_size = 25
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    pagination_query_param = 'pagination'
+
+    @staticmethod
+    def is_requested(request) -> bool:
+        return (
+            request.query_params.get(CursorPaginator.pagination_query_param) == 'cursor'
+            or CursorPaginator.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> list:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        # An empty ?cursor= is the first page, same as no cursor at all
+        self.cursor = request.query_params.get(self.cursor_query_param) or None
+        created_at, id, reverse = self.decode_cursor(self.cursor) if self.cursor is not None else (None, None, False)
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+            if created_at is not None:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=id))
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+            if created_at is not None:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=id))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.first_item = results[0] if results else None
+        self.last_item = results[-1] if results else None
+        self.has_next = has_more if not reverse else self.cursor is not None
+        self.has_previous = has_more if reverse else self.cursor is not None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'status': True,
+            'status_code': 200,
+            'pagination': {
+                'cursor': self.cursor,
+                'page_size': self.page_size,
+                'links': {
+                    'next': self.get_next_link(),
+                    'previous': self.get_previous_link()
+                },
+            },
+            'result': data
+        })
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or self.last_item is None:
+            return None
+        return self.get_link(self.encode_cursor(self.last_item, reverse=False))
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if self.first_item is None:
+            # Stepped past either end, the previous page starts from the newest items
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.get_link(self.encode_cursor(self.first_item, reverse=True))
+
+    def get_link(self, cursor: str) -> str:
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    @staticmethod
+    def encode_cursor(item, reverse: bool) -> str:
+        position = [item.created_at.isoformat(), item.id, int(reverse)]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, int, bool]:
+        try:
+            created_at, id, reverse = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            return datetime.fromisoformat(created_at), int(id), bool(reverse)
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
@@ -1,34 +1,239 @@
-from django.db import connection
+import re
+import json
+import time
+import inspect
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from django.utils.module_loading import import_string
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
 from django.conf import settings
 
 
+logger = logging.getLogger(__name__)
+
+
 class QueryUtils:
 
+    class RowCountingCursor:
+        """
+        Stands in for the database cursor behind a CursorWrapper and adds the
+        rows fetched to the recorders active when the query ran.
+        """
+        def __init__(self, cursor):
+            self.cursor = cursor
+            self.recorders: tuple = ()
+
+        def __getattr__(self, attr):
+            return getattr(self.cursor, attr)
+
+        def __iter__(self):
+            for row in self.cursor:
+                self.record_rows(1)
+                yield row
+
+        def record_rows(self, rows: int):
+            for recorder in self.recorders:
+                recorder.rows += rows
+
+        def fetchone(self):
+            row = self.cursor.fetchone()
+            self.record_rows(row is not None)
+            return row
+
+        def fetchmany(self, size=None):
+            rows = self.cursor.fetchmany(size) if size is not None else self.cursor.fetchmany()
+            self.record_rows(len(rows))
+            return rows
+
+        def fetchall(self):
+            rows = self.cursor.fetchall()
+            self.record_rows(len(rows))
+            return rows
+
+    class QueryRecorder:
+        """
+        Records the count, the total duration, the slowest statement, the
+        fingerprint and the rows fetched of every query run in the current
+        context while active, on any connection and whatever the DEBUG
+        setting. The SQL itself is never kept per query. Recorders nest, a
+        query counts towards every active one.
+        """
+        def __init__(self, name: str = ''):
+            self.name = name
+            self.count = 0
+            self.rows = 0
+            self.duration = 0.0
+            self.slowest_duration = 0.0
+            self.slowest_sql = ''
+            self.fingerprints: Counter = Counter()
+            self.token = None
+
+        def __enter__(self):
+            for initialized_connection in connections.all(initialized_only=True):
+                QueryUtils.install_query_recorder(connection=initialized_connection)
+            self.token = QueryUtils.active_recorders.set(QueryUtils.active_recorders.get() + (self,))
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            QueryUtils.active_recorders.reset(self.token)
+
+        def record(self, sql: str, duration: float):
+            self.count += 1
+            self.duration += duration
+            if duration > self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql
+            self.fingerprints[QueryUtils.get_fingerprint(sql)] += 1
+
+        def get_duplicates(self, threshold: int) -> list[tuple[str, int]]:
+            return [
+                (fingerprint, count)
+                for fingerprint, count in self.fingerprints.most_common()
+                if count >= threshold
+            ]
+
+        def to_dict(self) -> dict:
+            return {
+                'name': self.name,
+                'queries': self.count,
+                'rows': self.rows,
+                'db_ms': round(self.duration * 1000, 2),
+                'slowest_ms': round(self.slowest_duration * 1000, 2),
+                'slowest_sql': self.slowest_sql[:QueryUtils.MAX_SQL_LENGTH],
+                'duplicates': [
+                    {'fingerprint': fingerprint[:QueryUtils.MAX_SQL_LENGTH], 'count': count}
+                    for fingerprint, count in self.get_duplicates(settings.QUERY_DUPLICATE_THRESHOLD)
+                ],
+            }
+
     class QueryCounter:
+        """
+        Records the queries run while the context is active and reports them
+        on exit.
+        """
         def __init__(self, description=""):
-            self.initial_queries = 0
             self.description = description
+            self.recorder = QueryUtils.QueryRecorder(name=description)
 
         def __enter__(self):
-            if settings.DEBUG:
-                self.initial_queries = len(connection.queries)
+            self.recorder.__enter__()
             return self
 
         def __exit__(self, exc_type, exc_val, exc_tb):
-            if settings.DEBUG:
-                total_queries = len(connection.queries) - self.initial_queries
-                for query in connection.queries[self.initial_queries:]:
-                    print("--------------------------------Query--------------------------------")
-                    print(query['sql'])
+            self.recorder.__exit__(exc_type, exc_val, exc_tb)
+            QueryUtils.report(self.recorder)
+
+    MAX_SQL_LENGTH = 500
+    IN_LIST_PATTERN = re.compile(r'\bIN \((?:%s, )*%s\)')
+    STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+    NUMBER_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
 
-                print()
-                print(f"Query count for function [{self.description}]: {total_queries}")
-                if total_queries > 5:
-                    print(f"Potential N+1 query detected! {total_queries} queries executed")
+    # Recorders active in the current context, the outermost first. Context
+    # variables follow sync_to_async, so the queries async views run in
+    # worker threads land in the recorder of their request.
+    active_recorders: ContextVar[tuple] = ContextVar('active_query_recorders', default=())
+
+    @staticmethod
+    def record_query(execute, sql, params, many, context):
+        """
+        execute_wrapper installed on every connection, timing the query only
+        when a recorder is active.
+        """
+        recorders = QueryUtils.active_recorders.get()
+        cursor_wrapper = context['cursor']
+        if not recorders:
+            if isinstance(cursor_wrapper.cursor, QueryUtils.RowCountingCursor):
+                cursor_wrapper.cursor.recorders = ()
+            return execute(sql, params, many, context)
+
+        # Rows are fetched after execute returns, through the wrapped cursor
+        if not isinstance(cursor_wrapper.cursor, QueryUtils.RowCountingCursor):
+            cursor_wrapper.cursor = QueryUtils.RowCountingCursor(cursor_wrapper.cursor)
+        cursor_wrapper.cursor.recorders = recorders
+
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started_at
+            for recorder in recorders:
+                recorder.record(sql, duration)
+
+    @staticmethod
+    def install_query_recorder(connection, **kwargs):
+        if QueryUtils.record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(QueryUtils.record_query)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def get_fingerprint(sql: str) -> str:
+        """
+        Normalizes a statement so that the same query with other parameters,
+        literals or IN list lengths shares one fingerprint.
+        """
+        sql = QueryUtils.STRING_PATTERN.sub('?', sql)
+        sql = QueryUtils.IN_LIST_PATTERN.sub('IN (...)', sql)
+        return QueryUtils.NUMBER_PATTERN.sub('?', sql)
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_metrics_sink(path: str):
+        return import_string(path) if path else None
+
+    @staticmethod
+    def report(recorder: 'QueryUtils.QueryRecorder', extra: dict | None = None) -> dict:
+        """
+        Logs the recorded queries as one JSON line, at WARNING level when they
+        contain duplicates or a slow statement, and hands them to the
+        QUERY_METRICS_SINK callable when one is configured.
+        """
+        stats = recorder.to_dict()
+        if extra:
+            stats.update(extra)
+
+        level = logging.INFO
+        if stats['duplicates'] or stats['slowest_ms'] >= settings.QUERY_SLOW_MS:
+            level = logging.WARNING
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(stats, default=str))
+
+        metrics_sink = QueryUtils.get_metrics_sink(settings.QUERY_METRICS_SINK)
+        if metrics_sink is not None:
+            try:
+                metrics_sink(stats)
+            except Exception:
+                logger.exception('Query metrics sink failed')
+        return stats
 
     @staticmethod
     def log_queries(func):
+        """
+        Names the request recorder after the view, or records and reports the
+        queries of the call itself when no request is being instrumented.
+        """
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                recorders = QueryUtils.active_recorders.get()
+                if recorders:
+                    recorders[-1].name = func.__name__
+                    return await func(*args, **kwargs)
+                with QueryUtils.QueryCounter(f"{func.__name__}"):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
         def wrapper(*args, **kwargs):
+            recorders = QueryUtils.active_recorders.get()
+            if recorders:
+                recorders[-1].name = func.__name__
+                return func(*args, **kwargs)
             with QueryUtils.QueryCounter(f"{func.__name__}"):
                 return func(*args, **kwargs)
         return wrapper
+
+
+connection_created.connect(QueryUtils.install_query_recorder, dispatch_uid='install_query_recorder')
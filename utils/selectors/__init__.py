@@ -39,6 +39,15 @@ class BaseSelectors:
 			self.select_related = select_related or []
 			self.include_deleted = include_deleted or False			
 		
+		def copy(self) -> 'BaseSelectors.Options':
+			return type(self)(
+				filters=dict(self.filters or {}),
+				exclude=dict(self.exclude or {}),
+				include_deleted=self.include_deleted,
+				select_related=list(self.select_related or []),
+				order_by=list(self.order_by or []),
+			)
+
 		def add_filter(self, key: str, value: Any) -> None:
 			if self.filters is None:
 				self.filters = {}
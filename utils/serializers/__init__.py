@@ -5,10 +5,13 @@ from rest_framework import serializers
 
 class JourneyDateSerializer(serializers.DateField):
     format = '%Y-%m-%d'
+    MAX_DAYS_AHEAD = 120
 
-    def validate(self, value):
+    def to_internal_value(self, value):
+        # Field level checks belong here, DRF only calls validate on serializers
+        value = super().to_internal_value(value)
         today = timezone.now().date()
-        max_date = today + timedelta(days=120)
+        max_date = today + timedelta(days=JourneyDateSerializer.MAX_DAYS_AHEAD)
         if value < today or value > max_date:
             raise serializers.ValidationError("Date cannot be in the past or more than 120 days from today")
         return value